@@ -367,6 +367,10 @@ class ComputeTemplates(AnalyzerExtension):
     Note: by default only the average and std are computed. Other operators (std, median, percentile) can be computed on demand
     after the SortingAnalyzer.compute("templates") and then the data dict is updated on demand.
 
+    When the "waveforms" extension is not computed, the templates are estimated in one chunked pass over the
+    recording without storing waveforms. In this case, "median" and "percentile" are approximated with streaming
+    P² quantile sketches (see `estimate_templates_with_accumulator()`).
+
     Parameters
     ----------
     operators: list[str] | list[(str, float)] (for percentile)
@@ -438,7 +442,9 @@ class ComputeTemplates(AnalyzerExtension):
 
         else:
             bad_operator_list = [
-                operator for operator in self.params["operators"] if operator not in ("average", "std")
+                operator
+                for operator in self.params["operators"]
+                if operator not in ("average", "std", "median") and not isinstance(operator, (list, tuple))
             ]
             if len(bad_operator_list) > 0:
                 raise ValueError(
@@ -455,6 +461,17 @@ class ComputeTemplates(AnalyzerExtension):
             return_in_uV = self.sorting_analyzer.return_in_uV
 
             return_std = "std" in self.params["operators"]
+            # median and percentiles are approximated with streaming quantile sketches
+            percentile_keys = []
+            percentiles = []
+            for operator in self.params["operators"]:
+                if operator == "median":
+                    percentile_keys.append("median")
+                    percentiles.append(50.0)
+                elif isinstance(operator, (list, tuple)):
+                    percentile_keys.append(f"percentile_{operator[1]}")
+                    percentiles.append(operator[1])
+
             sparsity_mask = None if self.sparsity is None else self.sparsity.mask
             output = estimate_templates_with_accumulator(
                 recording,
@@ -464,20 +481,23 @@ class ComputeTemplates(AnalyzerExtension):
                 self.nafter,
                 return_in_uV=return_in_uV,
                 return_std=return_std,
+                percentiles=percentiles if len(percentiles) > 0 else None,
                 sparsity_mask=sparsity_mask,
                 verbose=verbose,
                 **job_kwargs,
             )
+            if not isinstance(output, tuple):
+                output = (output,)
 
+            data = dict(average=output[0])
             if return_std:
-                templates, stds = output
-                data = dict(average=templates, std=stds)
-            else:
-                templates = output
-                data = dict(average=templates)
+                data["std"] = output[1]
+            if len(percentiles) > 0:
+                for key, arr in zip(percentile_keys, output[-1]):
+                    data[key] = arr
 
             if self.sparsity is not None:
-                # make average and std dense again
+                # make templates dense again
                 for k, arr in data.items():
                     dense_arr = self.sparsity.densify_templates(arr)
                     data[k] = dense_arr
@@ -842,6 +862,12 @@ class BaseMetric:
     needs_tmp_data = False  # whether the metric needs temporary data computed with MetricExtension._prepare_data
     needs_job_kwargs = False  # whether the metric needs job_kwargs
     supports_periods = False  # whether the metric function supports periods
+    supports_unit_parallel = False  # whether the metric can be computed independently on blocks of units in parallel
+    # which units must be updated after a merge or split:
+    #   * None : the metric of a unit only depends on this unit, only new units are computed
+    #   * "neighbors" : the metric depends on spatially close units (sharing channels with the new units)
+    #   * "all" : the metric depends on all units
+    population_dependency = None
     depend_on = []  # extensions the metric depends on
     deprecated_names = []  # list of metric names used by previous versions of spikeinterface
 
@@ -897,6 +923,245 @@ class BaseMetric:
         return results
 
 
+def compute_metric_by_unit_blocks(
+    metric, sorting_analyzer, unit_ids, metric_params, tmp_data, job_kwargs, periods=None
+):
+    """
+    Compute a metric by splitting `unit_ids` into blocks processed in parallel.
+
+    Only metrics with `supports_unit_parallel=True` are split, the other ones (and n_jobs=1) are computed
+    in the current process with `metric.compute()`.
+
+    With pool_engine="thread", the SortingAnalyzer and the tmp_data are shared by all workers without copy.
+    With pool_engine="process" and a "fork" context, the workers inherit them from the parent process
+    (copy-on-write). With other contexts ("spawn", "forkserver"), the SortingAnalyzer is reloaded from its folder
+    once per worker and the large numpy arrays of tmp_data are published in shared memory, the rest of
+    tmp_data is pickled once per worker.
+
+    Parameters
+    ----------
+    metric : BaseMetric
+        The metric class
+    sorting_analyzer : SortingAnalyzer
+        The input sorting analyzer
+    unit_ids : list
+        List of unit ids to compute the metric for
+    metric_params : dict
+        Parameters of the metric function
+    tmp_data : dict
+        Temporary data to pass to the metric function
+    job_kwargs : dict
+        Job keyword arguments: n_jobs, pool_engine, mp_context and max_threads_per_worker are used,
+        missing ones take the global values (see `fix_job_kwargs()`)
+    periods : np.ndarray | None
+        Numpy array of unit periods of unit_period_dtype if supports_periods is True
+
+    Returns
+    -------
+    results: dict | namedtuple
+        The results of the metric function for all units
+    """
+    job_kwargs = fix_job_kwargs(job_kwargs)
+    n_jobs = min(job_kwargs["n_jobs"], len(unit_ids))
+    if n_jobs <= 1 or not metric.supports_unit_parallel:
+        return metric.compute(
+            sorting_analyzer,
+            unit_ids=unit_ids,
+            metric_params=metric_params,
+            tmp_data=tmp_data,
+            job_kwargs=job_kwargs,
+            periods=periods,
+        )
+
+    pool_engine = job_kwargs["pool_engine"]
+    mp_context = job_kwargs["mp_context"]
+    max_threads_per_worker = job_kwargs["max_threads_per_worker"]
+
+    if pool_engine == "process":
+        import multiprocessing as mp
+
+        context = mp.get_context(mp_context)
+        use_fork = context.get_start_method() == "fork"
+        if use_fork:
+            sorting_analyzer_or_folder = sorting_analyzer
+        elif sorting_analyzer.format != "memory":
+            sorting_analyzer_or_folder = str(sorting_analyzer.folder)
+        else:
+            warnings.warn(
+                f"Computing metric {metric.metric_name} in parallel processes with a SortingAnalyzer in memory "
+                "needs the 'fork' mp_context. Using threads instead."
+            )
+            pool_engine = "thread"
+
+    unit_blocks = [block for block in np.array_split(np.asarray(unit_ids), n_jobs) if block.size > 0]
+    args_list = [(metric, block, metric_params, job_kwargs) for block in unit_blocks]
+
+    if pool_engine == "process":
+        from concurrent.futures import ProcessPoolExecutor
+
+        if use_fork:
+            # initargs are inherited by the forked workers, not pickled
+            worker_tmp_data = tmp_data
+            shared_memories = []
+        else:
+            worker_tmp_data, shared_memories = _share_tmp_data(tmp_data)
+        try:
+            with ProcessPoolExecutor(
+                max_workers=n_jobs,
+                mp_context=context,
+                initializer=_metric_worker_initializer,
+                initargs=(sorting_analyzer_or_folder, worker_tmp_data, periods, max_threads_per_worker),
+            ) as executor:
+                block_results = list(executor.map(_metric_worker_function, args_list))
+        finally:
+            for shm in shared_memories:
+                shm.close()
+                shm.unlink()
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+
+        # threads share the analyzer and tmp_data so the state is set in a dict local to this call
+        worker_state = dict(
+            sorting_analyzer=sorting_analyzer,
+            tmp_data=tmp_data,
+            periods=periods,
+            max_threads_per_worker=max_threads_per_worker,
+        )
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            block_results = list(executor.map(lambda args: _compute_metric_one_block(worker_state, args), args_list))
+
+    # gather the results of all blocks column by column
+    column_names = list(metric.metric_columns.keys())
+    results = {column_name: {} for column_name in column_names}
+    for block_result in block_results:
+        for column_name in column_names:
+            results[column_name].update(block_result[column_name])
+    if len(column_names) == 1:
+        return results[column_names[0]]
+    return namedtuple(f"{metric.metric_name}_result", column_names)(**results)
+
+
+def _compute_metric_one_block(worker_state, args):
+    metric, unit_ids, metric_params, job_kwargs = args
+    max_threads_per_worker = worker_state["max_threads_per_worker"]
+    compute_kwargs = dict(
+        unit_ids=list(unit_ids),
+        metric_params=metric_params,
+        tmp_data=worker_state["tmp_data"],
+        job_kwargs=job_kwargs,
+        periods=worker_state["periods"],
+    )
+    if max_threads_per_worker is None:
+        res = metric.compute(worker_state["sorting_analyzer"], **compute_kwargs)
+    else:
+        from threadpoolctl import threadpool_limits
+
+        with threadpool_limits(limits=max_threads_per_worker):
+            res = metric.compute(worker_state["sorting_analyzer"], **compute_kwargs)
+
+    # the results are returned as a dict of columns because the namedtuple classes are created
+    # inside the metric functions and can not be sent back from a worker process
+    if isinstance(res, dict):
+        return {list(metric.metric_columns.keys())[0]: res}
+    return dict(res._asdict())
+
+
+# numpy arrays of tmp_data smaller than this are pickled with the rest of tmp_data
+_min_shared_tmp_data_nbytes = 1_000_000
+
+
+class _SharedTmpData:
+    """
+    tmp_data pickled with its large numpy arrays replaced by references to shared memory buffers.
+    """
+
+    def __init__(self, pickled_tmp_data, descriptors):
+        self.pickled_tmp_data = pickled_tmp_data
+        self.descriptors = descriptors
+
+
+def _share_tmp_data(tmp_data):
+    """
+    Copy the large numpy arrays of tmp_data (wherever they are, in nested dicts or other objects) in shared
+    memory and pickle the rest of tmp_data. The returned shared memories must be unlinked by the caller.
+    """
+    import io
+    import pickle
+    from .core_tools import make_shared_array
+
+    shared_memories = []
+    descriptors = []
+    persistent_ids = {}
+
+    def persistent_id(obj):
+        if not isinstance(obj, np.ndarray) or obj.dtype.hasobject or obj.nbytes < _min_shared_tmp_data_nbytes:
+            return None
+        if id(obj) not in persistent_ids:
+            shared_arr, shm = make_shared_array(obj.shape, obj.dtype)
+            shared_arr[:] = obj
+            persistent_ids[id(obj)] = len(descriptors)
+            descriptors.append((shm.name, obj.shape, obj.dtype))
+            shared_memories.append(shm)
+        return persistent_ids[id(obj)]
+
+    buffer = io.BytesIO()
+    pickler = pickle.Pickler(buffer, protocol=pickle.HIGHEST_PROTOCOL)
+    pickler.persistent_id = persistent_id
+    pickler.dump(tmp_data)
+
+    return _SharedTmpData(buffer.getvalue(), descriptors), shared_memories
+
+
+def _load_shared_tmp_data(shared_tmp_data):
+    """
+    Rebuild tmp_data in a worker from `_share_tmp_data()`, arrays are views on the shared memory buffers.
+    The shared memories are returned to be kept alive as long as tmp_data is used.
+    """
+    import io
+    import pickle
+    from multiprocessing.shared_memory import SharedMemory
+
+    shared_memories = []
+    shared_arrays = []
+    for shm_name, shape, dtype in shared_tmp_data.descriptors:
+        shm = SharedMemory(name=shm_name, create=False)
+        shared_memories.append(shm)
+        shared_arrays.append(np.ndarray(shape=shape, dtype=dtype, buffer=shm.buf))
+
+    unpickler = pickle.Unpickler(io.BytesIO(shared_tmp_data.pickled_tmp_data))
+    unpickler.persistent_load = lambda pid: shared_arrays[pid]
+    return unpickler.load(), shared_memories
+
+
+# the trick is : this variable is global per worker (so not shared in the same process)
+global _metric_worker_state
+
+
+def _metric_worker_initializer(sorting_analyzer_or_folder, tmp_data, periods, max_threads_per_worker):
+    global _metric_worker_state
+    if isinstance(sorting_analyzer_or_folder, str):
+        from .sortinganalyzer import load_sorting_analyzer
+
+        sorting_analyzer = load_sorting_analyzer(sorting_analyzer_or_folder)
+    else:
+        sorting_analyzer = sorting_analyzer_or_folder
+    shared_memories = []
+    if isinstance(tmp_data, _SharedTmpData):
+        tmp_data, shared_memories = _load_shared_tmp_data(tmp_data)
+    _metric_worker_state = dict(
+        sorting_analyzer=sorting_analyzer,
+        tmp_data=tmp_data,
+        periods=periods,
+        max_threads_per_worker=max_threads_per_worker,
+        shared_memories=shared_memories,
+    )
+
+
+def _metric_worker_function(args):
+    global _metric_worker_state
+    return _compute_metric_one_block(_metric_worker_state, args)
+
+
 class BaseMetricExtension(AnalyzerExtension):
     """
     AnalyzerExtension that computes a metric and store the results in a dataframe.
@@ -917,9 +1182,13 @@ class BaseMetricExtension(AnalyzerExtension):
     need_backward_compatibility_on_load = False
     metric_list: list[BaseMetric] = None  # list of BaseMetric
     tmp_data_to_save = None
+    # tmp_data keys kept in memory (not saved) to speed up the update of the metrics after merges
+    tmp_data_to_cache = None
 
     def __init__(self, sorting_analyzer):
         super().__init__(sorting_analyzer)
+        self._tmp_data_cache = None
+        self._new_tmp_data_cache = None
 
     @classmethod
     def get_available_metric_names(cls):
@@ -1198,21 +1467,142 @@ class BaseMetricExtension(AnalyzerExtension):
         )
         return params
 
-    def _prepare_data(self, sorting_analyzer, unit_ids=None):
+    def _prepare_data(self, sorting_analyzer, unit_ids=None, tmp_data_cache=None):
         """
         Optional function to prepare shared data for metric computation.
 
         This function should return a dictionary containing any data that is shared across multiple metrics.
         The returned dictionary will be passed to each metric's compute function as `tmp_data` (if the metric
         requires it with the class attribute `needs_tmp_data=True`).
+        `tmp_data_cache` contains the `tmp_data_to_cache` of a previous computation, already updated
+        after a merge, which can be re-used instead of being recomputed.
         """
         return {}
 
+    def _cache_tmp_data(self, tmp_data):
+        if self.tmp_data_to_cache is None:
+            return None
+        return {k: tmp_data[k] for k in self.tmp_data_to_cache if k in tmp_data}
+
+    def _update_tmp_data_cache_after_merge(self, merge_unit_groups, new_unit_ids, new_sorting_analyzer, keep_mask):
+        """
+        Optional function to update the cached tmp_data after a merge.
+        Return None to recompute everything from scratch.
+        """
+        return None
+
+    def _get_unit_ids_to_update(self, new_sorting_analyzer, new_unit_ids, population_dependency):
+        """
+        Get the units whose metrics must be recomputed after a merge or a split.
+
+        Parameters
+        ----------
+        new_sorting_analyzer : SortingAnalyzer
+            The new SortingAnalyzer object after merging or splitting.
+        new_unit_ids : list[int | str]
+            The new unit ids created by the merge or the split.
+        population_dependency : None | "neighbors" | "all"
+            The `population_dependency` of the metric.
+
+        Returns
+        -------
+        unit_ids : np.ndarray
+            The unit ids to recompute.
+        """
+        all_unit_ids = new_sorting_analyzer.unit_ids
+        if population_dependency is None:
+            return np.asarray(new_unit_ids)
+        elif population_dependency == "neighbors" and new_sorting_analyzer.is_sparse():
+            mask = new_sorting_analyzer.sparsity.mask
+            new_unit_indices = new_sorting_analyzer.sorting.ids_to_indices(new_unit_ids)
+            new_units_channels = np.any(mask[new_unit_indices], axis=0)
+            affected = np.any(mask[:, new_units_channels], axis=1)
+            affected[new_unit_indices] = True
+            return all_unit_ids[affected]
+        else:
+            return all_unit_ids
+
+    def _update_metrics_after_merge_or_split(
+        self, new_sorting_analyzer, new_unit_ids, metric_names, tmp_data_cache=None, **job_kwargs
+    ):
+        """
+        Incremental computation of the metrics after a merge or a split.
+
+        Metrics that only depend on their unit (`population_dependency=None`) are computed for the new units.
+        Metrics that depend on other units are recomputed for the new units and the units affected by them,
+        the other rows are propagated from the current metrics.
+        """
+        local_metric_names = [m for m in metric_names if self.get_metric_by_name(m).population_dependency is None]
+        new_metrics, _, new_tmp_data = self._compute_metrics(
+            sorting_analyzer=new_sorting_analyzer,
+            unit_ids=new_unit_ids,
+            metric_names=local_metric_names,
+            **job_kwargs,
+        )
+        metrics = _update_data_after_merge_or_split(
+            self.sorting_analyzer, new_sorting_analyzer, self.data["metrics"], new_metrics, new_unit_ids
+        )
+
+        # group the other metrics by the units that need to be recomputed
+        metric_names_by_dependency = {}
+        for metric_name in metric_names:
+            population_dependency = self.get_metric_by_name(metric_name).population_dependency
+            if population_dependency is not None:
+                metric_names_by_dependency.setdefault(population_dependency, []).append(metric_name)
+
+        self._new_tmp_data_cache = None
+        for population_dependency, dependent_metric_names in metric_names_by_dependency.items():
+            unit_ids_to_update = self._get_unit_ids_to_update(new_sorting_analyzer, new_unit_ids, population_dependency)
+            updated_metrics, _, updated_tmp_data = self._compute_metrics(
+                sorting_analyzer=new_sorting_analyzer,
+                unit_ids=unit_ids_to_update,
+                metric_names=dependent_metric_names,
+                tmp_data_cache=tmp_data_cache,
+                **job_kwargs,
+            )
+            metrics.loc[unit_ids_to_update, updated_metrics.columns] = updated_metrics
+            new_cache = self._cache_tmp_data(updated_tmp_data)
+            if new_cache:
+                self._new_tmp_data_cache = new_cache
+
+        return metrics, new_tmp_data
+
+    def merge(
+        self,
+        new_sorting_analyzer,
+        merge_unit_groups,
+        new_unit_ids,
+        keep_mask=None,
+        verbose=False,
+        **job_kwargs,
+    ):
+        new_extension = super().merge(
+            new_sorting_analyzer, merge_unit_groups, new_unit_ids, keep_mask=keep_mask, verbose=verbose, **job_kwargs
+        )
+        # the cached intermediate data follow the curated analyzer
+        new_extension._tmp_data_cache = self._new_tmp_data_cache
+        self._new_tmp_data_cache = None
+        return new_extension
+
+    def split(
+        self,
+        new_sorting_analyzer,
+        split_units,
+        new_unit_ids,
+        verbose=False,
+        **job_kwargs,
+    ):
+        new_extension = super().split(new_sorting_analyzer, split_units, new_unit_ids, verbose=verbose, **job_kwargs)
+        new_extension._tmp_data_cache = self._new_tmp_data_cache
+        self._new_tmp_data_cache = None
+        return new_extension
+
     def _compute_metrics(
         self,
         sorting_analyzer: SortingAnalyzer,
         unit_ids: list[int | str] | None = None,
         metric_names: list[str] | None = None,
+        tmp_data_cache: dict | None = None,
         **job_kwargs,
     ):
         """
@@ -1227,6 +1617,8 @@ class BaseMetricExtension(AnalyzerExtension):
         metric_names : list[str] | None, default: None
             List of metric names to compute. If None, all metrics in params["metric_names"]
             are used.
+        tmp_data_cache : dict | None, default: None
+            Cached intermediate data passed to `_prepare_data()`.
 
         Returns
         -------
@@ -1240,7 +1632,9 @@ class BaseMetricExtension(AnalyzerExtension):
 
         if unit_ids is None:
             unit_ids = sorting_analyzer.unit_ids
-        tmp_data = self._prepare_data(sorting_analyzer=sorting_analyzer, unit_ids=unit_ids)
+        tmp_data = self._prepare_data(
+            sorting_analyzer=sorting_analyzer, unit_ids=unit_ids, tmp_data_cache=tmp_data_cache
+        )
         if metric_names is None:
             metric_names = self.params["metric_names"]
 
@@ -1271,7 +1665,8 @@ class BaseMetricExtension(AnalyzerExtension):
             try:
                 metric_params = self.params["metric_params"].get(metric_name, {})
 
-                res = metric.compute(
+                res = compute_metric_by_unit_blocks(
+                    metric,
                     sorting_analyzer,
                     unit_ids=unit_ids,
                     metric_params=metric_params,
@@ -1338,6 +1733,7 @@ class BaseMetricExtension(AnalyzerExtension):
 
         self.data["metrics"] = computed_metrics
         self.data["runtime_s"] = run_times
+        self._tmp_data_cache = self._cache_tmp_data(tmp_data)
 
         if self.tmp_data_to_save is not None:
             for k in self.tmp_data_to_save:
@@ -1401,12 +1797,11 @@ class BaseMetricExtension(AnalyzerExtension):
         available_metric_names = self.get_available_metric_names()
         metric_names = [m for m in self.params["metric_names"] if m in available_metric_names]
 
-        new_metrics, _, new_tmp_data = self._compute_metrics(
-            sorting_analyzer=new_sorting_analyzer, unit_ids=new_unit_ids, metric_names=metric_names, **job_kwargs
+        tmp_data_cache = self._update_tmp_data_cache_after_merge(
+            merge_unit_groups, new_unit_ids, new_sorting_analyzer, keep_mask
         )
-
-        metrics = _update_data_after_merge_or_split(
-            self.sorting_analyzer, new_sorting_analyzer, self.data["metrics"], new_metrics, new_unit_ids
+        metrics, new_tmp_data = self._update_metrics_after_merge_or_split(
+            new_sorting_analyzer, new_unit_ids, metric_names, tmp_data_cache=tmp_data_cache, **job_kwargs
         )
         new_data = dict()
         new_data["metrics"] = self._cast_metrics(metrics)
@@ -1449,12 +1844,8 @@ class BaseMetricExtension(AnalyzerExtension):
         metric_names = [m for m in self.params["metric_names"] if m in available_metric_names]
 
         new_unit_ids_f = list(chain(*new_unit_ids))
-        new_metrics, _, new_tmp_data = self._compute_metrics(
-            sorting_analyzer=new_sorting_analyzer, unit_ids=new_unit_ids_f, metric_names=metric_names, **job_kwargs
-        )
-
-        metrics = _update_data_after_merge_or_split(
-            self.sorting_analyzer, new_sorting_analyzer, self.data["metrics"], new_metrics, new_unit_ids_f
+        metrics, new_tmp_data = self._update_metrics_after_merge_or_split(
+            new_sorting_analyzer, new_unit_ids_f, metric_names, **job_kwargs
         )
         new_data = dict()
         new_data["metrics"] = self._cast_metrics(metrics)
@@ -238,6 +238,8 @@ def load_sorting_analyzer(folder, load_extensions=True, format="auto", backend_o
 
             * storage_options: dict | None (fsspec storage options)
             * saving_options: dict | None (additional saving options for creating and saving datasets)
+            * lazy: bool, default: False (if True, extension arrays are memory-mapped for "binary_folder"
+              and only read on access for "zarr", which makes opening a large analyzer fast)
 
     Returns
     -------
@@ -302,6 +304,7 @@ class SortingAnalyzer:
         # - storage_options: dict | None (fsspec storage options)
         # - saving_options: dict | None
         # (additional saving options for creating and saving datasets, e.g. compression/filters for zarr)
+        # - lazy: bool (memory-mapped or on-access loading of extension data)
         self._backend_options = {} if backend_options is None else backend_options
 
         # extensions are not loaded at init
@@ -2528,6 +2531,7 @@ class AnalyzerExtension:
 
     def load_data(self):
         ext_data = None
+        lazy = self.sorting_analyzer._backend_options.get("lazy", False)
         if self.format == "binary_folder":
             extension_folder = self._get_binary_extension_folder()
             for ext_data_file in extension_folder.iterdir():
@@ -2546,10 +2550,11 @@ class AnalyzerExtension:
                         ext_data = json.load(f)
                 elif ext_data_file.suffix == ".npy":
                     # The lazy loading of an extension is complicated because if we compute again
-                    # and have a link to the old buffer on windows then it fails
-                    # ext_data = np.load(ext_data_file, mmap_mode="r")
-                    # so we go back to full loading
-                    ext_data = np.load(ext_data_file)
+                    # and have a link to the old buffer on windows then it fails.
+                    # So full loading is the default and memmap is opt-in with backend_options={"lazy": True}:
+                    # in that case the buffers are copied in memory before the folder is reset
+                    # (see _materialize_lazy_data())
+                    ext_data = np.load(ext_data_file, mmap_mode="r" if lazy else None)
                 elif ext_data_file.suffix == ".csv":
                     import pandas as pd
 
@@ -2569,6 +2574,8 @@ class AnalyzerExtension:
                 self.set_data(ext_data_name, ext_data)
         elif self.format == "zarr":
             extension_group = self._get_zarr_extension_group(mode="r")
+            if lazy:
+                self.data = LazyZarrExtensionData()
             for ext_data_name in extension_group.keys():
                 ext_data_ = extension_group[ext_data_name]
                 if "dict" in ext_data_.attrs:
@@ -2584,6 +2591,10 @@ class AnalyzerExtension:
                     ext_data = ext_data.convert_dtypes()
                 elif "object" in ext_data_.attrs:
                     ext_data = ext_data_[0]
+                elif lazy:
+                    # the array is read from the store on first access
+                    self.data.set_lazy(ext_data_name, ext_data_)
+                    continue
                 else:
                     # this load in memmory
                     ext_data = np.array(ext_data_)
@@ -2598,6 +2609,10 @@ class AnalyzerExtension:
         new_extension.params = self.params.copy()
         if unit_ids is None:
             new_extension.data = self.data
+            if new_sorting_analyzer.format == "memory" and self.sorting_analyzer._backend_options.get("lazy", False):
+                # an in-memory copy must not depend on the files of the source analyzer
+                new_extension.data = self.data.copy()
+                new_extension._materialize_lazy_data()
         else:
             new_extension.data = self._select_extension_data(unit_ids)
         new_extension.run_info = copy(self.run_info)
@@ -2757,6 +2772,7 @@ class AnalyzerExtension:
         """
         Delete the extension in a folder (binary or zarr) and create an empty one.
         """
+        self._materialize_lazy_data_before_reset()
         if self.format == "binary_folder":
             extension_folder = self._get_binary_extension_folder()
             if extension_folder.is_dir():
@@ -2774,6 +2790,8 @@ class AnalyzerExtension:
         """
         Delete the extension in a folder (binary or zarr).
         """
+        # the data are going to be removed, so lazy buffers are released instead of being copied
+        self.data = dict()
         if self.format == "binary_folder":
             extension_folder = self._get_binary_extension_folder()
             if extension_folder.is_dir():
@@ -2787,6 +2805,29 @@ class AnalyzerExtension:
                 del zarr_root["extensions"][self.extension_name]
                 zarr.consolidate_metadata(zarr_root.store)
 
+    def _materialize_lazy_data(self):
+        """
+        Copy in memory the data that are memory-mapped or not yet read from zarr.
+        """
+        if isinstance(self.data, LazyZarrExtensionData):
+            self.data = self.data.copy()
+        for ext_data_name, ext_data in self.data.items():
+            if isinstance(ext_data, np.memmap) and ext_data.mode == "r":
+                self.data[ext_data_name] = np.array(ext_data)
+
+    def _materialize_lazy_data_before_reset(self):
+        """
+        Copy-on-recompute for lazy analyzers: before the extension folder is overwritten, the lazy buffers
+        of this extension and of the one currently attached to the SortingAnalyzer (which can still be used
+        during the computation, for instance to propagate metrics) are copied in memory.
+        """
+        if not self.sorting_analyzer._backend_options.get("lazy", False):
+            return
+        self._materialize_lazy_data()
+        current_extension = self.sorting_analyzer.extensions.get(self.extension_name, None)
+        if current_extension is not None and current_extension is not self:
+            current_extension._materialize_lazy_data()
+
     def delete(self):
         """
         Delete the extension from the folder or zarr and from the dict.
@@ -2801,10 +2842,10 @@ class AnalyzerExtension:
         Reset the extension.
         Delete the sub folder and create a new empty one.
         """
+        self.data = dict()
         self._reset_extension_folder()
         self.params = None
         self.run_info = self._default_run_info_dict()
-        self.data = dict()
 
     def set_params(self, save=True, **params):
         """
@@ -2892,6 +2933,62 @@ class AnalyzerExtension:
         self.data[ext_data_name] = ext_data
 
 
+class LazyZarrExtensionData(dict):
+    """
+    Dict of extension data used when loading a zarr SortingAnalyzer with backend_options={"lazy": True}.
+
+    Arrays set with `set_lazy()` are kept as zarr arrays and are only read in memory on first access
+    (`data[name]`, `data.get(name)`, `data.items()`...), so that opening an analyzer does not read all
+    extensions from the store.
+    """
+
+    def __init__(self, *args, **kwargs):
+        dict.__init__(self, *args, **kwargs)
+        self._lazy_names = set()
+
+    def set_lazy(self, name, zarr_array):
+        dict.__setitem__(self, name, zarr_array)
+        self._lazy_names.add(name)
+
+    def is_loaded(self, name):
+        return name in self and name not in self._lazy_names
+
+    def __getitem__(self, name):
+        value = dict.__getitem__(self, name)
+        if name in self._lazy_names:
+            value = np.array(value)
+            dict.__setitem__(self, name, value)
+            self._lazy_names.discard(name)
+        return value
+
+    def __setitem__(self, name, value):
+        self._lazy_names.discard(name)
+        dict.__setitem__(self, name, value)
+
+    def __delitem__(self, name):
+        self._lazy_names.discard(name)
+        dict.__delitem__(self, name)
+
+    def get(self, name, default=None):
+        return self[name] if name in self else default
+
+    def pop(self, name, *args):
+        if name in self:
+            value = self[name]
+            del self[name]
+            return value
+        return dict.pop(self, name, *args)
+
+    def values(self):
+        return [self[name] for name in self.keys()]
+
+    def items(self):
+        return [(name, self[name]) for name in self.keys()]
+
+    def copy(self):
+        return {name: self[name] for name in self.keys()}
+
+
 # this is a hardcoded list to to improve error message and auto_import mechanism
 # this is important because extension are registered when the submodule is imported
 _builtin_extensions = {
@@ -125,19 +125,17 @@ def test_ComputeTemplates(format, sparse, create_cache_folder):
 
     job_kwargs = dict(n_jobs=2, chunk_duration="1s", progress_bar=True)
 
-    with pytest.raises(ValueError):
-        # This require "waveforms first and should trig an error
-        sorting_analyzer.compute("templates", operators=["median"])
-
-    with pytest.raises(ValueError):
-        # This require "waveforms first and should trig an error
-        sorting_analyzer.compute("templates", operators=[("percentile", 95.0)])
-
-    ## without waveforms
-    temp_ext = sorting_analyzer.compute("templates", operators=["average", "std"], **job_kwargs)
+    ## without waveforms: median and percentiles are approximated with streaming sketches
+    temp_ext = sorting_analyzer.compute(
+        "templates", operators=["average", "std", "median", ("percentile", 95.0)], **job_kwargs
+    )
+    for k in ["average", "std", "median", "percentile_95.0"]:
+        assert k in temp_ext.data.keys()
+    assert temp_ext.data["median"].shape == temp_ext.data["average"].shape
 
     fast_avg = temp_ext.get_templates(operator="average")
     fast_std = temp_ext.get_templates(operator="std")
+    fast_median = temp_ext.get_templates(operator="median")
 
     # with waveforms
 
@@ -176,6 +174,9 @@ def test_ComputeTemplates(format, sparse, create_cache_folder):
             fast_avg[unit_index][:, unit_mask], temp_ext.data["average"][unit_index][:, unit_mask], atol=0.01
         )
         assert np.allclose(fast_std[unit_index][:, unit_mask], temp_ext.data["std"][unit_index][:, unit_mask], atol=0.5)
+        # the streaming median is approximate, it should stay within one std of the exact one
+        median_error = np.abs(fast_median[unit_index][:, unit_mask] - temp_ext.data["median"][unit_index][:, unit_mask])
+        assert np.all(median_error <= temp_ext.data["std"][unit_index][:, unit_mask] + 0.5)
 
     templates = temp_ext.get_templates(outputs="Templates")
     assert isinstance(templates, Templates)
@@ -251,6 +252,33 @@ def test_compute_several(create_cache_folder):
     assert np.all(waveform_data == sorting_analyzer.get_extension("waveforms").get_data())
 
 
+def test_share_tmp_data():
+    from spikeinterface.core.analyzer_extension_core import _share_tmp_data, _load_shared_tmp_data
+
+    rng = np.random.default_rng(seed=2205)
+    big = rng.normal(size=(1000, 300))
+    small = np.arange(10)
+    tmp_data = dict(big=big, small=small, nested={0: dict(pcs_flat=big, labels=["a", "b"])}, name="test")
+
+    shared_tmp_data, shared_memories = _share_tmp_data(tmp_data)
+    try:
+        # the same array is published once, small arrays are pickled
+        assert len(shared_memories) == 1
+        loaded_tmp_data, worker_shared_memories = _load_shared_tmp_data(shared_tmp_data)
+        np.testing.assert_array_equal(loaded_tmp_data["big"], big)
+        np.testing.assert_array_equal(loaded_tmp_data["small"], small)
+        assert loaded_tmp_data["nested"][0]["pcs_flat"] is loaded_tmp_data["big"]
+        assert loaded_tmp_data["nested"][0]["labels"] == ["a", "b"]
+        assert loaded_tmp_data["name"] == "test"
+        del loaded_tmp_data
+        for shm in worker_shared_memories:
+            shm.close()
+    finally:
+        for shm in shared_memories:
+            shm.close()
+            shm.unlink()
+
+
 if __name__ == "__main__":
     cache_folder = Path(__file__).resolve().parents[4] / "cache_folder" / "core"
     # test_ComputeWaveforms(format="memory", sparse=True, create_cache_folder=cache_folder)
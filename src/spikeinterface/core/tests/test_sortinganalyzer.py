@@ -284,6 +284,43 @@ def test_load_without_runtime_info(tmp_path, dataset):
         sorting_analyzer = load_sorting_analyzer(folder, format="auto")
 
 
+@pytest.mark.parametrize("format", ["binary_folder", "zarr"])
+def test_load_lazy(tmp_path, dataset, format):
+    from spikeinterface.core.sortinganalyzer import LazyZarrExtensionData
+
+    recording, sorting = dataset
+
+    folder = tmp_path / ("test_SortingAnalyzer_lazy" + (".zarr" if format == "zarr" else ""))
+    sorting_analyzer = create_sorting_analyzer(sorting, recording, format=format, folder=folder, sparse=False)
+    sorting_analyzer.compute(["random_spikes", "waveforms", "templates", "noise_levels"])
+    waveforms = sorting_analyzer.get_extension("waveforms").get_data()
+    templates = sorting_analyzer.get_extension("templates").get_data()
+
+    sorting_analyzer = load_sorting_analyzer(folder, backend_options={"lazy": True})
+    wf_ext = sorting_analyzer.get_extension("waveforms")
+    if format == "binary_folder":
+        assert isinstance(wf_ext.data["waveforms"], np.memmap)
+    else:
+        assert isinstance(wf_ext.data, LazyZarrExtensionData)
+        assert not wf_ext.data.is_loaded("waveforms")
+    np.testing.assert_array_equal(wf_ext.get_data(), waveforms)
+    np.testing.assert_array_equal(sorting_analyzer.get_extension("templates").get_data(), templates)
+
+    # an in-memory copy does not depend on the files anymore
+    analyzer_in_memory = sorting_analyzer.save_as(format="memory")
+    assert not isinstance(analyzer_in_memory.get_extension("waveforms").data["waveforms"], np.memmap)
+
+    # recomputing in place copies the lazy buffers of the previous extension before overwriting them
+    sorting_analyzer.compute("templates", operators=["average"])
+    np.testing.assert_array_almost_equal(sorting_analyzer.get_extension("templates").get_data(), templates)
+    sorting_analyzer.get_extension("waveforms").save()
+    np.testing.assert_array_equal(sorting_analyzer.get_extension("waveforms").get_data(), waveforms)
+    np.testing.assert_array_equal(analyzer_in_memory.get_extension("waveforms").get_data(), waveforms)
+
+    sorting_analyzer = load_sorting_analyzer(folder, backend_options={"lazy": True})
+    np.testing.assert_array_equal(sorting_analyzer.get_extension("waveforms").get_data(), waveforms)
+
+
 def test_SortingAnalyzer_tmp_recording(dataset):
     recording, sorting = dataset
     recording_cached = recording.save(mode="memory")
@@ -12,6 +12,8 @@ from spikeinterface.core.waveform_tools import (
     split_waveforms_by_units,
     estimate_templates,
     estimate_templates_with_accumulator,
+    _p2_update,
+    _p2_estimate,
 )
 
 
@@ -212,6 +214,57 @@ def test_estimate_templates_with_accumulator():
                 # plt.show()
 
 
+def test_p2_sketches():
+    rng = np.random.default_rng(seed=0)
+    percentiles = np.array([10.0, 50.0, 90.0])
+    num_units, num_samples, num_channels = 3, 4, 2
+    heights = np.zeros((percentiles.size, num_units, 5, num_samples, num_channels), dtype="float32")
+    positions = np.zeros((percentiles.size, num_units, 3, num_samples, num_channels), dtype="int32")
+    counts = np.zeros(num_units, dtype="int64")
+
+    values = rng.normal(size=(2000, num_units, num_samples, num_channels))
+    for i in range(values.shape[0]):
+        # the last unit only gets 3 observations to test the exact estimate
+        unit_indices = np.arange(num_units) if i < 3 else np.arange(num_units - 1)
+        _p2_update(heights, positions, counts, unit_indices, values[i, unit_indices], percentiles)
+
+    estimates = _p2_estimate(heights, counts, percentiles)
+    expected = np.percentile(values[:, :-1], percentiles, axis=0)
+    np.testing.assert_allclose(estimates[:, :-1], expected, atol=0.15)
+    expected_exact = np.percentile(values[:3, -1], percentiles, axis=0)
+    np.testing.assert_allclose(estimates[:, -1], expected_exact, rtol=1e-5)
+
+
+def test_estimate_templates_with_accumulator_percentiles():
+    recording, sorting = get_dataset()
+
+    nbefore = ms_to_samples(1.0, recording.sampling_frequency)
+    nafter = ms_to_samples(1.5, recording.sampling_frequency)
+    spikes = sorting.to_spike_vector()
+
+    exact_medians = estimate_templates(
+        recording, spikes, sorting.unit_ids, nbefore, nafter, operator="median", return_in_uV=True
+    )
+
+    for n_jobs in (1, 2):
+        job_kwargs = dict(n_jobs=n_jobs, progress_bar=False, chunk_duration="1s")
+        templates, stds, templates_percentiles = estimate_templates_with_accumulator(
+            recording,
+            spikes,
+            sorting.unit_ids,
+            nbefore,
+            nafter,
+            return_in_uV=True,
+            return_std=True,
+            percentiles=[50.0, 90.0],
+            **job_kwargs,
+        )
+        assert templates_percentiles.shape == (2,) + templates.shape
+        # approximated medians are close to the exact ones (compared to the noise level)
+        assert np.max(np.abs(templates_percentiles[0] - exact_medians) / (stds + 1e-6)) < 0.5
+        assert np.all(templates_percentiles[1] >= templates_percentiles[0])
+
+
 def test_estimate_templates():
     recording, sorting = get_dataset()
 
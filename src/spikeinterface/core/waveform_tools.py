@@ -858,6 +858,7 @@ def estimate_templates_with_accumulator(
     sparsity_mask=None,
     job_name=None,
     return_std: bool = False,
+    percentiles: list[float] | None = None,
     verbose: bool = False,
     **job_kwargs,
 ) -> np.ndarray:
@@ -866,8 +867,11 @@ def estimate_templates_with_accumulator(
     This is useful to estimate sparsity without the need to allocate large waveform buffers.
     The mechanism is pretty simple: it accumulates and sums spike waveforms (and their squared)
     in-place per worker and per unit.
-    Note that median and percentiles can't be computed with this method, because they don't support
-    the accumulator implementation.
+    Median and percentiles can't be computed exactly with this method. They can optionally be
+    approximated in the same pass with streaming P² quantile sketches [Jain1985]_ (one sketch per unit,
+    sample and channel), so that memory stays bounded by num_units x num_samples x num_channels.
+    Each worker keeps its own sketches and the final estimate is the average of the worker estimates
+    weighted by their number of spikes.
 
     Parameters
     ----------
@@ -891,11 +895,19 @@ def estimate_templates_with_accumulator(
         If not None shape must be must be (len(unit_ids), len(channel_ids))
     return_std: bool, default: False
         If True, the standard deviation is also computed.
+    percentiles: list[float] | None, default: None
+        If not None, the (approximate) percentiles (between 0 and 100) to compute with the P² sketches,
+        for instance [50.0] for the median.
 
     Returns
     -------
     templates_array: np.array
         The average templates with shape (num_units, nbefore + nafter, num_channels)
+    template_stds: np.array
+        The standard deviations with the same shape, only if return_std is True
+    template_percentiles: np.array
+        The approximate percentile templates with shape (num_percentiles, num_units, nbefore + nafter, num_channels),
+        only if percentiles is not None
     """
 
     # Handle deprecated return_scaled parameter
@@ -930,6 +942,28 @@ def estimate_templates_with_accumulator(
         waveform_squared_accumulator_per_worker = None
         shm_squared_name = None
 
+    if percentiles is not None:
+        percentiles = np.asarray(percentiles, dtype="float64")
+        assert np.all((percentiles >= 0) & (percentiles <= 100)), "percentiles must be between 0 and 100"
+        num_percentiles = percentiles.size
+        p2_shapes = dict(
+            heights=(num_worker, num_percentiles, num_units, 5, nbefore + nafter, num_chans),
+            positions=(num_worker, num_percentiles, num_units, 3, nbefore + nafter, num_chans),
+            counts=(num_worker, num_units),
+        )
+        p2_dtypes = dict(heights="float32", positions="int32", counts="int64")
+        p2_arrays, p2_shms = {}, {}
+        for name in p2_shapes:
+            p2_arrays[name], p2_shms[name] = make_shared_array(p2_shapes[name], p2_dtypes[name])
+        p2_info = dict(
+            percentiles=percentiles,
+            shm_names={name: shm.name for name, shm in p2_shms.items()},
+            shapes=p2_shapes,
+            dtypes=p2_dtypes,
+        )
+    else:
+        p2_info = None
+
     func = _worker_estimate_templates
     init_func = _init_worker_estimate_templates
 
@@ -944,6 +978,7 @@ def estimate_templates_with_accumulator(
         nafter,
         return_in_uV,
         sparsity_mask,
+        p2_info,
     )
 
     if job_name is None:
@@ -979,15 +1014,36 @@ def estimate_templates_with_accumulator(
         shm_squared.unlink()
         shm_squared.close()
 
+    if percentiles is not None:
+        # merge the estimates of all workers weighted by their number of spikes
+        counts = p2_arrays["counts"]
+        template_percentiles = np.zeros((num_percentiles,) + template_means.shape, dtype=template_means.dtype)
+        for worker_index in range(num_worker):
+            estimates = _p2_estimate(p2_arrays["heights"][worker_index], counts[worker_index], percentiles)
+            template_percentiles += estimates * counts[worker_index][None, :, None, None]
+        total_counts = np.sum(counts, axis=0)
+        has_spikes = total_counts > 0
+        template_percentiles[:, has_spikes] /= total_counts[has_spikes][None, :, None, None]
+        del p2_arrays
+        for shm_p2 in p2_shms.values():
+            shm_p2.unlink()
+            shm_p2.close()
+
     # important : release the sharedmem
     del waveform_accumulator_per_worker
     shm.unlink()
     shm.close()
 
+    outputs = (template_means,)
     if return_std:
-        return template_means, template_stds
-    else:
+        outputs += (template_stds,)
+    if percentiles is not None:
+        outputs += (template_percentiles,)
+
+    if len(outputs) == 1:
         return template_means
+    else:
+        return outputs
 
 
 def _init_worker_estimate_templates(
@@ -1001,6 +1057,7 @@ def _init_worker_estimate_templates(
     nafter,
     return_in_uV,
     sparsity_mask,
+    p2_info,
     worker_index,
 ):
     worker_dict = {}
@@ -1025,6 +1082,15 @@ def _init_worker_estimate_templates(
         worker_dict["shm_squared"] = shm_squared
         worker_dict["waveform_squared_accumulator_per_worker"] = waveform_squared_accumulator_per_worker
 
+    if p2_info is not None:
+        worker_dict["percentiles"] = p2_info["percentiles"]
+        for name, shm_name_p2 in p2_info["shm_names"].items():
+            shm_p2 = SharedMemory(shm_name_p2)
+            worker_dict[f"p2_shm_{name}"] = shm_p2
+            worker_dict[f"p2_{name}"] = np.ndarray(
+                shape=p2_info["shapes"][name], dtype=p2_info["dtypes"][name], buffer=shm_p2.buf
+            )
+
     # prepare segment slices
     segment_slices = []
     for segment_index in range(recording.get_num_segments()):
@@ -1077,7 +1143,14 @@ def _worker_estimate_templates(segment_index, start_frame, end_frame, worker_dic
         sample_indices = sub_spikes["sample_index"] - onset
         unit_indices = sub_spikes["unit_index"]
 
-        for sample_index, unit_index in zip(sample_indices, unit_indices):
+        percentiles = worker_dict.get("percentiles", None)
+        if percentiles is not None:
+            # waveforms of the chunk are kept (zero padded when sparse) to update the P² sketches
+            chunk_waveforms = np.zeros(
+                (sub_spikes.size, offset, waveform_accumulator_per_worker.shape[3]), dtype="float32"
+            )
+
+        for i, (sample_index, unit_index) in enumerate(zip(sample_indices, unit_indices)):
 
             wf = traces[sample_index : sample_index + offset, :]
 
@@ -1092,3 +1165,122 @@ def _worker_estimate_templates(segment_index, start_frame, end_frame, worker_dic
                 waveform_accumulator_per_worker[worker_index, unit_index, :, : wf.shape[1]] += wf
                 if waveform_squared_accumulator_per_worker is not None:
                     waveform_squared_accumulator_per_worker[worker_index, unit_index, :, : wf.shape[1]] += wf**2
+
+            if percentiles is not None:
+                chunk_waveforms[i, :, : wf.shape[1]] = wf
+
+        if percentiles is not None:
+            # P² updates are sequential for a given unit but independent across units: spikes are processed by
+            # rounds, the round r containing the r-th spike of every unit in the chunk
+            order = np.argsort(unit_indices, kind="stable")
+            sorted_units = unit_indices[order]
+            first_of_unit = np.searchsorted(sorted_units, sorted_units, side="left")
+            ranks = np.empty(order.size, dtype="int64")
+            ranks[order] = np.arange(order.size) - first_of_unit
+            for rank in range(int(np.max(ranks)) + 1):
+                (round_spikes,) = np.nonzero(ranks == rank)
+                _p2_update(
+                    worker_dict["p2_heights"][worker_index],
+                    worker_dict["p2_positions"][worker_index],
+                    worker_dict["p2_counts"][worker_index],
+                    unit_indices[round_spikes],
+                    chunk_waveforms[round_spikes],
+                    percentiles,
+                )
+
+
+def _p2_update(heights, positions, counts, unit_indices, waveforms, percentiles):
+    """
+    Update in place the P² quantile sketches of several (distinct) units with one waveform each.
+
+    The P² algorithm [Jain1985]_ tracks a quantile with 5 markers: the minimum, the maximum, the target
+    quantile and two intermediate quantiles. For each new observation, the marker positions are incremented
+    and the 3 middle markers are moved towards their desired positions with a piecewise-parabolic
+    (or linear) interpolation. Here all the (sample, channel) elements of the waveforms are updated at once.
+
+    Parameters
+    ----------
+    heights : np.ndarray
+        The marker heights with shape (num_percentiles, num_units, 5, num_samples, num_channels).
+        Before 5 observations, they hold the raw observations.
+    positions : np.ndarray
+        The positions of the 3 middle markers with shape (num_percentiles, num_units, 3, num_samples, num_channels).
+        The positions of the first and last markers are always 1 and the number of observations.
+    counts : np.ndarray
+        The number of observations per unit.
+    unit_indices : np.ndarray
+        The (distinct) unit index of each waveform.
+    waveforms : np.ndarray
+        The waveforms with shape (num_waveforms, num_samples, num_channels).
+    percentiles : np.ndarray
+        The percentiles (between 0 and 100) tracked by the sketches.
+    """
+    unit_counts = counts[unit_indices]
+
+    # the 5 first observations are stored and sorted
+    init_mask = unit_counts < 5
+    if np.any(init_mask):
+        init_units = unit_indices[init_mask]
+        heights[:, init_units, unit_counts[init_mask]] = waveforms[init_mask][None]
+        full_units = init_units[unit_counts[init_mask] == 4]
+        if full_units.size > 0:
+            heights[:, full_units] = np.sort(heights[:, full_units], axis=2)
+            positions[:, full_units] = np.arange(2, 5, dtype=positions.dtype)[None, None, :, None, None]
+
+    update_mask = ~init_mask
+    if np.any(update_mask):
+        units = unit_indices[update_mask]
+        new_counts = unit_counts[update_mask] + 1
+        x = waveforms[update_mask][None].astype("float64")
+        q = heights[:, units].astype("float64")
+        n = np.empty(q.shape, dtype="float64")
+        n[:, :, 0] = 1
+        n[:, :, 1:4] = positions[:, units]
+        n[:, :, 4] = new_counts[None, :, None, None] - 1
+
+        # extreme markers and increment of the positions of the markers above the observation
+        q[:, :, 0] = np.minimum(q[:, :, 0], x)
+        q[:, :, 4] = np.maximum(q[:, :, 4], x)
+        cell = (x >= q[:, :, 1]).astype("int64") + (x >= q[:, :, 2]) + (x >= q[:, :, 3])
+        for i in range(1, 5):
+            n[:, :, i] += i > cell
+
+        p = percentiles[:, None, None, None] / 100.0
+        desired_increments = [p / 2, p, (1 + p) / 2]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for i in range(1, 4):
+                desired = 1 + (new_counts[None, :, None, None] - 1) * desired_increments[i - 1]
+                d = desired - n[:, :, i]
+                move = ((d >= 1) & (n[:, :, i + 1] - n[:, :, i] > 1)) | ((d <= -1) & (n[:, :, i - 1] - n[:, :, i] < -1))
+                if not np.any(move):
+                    continue
+                d = np.sign(d)
+                parabolic = q[:, :, i] + d / (n[:, :, i + 1] - n[:, :, i - 1]) * (
+                    (n[:, :, i] - n[:, :, i - 1] + d) * (q[:, :, i + 1] - q[:, :, i]) / (n[:, :, i + 1] - n[:, :, i])
+                    + (n[:, :, i + 1] - n[:, :, i] - d) * (q[:, :, i] - q[:, :, i - 1]) / (n[:, :, i] - n[:, :, i - 1])
+                )
+                q_neighbour = np.where(d > 0, q[:, :, i + 1], q[:, :, i - 1])
+                n_neighbour = np.where(d > 0, n[:, :, i + 1], n[:, :, i - 1])
+                linear = q[:, :, i] + d * (q_neighbour - q[:, :, i]) / (n_neighbour - n[:, :, i])
+                use_parabolic = (q[:, :, i - 1] < parabolic) & (parabolic < q[:, :, i + 1])
+                q[:, :, i] = np.where(move, np.where(use_parabolic, parabolic, linear), q[:, :, i])
+                n[:, :, i] = np.where(move, n[:, :, i] + d, n[:, :, i])
+
+        heights[:, units] = q
+        positions[:, units] = n[:, :, 1:4]
+
+    counts[unit_indices] += 1
+
+
+def _p2_estimate(heights, counts, percentiles):
+    """
+    Return the percentile estimates of the P² sketches of one worker with shape
+    (num_percentiles, num_units, num_samples, num_channels).
+    Units with less than 5 observations use the exact percentile of the stored observations.
+    """
+    estimates = heights[:, :, 2].astype("float64")
+    for unit_index in np.flatnonzero((counts > 0) & (counts < 5)):
+        for i, percentile in enumerate(percentiles):
+            estimates[i, unit_index] = np.percentile(heights[i, unit_index, : counts[unit_index]], percentile, axis=0)
+    estimates[:, counts == 0] = 0
+    return estimates
@@ -71,7 +71,7 @@ _default_step_params = {
     "num_spikes": {"min_spikes": 100},
     "snr": {"min_snr": 2.0},
     "remove_contaminated": {"contamination_thresh": 0.2, "refractory_period_ms": 1.0, "censored_period_ms": 0.3},
-    "unit_locations": {"max_distance_um": 150.0},
+    "unit_locations": {"max_distance_um": 150.0, "sparsity_overlap": False},
     "correlogram": {
         "corr_diff_thresh": 0.16,
         "censor_correlograms_ms": 0.15,
@@ -101,6 +101,7 @@ def compute_merge_unit_groups(
     extra_outputs: bool = False,
     steps: list[str] | None = None,
     force_copy: bool = True,
+    cache: dict | None = None,
     **job_kwargs,
 ) -> list[tuple[int | str, int | str]] | Tuple[list[tuple[int | str, int | str]], dict]:
     """
@@ -111,7 +112,8 @@ def compute_merge_unit_groups(
         * "num_spikes": enough spikes are found in each unit for computing the correlogram (`min_spikes`)
         * "snr": the SNR of the units is above a threshold (`min_snr`)
         * "remove_contaminated": each unit is not contaminated (by checking auto-correlogram - `contamination_thresh`)
-        * "unit_locations": estimated unit locations are close enough (`max_distance_um`)
+        * "unit_locations": estimated unit locations are close enough (`max_distance_um`) and, optionally, the
+          template sparsities of the two units overlap (`sparsity_overlap`)
         * "correlogram": the cross-correlograms of the two units are similar to each auto-corrleogram (`corr_diff_thresh`)
         * "template_similarity": the templates of the two units are similar (`template_diff_thresh`)
         * "presence_distance": the presence of the units is complementary in time (`presence_distance_thresh`)
@@ -172,6 +174,10 @@ def compute_merge_unit_groups(
     force_copy : boolean, default: True
         When new extensions are computed, the default is to make a copy of the analyzer, to avoid overwriting
         already computed extensions. False if you want to overwrite
+    cache : dict | None, default: None
+        A dictionary in which per-unit and per-pair results of the steps are stored and reused.
+        It is used by `auto_merge_units(..., incremental=True)` to carry results across iterations: the caller
+        is responsible for removing the entries of merged units (see `clean_merge_cache()`).
 
     Returns
     -------
@@ -182,6 +188,9 @@ def compute_merge_unit_groups(
     outs:
         Returned only when extra_outputs=True
         A dictionary that contains data for debugging and plotting.
+        For the "unit_locations" step, "unit_distances" is the dense (num_units, num_units) matrix of distances
+        between unit locations and "candidate_pairs" is the sparse form of the pairs kept by the step, as a
+        tuple of `pair_indices` (num_pairs, 2) and `pair_distances` (num_pairs,) (see `get_candidate_pairs()`).
 
     References
     ----------
@@ -266,13 +275,22 @@ def compute_merge_unit_groups(
 
         # STEP : remove contaminated auto corr
         elif step == "remove_contaminated":
-            contaminations, nb_violations = compute_refrac_period_violations(
-                sorting_analyzer,
-                refractory_period_ms=params["refractory_period_ms"],
-                censored_period_ms=params["censored_period_ms"],
+            contamination_params = dict(
+                refractory_period_ms=params["refractory_period_ms"], censored_period_ms=params["censored_period_ms"]
             )
-            nb_violations = np.array(list(nb_violations.values()))
-            contaminations = np.array(list(contaminations.values()))
+            step_cache = _get_step_cache(cache, step, contamination_params)
+            if step_cache is None:
+                contaminations, _ = compute_refrac_period_violations(sorting_analyzer, **contamination_params)
+                contaminations = np.array(list(contaminations.values()))
+            else:
+                unit_cache = step_cache["units"]
+                missing_unit_ids = [unit_id for unit_id in unit_ids if unit_id not in unit_cache]
+                if len(missing_unit_ids) > 0:
+                    new_contaminations, _ = compute_refrac_period_violations(
+                        sorting_analyzer, unit_ids=missing_unit_ids, **contamination_params
+                    )
+                    unit_cache.update(new_contaminations)
+                contaminations = np.array([unit_cache[unit_id] for unit_id in unit_ids])
             to_remove = contaminations > params["contamination_thresh"]
             pair_mask[to_remove, :] = False
             pair_mask[:, to_remove] = False
@@ -280,12 +298,16 @@ def compute_merge_unit_groups(
 
         # STEP : unit positions are estimated roughly with channel
         elif step == "unit_locations":
-            location_ext = sorting_analyzer.get_extension("unit_locations")
-            unit_locations = location_ext.get_data()[:, :2]
-
-            unit_distances = scipy.spatial.distance.cdist(unit_locations, unit_locations, metric="euclidean")
-            pair_mask = pair_mask & (unit_distances <= params["max_distance_um"])
-            outs["unit_distances"] = unit_distances
+            pair_indices, pair_distances = get_candidate_pairs(sorting_analyzer, pair_mask=pair_mask, **params)
+            pair_mask = np.zeros((n, n), dtype="bool")
+            pair_mask[pair_indices[:, 0], pair_indices[:, 1]] = True
+            outs["candidate_pairs"] = pair_indices, pair_distances
+            if extra_outputs:
+                # dense (num_units, num_units) distances, only materialized for debugging and plotting
+                unit_locations = sorting_analyzer.get_extension("unit_locations").get_data()[:, :2]
+                outs["unit_distances"] = scipy.spatial.distance.cdist(
+                    unit_locations, unit_locations, metric="euclidean"
+                )
 
         # STEP : potential auto merge by correlogram
         elif step == "correlogram":
@@ -295,7 +317,13 @@ def compute_merge_unit_groups(
             sigma_smooth_ms = params["sigma_smooth_ms"]
             mask = (bins[:-1] >= -censor_ms) & (bins[:-1] < censor_ms)
             correlograms[:, :, mask] = 0
-            correlograms_smoothed = smooth_correlogram(correlograms, bins, sigma_smooth_ms=sigma_smooth_ms)
+            step_cache = _get_step_cache(cache, step, params)
+            if step_cache is None:
+                correlograms_smoothed = smooth_correlogram(correlograms, bins, sigma_smooth_ms=sigma_smooth_ms)
+            else:
+                correlograms_smoothed = _smooth_correlograms_with_cache(
+                    correlograms, bins, sigma_smooth_ms, unit_ids, step_cache
+                )
             # find correlogram window for each units
             win_sizes = np.zeros(n, dtype=int)
             for unit_ind in range(n):
@@ -303,11 +331,11 @@ def compute_merge_unit_groups(
                 thresh = np.max(auto_corr) * params["adaptative_window_thresh"]
                 win_size = get_unit_adaptive_window(auto_corr, thresh)
                 win_sizes[unit_ind] = win_size
-            correlogram_diff = compute_correlogram_diff(
-                sorting,
-                correlograms_smoothed,
-                win_sizes,
-                pair_mask=pair_mask,
+            (correlogram_diff,) = _compute_with_pair_cache(
+                step_cache,
+                unit_ids,
+                pair_mask,
+                lambda mask: (compute_correlogram_diff(sorting, correlograms_smoothed, win_sizes, pair_mask=mask),),
             )
             # print(correlogram_diff)
             pair_mask = pair_mask & (correlogram_diff < params["corr_diff_thresh"])
@@ -342,8 +370,13 @@ def compute_merge_unit_groups(
             num_samples = [
                 sorting_analyzer.get_num_samples(segment_index) for segment_index in range(sorting.get_num_segments())
             ]
-            presence_distances = compute_presence_distance(
-                sorting, pair_mask, num_samples=num_samples, **presence_distance_kwargs
+            (presence_distances,) = _compute_with_pair_cache(
+                _get_step_cache(cache, step, params),
+                unit_ids,
+                pair_mask,
+                lambda mask: (
+                    compute_presence_distance(sorting, mask, num_samples=num_samples, **presence_distance_kwargs),
+                ),
             )
             pair_mask = pair_mask & (presence_distances > presence_distance_thresh)
             outs["presence_distances"] = presence_distances
@@ -354,22 +387,49 @@ def compute_merge_unit_groups(
                 params["censored_period_ms"],
                 params["refractory_period_ms"],
             )
-            CC, p_values = compute_cross_contaminations(
-                sorting_analyzer, pair_mask, params["cc_thresh"], refractory, contaminations
+            CC, p_values = _compute_with_pair_cache(
+                _get_step_cache(cache, step, dict(params, contamination_params=contamination_params)),
+                unit_ids,
+                pair_mask,
+                lambda mask: compute_cross_contaminations(
+                    sorting_analyzer, mask, params["cc_thresh"], refractory, contaminations
+                ),
             )
             pair_mask = pair_mask & (p_values > params["p_value"])
             outs["cross_contaminations"] = CC, p_values
 
         # STEP : validate the potential merges with CC increase the contamination quality metrics
         elif step == "quality_score":
-            pair_mask, pairs_decreased_score = check_improve_contaminations_score(
-                sorting_analyzer,
-                pair_mask,
-                contaminations,
-                params["firing_contamination_balance"],
-                params["refractory_period_ms"],
-                params["censored_period_ms"],
-            )
+            step_cache = _get_step_cache(cache, step, dict(params, contamination_params=contamination_params))
+            if step_cache is None:
+                pair_mask, pairs_decreased_score = check_improve_contaminations_score(
+                    sorting_analyzer,
+                    pair_mask,
+                    contaminations,
+                    params["firing_contamination_balance"],
+                    params["refractory_period_ms"],
+                    params["censored_period_ms"],
+                )
+            else:
+                (new_pair_mask,) = _compute_with_pair_cache(
+                    step_cache,
+                    unit_ids,
+                    pair_mask,
+                    lambda mask: check_improve_contaminations_score(
+                        sorting_analyzer,
+                        mask,
+                        contaminations,
+                        params["firing_contamination_balance"],
+                        params["refractory_period_ms"],
+                        params["censored_period_ms"],
+                    )[:1],
+                )
+                pairs_decreased_score = [
+                    (unit_ids[ind1], unit_ids[ind2])
+                    for ind1, ind2 in zip(*np.nonzero(pair_mask))
+                    if not new_pair_mask[ind1, ind2]
+                ]
+                pair_mask = new_pair_mask
             outs["pairs_decreased_score"] = pairs_decreased_score
 
         elif step == "slay_score":
@@ -393,6 +453,124 @@ def compute_merge_unit_groups(
         return merge_unit_groups
 
 
+def _get_step_cache(cache, step, params):
+    """
+    Get (or create) the entry of the `compute_merge_unit_groups()` cache for a step and its parameters.
+    Each entry holds a "units" dict (keyed by unit id) and a "pairs" dict (keyed by pair of unit ids).
+    """
+    if cache is None:
+        return None
+    key = (step,) + tuple((name, repr(value)) for name, value in sorted(params.items()))
+    return cache.setdefault(key, {"units": {}, "pairs": {}})
+
+
+def clean_merge_cache(cache, unit_ids, new_unit_ids):
+    """
+    Remove from a `compute_merge_unit_groups()` cache all the entries that involve units that are not
+    in `unit_ids` anymore, or that were created (or modified) by a merge.
+
+    Parameters
+    ----------
+    cache : dict
+        The cache given to `compute_merge_unit_groups()`
+    unit_ids : list
+        The unit ids after the merges
+    new_unit_ids : list
+        The unit ids of the merged units
+    """
+    valid_unit_ids = set(unit_ids) - set(new_unit_ids)
+    for step_cache in cache.values():
+        step_cache["units"] = {
+            unit_id: value for unit_id, value in step_cache["units"].items() if unit_id in valid_unit_ids
+        }
+        step_cache["pairs"] = {
+            pair: value
+            for pair, value in step_cache["pairs"].items()
+            if pair[0] in valid_unit_ids and pair[1] in valid_unit_ids
+        }
+
+
+def check_merged_analyzer_consistency(sorting_analyzer, **job_kwargs):
+    """
+    Check that the extensions used by the auto-merge, which are updated in place by soft merges, are
+    consistent with the units of the analyzer. Inconsistent extensions are recomputed.
+
+    Parameters
+    ----------
+    sorting_analyzer : SortingAnalyzer
+        The merged SortingAnalyzer
+    """
+    num_units = sorting_analyzer.get_num_units()
+    for extension_name in ("templates", "unit_locations", "template_similarity", "correlograms"):
+        extension = sorting_analyzer.get_extension(extension_name)
+        if extension is None:
+            continue
+        data = extension.get_data()
+        if extension_name == "correlograms":
+            shape = data[0].shape[:2]
+        elif extension_name == "template_similarity":
+            shape = data.shape[:2]
+        else:
+            shape = data.shape[:1]
+        if any(size != num_units for size in shape):
+            warnings.warn(f"The {extension_name} extension is not consistent with the merged units: recomputing it")
+            sorting_analyzer.compute(extension_name, **extension.params, **job_kwargs)
+
+
+def _compute_with_pair_cache(step_cache, unit_ids, pair_mask, compute_function):
+    """
+    Call `compute_function(pair_mask)`, that returns a tuple of (num_units, num_units) arrays, only for the
+    pairs that are not already in the cache. Values of the other pairs are taken from the cache.
+    """
+    if step_cache is None:
+        return compute_function(pair_mask)
+
+    pair_cache = step_cache["pairs"]
+    inds1, inds2 = _get_upper_pair_indices(pair_mask)
+    is_cached = np.array([(unit_ids[i], unit_ids[j]) in pair_cache for i, j in zip(inds1, inds2)], dtype="bool")
+    to_compute = np.zeros_like(pair_mask)
+    to_compute[inds1[~is_cached], inds2[~is_cached]] = True
+
+    outputs = compute_function(to_compute)
+    for i, j in zip(inds1[is_cached], inds2[is_cached]):
+        for output, value in zip(outputs, pair_cache[(unit_ids[i], unit_ids[j])]):
+            output[i, j] = value
+    for i, j in zip(inds1[~is_cached], inds2[~is_cached]):
+        pair_cache[(unit_ids[i], unit_ids[j])] = tuple(output[i, j] for output in outputs)
+
+    return outputs
+
+
+def _smooth_correlograms_with_cache(correlograms, bins, sigma_smooth_ms, unit_ids, step_cache):
+    """
+    Smooth the correlograms, only for the rows and columns of units that are not in the cache.
+    """
+    unit_cache = step_cache["units"]
+    cached_smoothed = step_cache.get("correlograms_smoothed")
+
+    is_cached = np.array([unit_id in unit_cache for unit_id in unit_ids], dtype="bool")
+    if cached_smoothed is None or not np.any(is_cached):
+        correlograms_smoothed = smooth_correlogram(correlograms, bins, sigma_smooth_ms=sigma_smooth_ms)
+    else:
+        new_inds = np.flatnonzero(is_cached)
+        old_inds = np.array([unit_cache[unit_ids[unit_ind]] for unit_ind in new_inds])
+        correlograms_smoothed = np.zeros(correlograms.shape, dtype=cached_smoothed.dtype)
+        correlograms_smoothed[np.ix_(new_inds, new_inds)] = cached_smoothed[np.ix_(old_inds, old_inds)]
+        to_compute = np.flatnonzero(~is_cached)
+        if to_compute.size > 0:
+            correlograms_smoothed[to_compute] = smooth_correlogram(
+                correlograms[to_compute], bins, sigma_smooth_ms=sigma_smooth_ms
+            )
+            correlograms_smoothed[:, to_compute] = smooth_correlogram(
+                correlograms[:, to_compute], bins, sigma_smooth_ms=sigma_smooth_ms
+            )
+
+    step_cache["correlograms_smoothed"] = correlograms_smoothed
+    step_cache["units"] = {unit_id: unit_ind for unit_ind, unit_id in enumerate(unit_ids)}
+
+    return correlograms_smoothed
+
+
 def resolve_pairs(existing_merges, new_merges):
     """
     Convenient function used to resolve nested merges when merging units recursively. This is mostly only
@@ -518,6 +696,10 @@ def _auto_merge_units_single_iteration(
 
     resolved_merges = {key: value for (key, value) in zip(new_unit_ids, merge_unit_groups)}
 
+    cache = compute_merge_kwargs.get("cache", None)
+    if cache is not None and len(new_unit_ids) > 0:
+        clean_merge_cache(cache, merged_analyzer.unit_ids, new_unit_ids)
+
     if extra_outputs:
         return merged_analyzer, resolved_merges, merge_unit_groups, outs
     else:
@@ -661,6 +843,9 @@ def get_potential_auto_merge(
     outs:
         Returned only when extra_outputs=True
         A dictionary that contains data for debugging and plotting.
+        For the "unit_locations" step, "unit_distances" is the dense (num_units, num_units) matrix of distances
+        between unit locations and "candidate_pairs" is the sparse form of the pairs kept by the step, as a
+        tuple of `pair_indices` (num_pairs, 2) and `pair_distances` (num_pairs,) (see `get_candidate_pairs()`).
 
     References
     ----------
@@ -730,6 +915,7 @@ def auto_merge_units(
     raise_error: bool = False,
     extra_outputs: bool = False,
     force_copy: bool = True,
+    incremental: bool = False,
     **job_kwargs,
 ) -> SortingAnalyzer:
     """
@@ -774,6 +960,11 @@ def auto_merge_units(
     force_copy : boolean, default: True
         When new extensions are computed, the default is to make a copy of the analyzer, to avoid overwriting
         already computed extensions. False if you want to overwrite
+    incremental : bool, default: False
+        If True, the per-unit and per-pair results of the steps (contaminations, smoothed correlograms,
+        correlogram differences, presence distances, cross-contaminations and quality scores) are kept across
+        iterations and presets, and only recomputed for the units created by the merges. At the end, a
+        consistency check verifies that the extensions of the merged analyzer match its units.
 
     IMPORTANT: internally, all computations are relying on extensions of the analyzer, that are computed
     with default parameters if not present (i.e. correlograms, template_similarity, ...) If you want to
@@ -825,6 +1016,8 @@ def auto_merge_units(
     if force_copy:
         sorting_analyzer = sorting_analyzer.copy()
 
+    cache = {} if incremental else None
+
     apply_merge_kwargs = {
         "censor_ms": censor_ms,
         "sparsity_overlap": sparsity_overlap,
@@ -839,7 +1032,7 @@ def auto_merge_units(
         elif launch_mode == "steps":
             compute_merge_kwargs = {"steps": to_launch}
 
-        compute_merge_kwargs.update({"steps_params": params})
+        compute_merge_kwargs.update({"steps_params": params, "cache": cache})
         found_merges = True
 
         while found_merges:
@@ -864,12 +1057,79 @@ def auto_merge_units(
             else:
                 found_merges = len(sorting_analyzer.unit_ids) < num_units
 
+    if incremental:
+        check_merged_analyzer_consistency(sorting_analyzer, **job_kwargs)
+
     if extra_outputs:
         return sorting_analyzer, resolved_merges, merge_unit_groups, all_outs
     else:
         return sorting_analyzer
 
 
+def get_candidate_pairs(sorting_analyzer, max_distance_um=150.0, sparsity_overlap=False, pair_mask=None):
+    """
+    Get the candidate pairs of units for merging, based on the distance between unit locations.
+
+    The pairs are found with a spatial index (KD-tree) over the unit locations, so that the cost
+    scales with the number of close pairs rather than with the square of the number of units.
+    The pairs are returned in a sparse (COO) form, with `unit_ind1 < unit_ind2`.
+
+    Parameters
+    ----------
+    sorting_analyzer : SortingAnalyzer
+        The SortingAnalyzer, with the "unit_locations" extension computed.
+    max_distance_um : float, default: 150.0
+        The maximum distance between the locations of the two units.
+    sparsity_overlap : bool, default: False
+        If True and the analyzer is sparse, only pairs of units whose sparsity masks share
+        at least one channel are kept.
+    pair_mask : None or boolean array, default: None
+        A bool matrix of size (num_units, num_units) of the pairs that are still possible.
+
+    Returns
+    -------
+    pair_indices : np.ndarray
+        Array of shape (num_pairs, 2) with the unit indices of the candidate pairs.
+    pair_distances : np.ndarray
+        The distances between the locations of the units of each candidate pair.
+    """
+    from scipy.spatial import cKDTree
+
+    unit_locations = sorting_analyzer.get_extension("unit_locations").get_data()[:, :2]
+
+    # units with a nan location can not be merged based on location
+    (valid_inds,) = np.nonzero(np.all(np.isfinite(unit_locations), axis=1))
+    if valid_inds.size > 1:
+        tree = cKDTree(unit_locations[valid_inds])
+        pair_indices = valid_inds[tree.query_pairs(r=max_distance_um, output_type="ndarray")]
+        pair_indices = np.sort(pair_indices, axis=1)
+    else:
+        pair_indices = np.zeros((0, 2), dtype="int64")
+
+    if pair_mask is not None:
+        pair_indices = pair_indices[pair_mask[pair_indices[:, 0], pair_indices[:, 1]]]
+
+    if sparsity_overlap and sorting_analyzer.sparsity is not None:
+        sparsity_mask = sorting_analyzer.sparsity.mask
+        overlap = np.any(sparsity_mask[pair_indices[:, 0]] & sparsity_mask[pair_indices[:, 1]], axis=1)
+        pair_indices = pair_indices[overlap]
+
+    order = np.lexsort((pair_indices[:, 1], pair_indices[:, 0]))
+    pair_indices = pair_indices[order]
+    pair_distances = np.linalg.norm(unit_locations[pair_indices[:, 0]] - unit_locations[pair_indices[:, 1]], axis=1)
+
+    return pair_indices, pair_distances
+
+
+def _get_upper_pair_indices(pair_mask):
+    """
+    Return the (unit_ind1, unit_ind2) indices of the pairs of the mask with unit_ind1 < unit_ind2.
+    """
+    inds1, inds2 = np.nonzero(pair_mask)
+    keep = inds1 < inds2
+    return inds1[keep], inds2[keep]
+
+
 def get_pairs_via_nntree(sorting_analyzer, k_nn=5, pair_mask=None, **knn_kwargs):
 
     sorting = sorting_analyzer.sorting
@@ -945,28 +1205,24 @@ def compute_correlogram_diff(sorting, correlograms_smoothed, win_sizes, pair_mas
     num_spikes = sorting.count_num_spikes_per_unit(outputs="array")
 
     corr_diff = np.full((n, n), np.nan, dtype="float64")
-    for unit_ind1 in range(n):
-        for unit_ind2 in range(unit_ind1 + 1, n):
-            if not pair_mask[unit_ind1, unit_ind2]:
-                continue
-
-            num1, num2 = num_spikes[unit_ind1], num_spikes[unit_ind2]
-
-            # Weighted window (larger unit imposes its window).
-            win_size = int(round((num1 * win_sizes[unit_ind1] + num2 * win_sizes[unit_ind2]) / (num1 + num2)))
-            # Plage of indices where correlograms are inside the window.
-            corr_inds = np.arange(m - win_size, m + win_size, dtype=int)
-
-            # TODO : for Aurelien
-            shift = 0
-            auto_corr1 = normalize_correlogram(correlograms_smoothed[unit_ind1, unit_ind1, :])
-            auto_corr2 = normalize_correlogram(correlograms_smoothed[unit_ind2, unit_ind2, :])
-            cross_corr = normalize_correlogram(correlograms_smoothed[unit_ind1, unit_ind2, :])
-            diff1 = np.sum(np.abs(cross_corr[corr_inds - shift] - auto_corr1[corr_inds])) / len(corr_inds)
-            diff2 = np.sum(np.abs(cross_corr[corr_inds - shift] - auto_corr2[corr_inds])) / len(corr_inds)
-            # Weighted difference (larger unit imposes its difference).
-            w_diff = (num1 * diff1 + num2 * diff2) / (num1 + num2)
-            corr_diff[unit_ind1, unit_ind2] = w_diff
+    for unit_ind1, unit_ind2 in zip(*_get_upper_pair_indices(pair_mask)):
+        num1, num2 = num_spikes[unit_ind1], num_spikes[unit_ind2]
+
+        # Weighted window (larger unit imposes its window).
+        win_size = int(round((num1 * win_sizes[unit_ind1] + num2 * win_sizes[unit_ind2]) / (num1 + num2)))
+        # Plage of indices where correlograms are inside the window.
+        corr_inds = np.arange(m - win_size, m + win_size, dtype=int)
+
+        # TODO : for Aurelien
+        shift = 0
+        auto_corr1 = normalize_correlogram(correlograms_smoothed[unit_ind1, unit_ind1, :])
+        auto_corr2 = normalize_correlogram(correlograms_smoothed[unit_ind2, unit_ind2, :])
+        cross_corr = normalize_correlogram(correlograms_smoothed[unit_ind1, unit_ind2, :])
+        diff1 = np.sum(np.abs(cross_corr[corr_inds - shift] - auto_corr1[corr_inds])) / len(corr_inds)
+        diff2 = np.sum(np.abs(cross_corr[corr_inds - shift] - auto_corr2[corr_inds])) / len(corr_inds)
+        # Weighted difference (larger unit imposes its difference).
+        w_diff = (num1 * diff1 + num2 * diff2) / (num1 + num2)
+        corr_diff[unit_ind1, unit_ind2] = w_diff
 
     return corr_diff
 
@@ -1085,37 +1341,30 @@ def compute_cross_contaminations(analyzer, pair_mask, cc_thresh, refractory_peri
     CC = np.zeros((n, n), dtype=np.float32)
     p_values = np.zeros((n, n), dtype=np.float32)
 
-    if sorting.get_num_segments() > 1:
-        # for multi-segment sortings, we need to concatenate segments,
-        from spikeinterface import concatenate_sortings, select_segment_sorting
-
-        sorting_list = []
-        total_samples_list = []
-        for segment_index in range(sorting.get_num_segments()):
-            sorting_list.append(select_segment_sorting(sorting, segment_index))
-            total_samples_list.append(analyzer.get_num_samples(segment_index))
-        # concatenate segments
-        sorting_concat = concatenate_sortings(sorting_list=sorting_list, total_samples_list=total_samples_list)
+    inds1, inds2 = _get_upper_pair_indices(pair_mask)
+    if inds1.size == 0:
+        return CC, p_values
+
+    # shared spike vector, sorted by unit and then by time.
+    # for multi-segment sortings, segments are concatenated
+    spikes = sorting.to_spike_vector()
+    segment_offsets = np.cumsum([0] + [analyzer.get_num_samples(i) for i in range(sorting.get_num_segments())])
+    spike_samples = spikes["sample_index"].astype(np.int64) + segment_offsets[spikes["segment_index"]]
+    order = np.argsort(spikes["unit_index"], kind="stable")
+    spike_samples = spike_samples[order]
+    unit_bounds = np.searchsorted(spikes["unit_index"][order], np.arange(n + 1))
+
+    if contaminations is not None:
+        C1 = np.asarray(contaminations, dtype=np.float64)[inds1]
     else:
-        sorting_concat = sorting
-
-    for unit_ind1 in range(len(unit_ids)):
-        unit_id1 = unit_ids[unit_ind1]
-        spike_train1 = np.array(sorting_concat.get_unit_spike_train(unit_id1))
-        for unit_ind2 in range(unit_ind1 + 1, len(unit_ids)):
-            if not pair_mask[unit_ind1, unit_ind2]:
-                continue
-
-            unit_id2 = unit_ids[unit_ind2]
-            spike_train2 = np.array(sorting_concat.get_unit_spike_train(unit_id2))
-            # Compuyting the cross-contamination difference
-            if contaminations is not None:
-                C1 = contaminations[unit_ind1]
-            else:
-                C1 = None
-            CC[unit_ind1, unit_ind2], p_values[unit_ind1, unit_ind2] = estimate_cross_contamination(
-                spike_train1, spike_train2, sf, n_frames, refractory_period, limit=cc_thresh, C1=C1
-            )
+        C1 = np.zeros(inds1.size, dtype=np.float64)
+        for unit_ind in np.unique(inds1):
+            spike_train1 = spike_samples[unit_bounds[unit_ind] : unit_bounds[unit_ind + 1]]
+            C1[inds1 == unit_ind] = estimate_contamination(spike_train1, sf, n_frames, refractory_period)
+
+    CC[inds1, inds2], p_values[inds1, inds2] = estimate_cross_contaminations(
+        spike_samples, unit_bounds, inds1, inds2, sf, n_frames, refractory_period, cc_thresh, C1
+    )
 
     return CC, p_values
 
@@ -1283,14 +1532,11 @@ def compute_presence_distance(sorting, pair_mask, num_samples=None, **presence_d
 
     presence_distances = np.ones((sorting.get_num_units(), sorting.get_num_units()))
 
-    for unit_ind1 in range(n):
-        for unit_ind2 in range(unit_ind1 + 1, n):
-            if not pair_mask[unit_ind1, unit_ind2]:
-                continue
-            unit1 = unit_ids[unit_ind1]
-            unit2 = unit_ids[unit_ind2]
-            d = presence_distance(sorting, unit1, unit2, num_samples=num_samples, **presence_distance_kwargs)
-            presence_distances[unit_ind1, unit_ind2] = d
+    for unit_ind1, unit_ind2 in zip(*_get_upper_pair_indices(pair_mask)):
+        unit1 = unit_ids[unit_ind1]
+        unit2 = unit_ids[unit_ind2]
+        d = presence_distance(sorting, unit1, unit2, num_samples=num_samples, **presence_distance_kwargs)
+        presence_distances[unit_ind1, unit_ind2] = d
 
     return presence_distances
 
@@ -1448,6 +1694,64 @@ if HAVE_NUMBA:
 
         return n_coincident + p_high * n_coincident_high + p_low * n_coincident_low
 
+    @numba.jit(nopython=True, nogil=True, cache=False, parallel=True)
+    def _compute_pairs_nb_violations(spike_samples, unit_bounds, inds1, inds2, t_r, t_c):
+        """
+        Computes, for several pairs of units, the number of coincident spikes between the censored
+        period t_c and the refractory period t_r (in samples).
+        """
+        n_violations = np.zeros(inds1.size, dtype=np.float64)
+        for i in numba.prange(inds1.size):
+            spike_train1 = spike_samples[unit_bounds[inds1[i]] : unit_bounds[inds1[i] + 1]]
+            spike_train2 = spike_samples[unit_bounds[inds2[i]] : unit_bounds[inds2[i] + 1]]
+            n_violations[i] = compute_nb_coincidence(spike_train1, spike_train2, t_r) - compute_nb_coincidence(
+                spike_train1, spike_train2, t_c
+            )
+        return n_violations
+
+
+def binom_sf_batch(x: np.ndarray, n: np.ndarray, p: float) -> np.ndarray:
+    """
+    Vectorized version of `binom_sf()`, for several (x, n) values sharing the same probability.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        The number of successes.
+    n : np.ndarray
+        The number of trials.
+    p : float
+        The probability of success.
+
+    Returns
+    -------
+    sf : np.ndarray
+        The survival function of the binomial distribution.
+    """
+
+    import scipy
+
+    x = np.asarray(x, dtype=np.int64)
+    n = np.asarray(n, dtype=np.float64)
+    sf = np.zeros(n.shape, dtype=np.float64)
+
+    n_low = np.floor(n).astype(np.int64) - 2
+    num_points = np.ceil(n).astype(np.int64) + 3 - n_low
+    for num in np.unique(num_points[n_low >= 0]):
+        (inds,) = np.nonzero((num_points == num) & (n_low >= 0))
+        offsets = np.arange(num)
+        res = scipy.stats.binom.sf(x[inds, None], n_low[inds, None] + offsets[None, :], p)
+        # the quadratic interpolant is linear in the interpolated values: the weights of the
+        # interpolation only depend on the position of n relative to the grid and are shared
+        weights = scipy.interpolate.make_interp_spline(offsets, np.eye(num), k=2)(n[inds] - n_low[inds])
+        sf[inds] = np.sum(weights * res, axis=1)
+
+    # grids truncated at 0 are rare and done one by one
+    for ind in np.flatnonzero(n_low < 0):
+        sf[ind] = binom_sf(x[ind], n[ind], p)
+
+    return sf
+
 
 def estimate_contamination(spike_train: np.ndarray, sf: float, T: int, refractory_period: tuple[float, float]) -> float:
     """
@@ -1548,6 +1852,71 @@ def estimate_cross_contamination(
     return estimation, p_value
 
 
+def estimate_cross_contaminations(
+    spike_samples: np.ndarray,
+    unit_bounds: np.ndarray,
+    inds1: np.ndarray,
+    inds2: np.ndarray,
+    sf: float,
+    T: int,
+    refractory_period: tuple[float, float],
+    limit: float,
+    C1: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized version of `estimate_cross_contamination()` for several pairs of units at once.
+
+    Parameters
+    ----------
+    spike_samples : np.ndarray
+        The spike times (in samples) of all units, sorted by unit and then by time.
+    unit_bounds : np.ndarray
+        The (num_units + 1) start indices of the spikes of each unit in `spike_samples`.
+    inds1 : np.ndarray
+        The unit indices of the first unit of each pair.
+    inds2 : np.ndarray
+        The unit indices of the second unit of each pair.
+    sf : float
+        The sampling frequency (in Hz).
+    T : int
+        The duration of the recording (in samples).
+    refractory_period : tuple[float, float]
+        The censored and refractory period (t_c, t_r) used (in ms).
+    limit : float
+        The higher limit of cross-contamination for the statistical test.
+    C1 : np.ndarray
+        The contamination estimate of the first unit of each pair.
+
+    Returns
+    -------
+    estimated_cross_cont : np.ndarray
+        The estimation of cross-contamination of each pair.
+    p_value : np.ndarray
+        The p-value of the statistical test of each pair.
+    """
+    num_spikes = np.diff(unit_bounds).astype(np.float64)
+    N1 = num_spikes[inds1]
+    N2 = num_spikes[inds2]
+
+    t_c = int(round(refractory_period[0] * 1e-3 * sf))
+    t_r = int(round(refractory_period[1] * 1e-3 * sf))
+    n_violations = _compute_pairs_nb_violations(
+        spike_samples, unit_bounds, inds1.astype(np.int64), inds2.astype(np.int64), t_r, t_c
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        estimation = 1 - ((n_violations * T) / (2 * N1 * N2 * t_r) - 1.0) / (C1 - 1.0)
+    estimation[C1 == 1.0] = -np.inf
+
+    # n and p for the binomial law for the number of coincidence (under the hypothesis of cross-contamination = limit).
+    n = N1 * N2 * ((1 - C1) * limit + C1)
+    p = 2 * t_r / T
+    p_values = binom_sf_batch(np.trunc(n_violations - 1), n, p)
+    if np.any(np.isnan(p_values)):  # Should be unreachable
+        raise ValueError("Could not compute p-value for cross-contamination")
+
+    return estimation, p_values
+
+
 def compute_slay_matrix(
     sorting_analyzer: SortingAnalyzer,
     k1: float,
@@ -1621,19 +1990,12 @@ def compute_xcorr_and_rp(sorting_analyzer: SortingAnalyzer, pair_mask: np.ndarra
     rho_ij = np.zeros([len(sorting_analyzer.unit_ids), len(sorting_analyzer.unit_ids)])
     eta_ij = np.zeros([len(sorting_analyzer.unit_ids), len(sorting_analyzer.unit_ids)])
 
-    for unit_index_1, _ in enumerate(sorting_analyzer.unit_ids):
-        for unit_index_2, _ in enumerate(sorting_analyzer.unit_ids):
-
-            # Don't waste time computing the other metrics if units not candidates merges
-            if not pair_mask[unit_index_1, unit_index_2]:
-                continue
-
-            xgram = ccgs[unit_index_1, unit_index_2, :]
-
-            rho_ij[unit_index_1, unit_index_2] = _compute_xcorr_pair(
-                xgram, bin_size_s=bin_size_ms / 1000, min_xcorr_rate=0
-            )
-            eta_ij[unit_index_1, unit_index_2] = _sliding_RP_viol_pair(xgram, bin_size_ms=bin_size_ms)
+    # Don't waste time computing the other metrics if units not candidates merges
+    inds1, inds2 = np.nonzero(pair_mask)
+    if inds1.size > 0:
+        xgrams = ccgs[inds1, inds2, :]
+        rho_ij[inds1, inds2] = _compute_xcorr_pairs(xgrams, bin_size_s=bin_size_ms / 1000, min_xcorr_rate=0)
+        eta_ij[inds1, inds2] = _sliding_RP_viol_pairs(xgrams, bin_size_ms=bin_size_ms)
 
     return rho_ij, eta_ij
 
@@ -1669,8 +2031,34 @@ def _compute_xcorr_pair(
         The calculated cross-correlation significance metric.
     """
 
-    from scipy.signal import butter, find_peaks_cwt, sosfiltfilt
-    from scipy.stats import wasserstein_distance
+    return _compute_xcorr_pairs(xgram[None, :], bin_size_s=bin_size_s, min_xcorr_rate=min_xcorr_rate)[0]
+
+
+def _compute_xcorr_pairs(
+    xgrams,
+    bin_size_s: float,
+    min_xcorr_rate: float,
+) -> np.ndarray:
+    """
+    Vectorized version of `_compute_xcorr_pair()` for several cluster pairs: the low-pass filtered
+    second derivatives of all cross-correlograms are computed at once.
+
+    Parameters
+    ----------
+    xgrams : np.array
+        The raw cross-correlograms of the cluster pairs, with shape (num_pairs, num_bins).
+    bin_size_s : float
+        The width in seconds of the bin size of the input ccgs.
+    min_xcorr_rate : float
+        The minimum ccg firing rate in Hz.
+
+    Returns
+    -------
+    sigs : np.array
+        The calculated cross-correlation significance metric of each pair.
+    """
+
+    from scipy.signal import butter, sosfiltfilt
 
     # calculate low-pass filtered second derivative of ccg
     fs = 1 / bin_size_s
@@ -1679,9 +2067,23 @@ def _compute_xcorr_pair(
     cutoff = cutoff_freq / nyqist
     peak_width = 0.002 / bin_size_s
 
-    xgram_2d = np.diff(xgram, 2)
+    xgrams_2d = np.diff(xgrams, 2, axis=1)
     sos = butter(4, cutoff, output="sos")
-    xgram_2d = sosfiltfilt(sos, xgram_2d)
+    xgrams_2d = sosfiltfilt(sos, xgrams_2d, axis=1)
+
+    sigs = np.zeros(xgrams.shape[0], dtype=np.float64)
+    for i in range(xgrams.shape[0]):
+        sigs[i] = _xcorr_significance(xgrams[i], xgrams_2d[i], bin_size_s, min_xcorr_rate, peak_width)
+
+    return sigs
+
+
+def _xcorr_significance(xgram, xgram_2d, bin_size_s, min_xcorr_rate, peak_width) -> float:
+    """
+    Cross-correlation significance of a single pair, given the filtered second derivative of its ccg.
+    """
+    from scipy.signal import find_peaks_cwt
+    from scipy.stats import wasserstein_distance
 
     if xgram.sum() == 0:
         return 0
@@ -1760,6 +2162,31 @@ def _sliding_RP_viol_pair(
     sig : float
         The refractory period violation confidence for the cluster.
     """
+    return _sliding_RP_viol_pairs(correlogram[None, :], bin_size_ms=bin_size_ms, accept_threshold=accept_threshold)[0]
+
+
+def _sliding_RP_viol_pairs(
+    correlograms,
+    bin_size_ms: float,
+    accept_threshold: float = 0.15,
+) -> np.ndarray:
+    """
+    Vectorized version of `_sliding_RP_viol_pair()` for several correlograms at once.
+
+    Parameters
+    ----------
+    correlograms : np.array
+        The correlograms, with shape (num_pairs, num_bins).
+    bin_size_ms : float
+        The width in ms of the bin size of the input ccgs.
+    accept_threshold : float, default: 0.15
+        The minimum ccg firing rate in Hz.
+
+    Returns
+    -------
+    rp_viols : np.array
+        The refractory period violation confidence for each correlogram.
+    """
     from scipy.signal import butter, sosfiltfilt
     from scipy.stats import poisson
 
@@ -1772,11 +2199,11 @@ def _sliding_RP_viol_pair(
 
     # calculate and avg halves of acg to ensure symmetry
     # keep only second half of acg, refractory period violations are compared from the center of acg
-    half_len = int(correlogram.shape[0] / 2)
-    correlogram = (correlogram[half_len:] + correlogram[:half_len][::-1]) / 2
+    half_len = int(correlograms.shape[1] / 2)
+    correlograms = (correlograms[:, half_len:] + correlograms[:, :half_len][:, ::-1]) / 2
 
-    acg_cumsum = np.cumsum(correlogram)
-    sum_res = acg_cumsum[test_refractory_period_indices - 1]  # -1 bc 0th bin corresponds to 0-bin_size ms
+    acg_cumsum = np.cumsum(correlograms, axis=1)
+    sum_res = acg_cumsum[:, test_refractory_period_indices - 1]  # -1 bc 0th bin corresponds to 0-bin_size ms
 
     # low-pass filter acg and use max as baseline event rate
     order = 4  # Hz
@@ -1785,12 +2212,14 @@ def _sliding_RP_viol_pair(
     nyqist = fs / 2
     cutoff = cutoff_freq / nyqist
     sos = butter(order, cutoff, btype="low", output="sos")
-    smoothed_acg = sosfiltfilt(sos, correlogram)
+    smoothed_acgs = sosfiltfilt(sos, correlograms, axis=1)
 
-    bin_rate_max = np.max(smoothed_acg)
-    max_conts_max = np.array(test_refractory_periods) / bin_size_ms * 1000 * (bin_rate_max * accept_threshold)
+    bin_rate_max = np.max(smoothed_acgs, axis=1)
+    max_conts_max = (
+        np.array(test_refractory_periods)[None, :] / bin_size_ms * 1000 * (bin_rate_max[:, None] * accept_threshold)
+    )
     # compute confidence of less than acceptThresh contamination at each refractory period
     confs = 1 - poisson.cdf(sum_res, max_conts_max)
-    rp_viol = 1 - confs.max()
+    rp_viols = 1 - confs.max(axis=1)
 
-    return rp_viol
+    return rp_viols
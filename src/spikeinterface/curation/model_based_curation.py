@@ -74,6 +74,36 @@ class ModelBasedClassification:
             A dataframe containing the classified units and their corresponding predictions and probabilities,
             indexed by their `unit_ids`.
         """
+        input_data = self.get_input_data(
+            input_data=input_data, model_info=model_info, enforce_metric_params=enforce_metric_params
+        )
+        label_conversion = _get_label_conversion(label_conversion, model_info)
+
+        input_data = _format_metric_dataframe(input_data)
+
+        # Apply classifier
+        predictions, probabilities = _predict_with_pipeline(self.pipeline, input_data)
+
+        return self.set_predictions(predictions, probabilities, label_conversion, export_to_phy=export_to_phy)
+
+    def get_input_data(self, input_data=None, model_info=None, enforce_metric_params=False):
+        """
+        Gets the metrics used for classification, with the columns ordered as the features of the model.
+
+        Parameters
+        ----------
+        input_data : pandas.DataFrame or None, default: None
+            The input data for classification. If not provided, the method will extract metrics stored in the sorting analyzer.
+        model_info : dict or None, default: None
+            Model info, generated with model, used to check metric parameters used to train it.
+        enforce_metric_params : bool, default: False
+            If True and the metric parameters are different than the ones used to train the model, raise an error.
+
+        Returns
+        -------
+        pd.DataFrame
+            The metrics required by the model, indexed by the `unit_ids`.
+        """
         import pandas as pd
 
         # Get metrics DataFrame for classification
@@ -89,22 +119,30 @@ class ModelBasedClassification:
         if model_info is not None:
             self._check_params_for_classification(enforce_metric_params, model_info=model_info)
 
-        if model_info is not None and label_conversion is None:
-            try:
-                string_label_conversion = model_info["label_conversion"]
-                # json keys are strings; we convert these to ints
-                label_conversion = {}
-                for key, value in string_label_conversion.items():
-                    label_conversion[int(key)] = value
-            except:
-                warnings.warn("Could not find `label_conversion` key in `model_info.json` file")
+        return input_data
 
-        input_data = _format_metric_dataframe(input_data)
+    def set_predictions(self, predictions, probabilities, label_conversion=None, export_to_phy=False):
+        """
+        Converts the predictions of the model and sets them as sorting properties.
 
-        # Apply classifier
-        predictions = self.pipeline.predict(input_data)
-        probabilities = self.pipeline.predict_proba(input_data)
-        probabilities = np.max(probabilities, axis=1)
+        Parameters
+        ----------
+        predictions : np.array
+            The labels predicted by the model for each unit.
+        probabilities : np.array
+            The probability of the predicted label for each unit.
+        label_conversion : dict or None, default: None
+            A dictionary for converting the predicted labels to custom labels.
+        export_to_phy : bool, default: False.
+            Whether to export the classified units to Phy format.
+
+        Returns
+        -------
+        pd.DataFrame
+            A dataframe containing the classified units and their corresponding predictions and probabilities,
+            indexed by their `unit_ids`.
+        """
+        import pandas as pd
 
         if isinstance(label_conversion, dict):
 
@@ -316,6 +354,127 @@ def model_based_label_units(
     return classified_units
 
 
+def model_based_label_units_batch(
+    sorting_analyzers: list[SortingAnalyzer],
+    model_folder=None,
+    repo_id=None,
+    model_name=None,
+    label_conversion=None,
+    trust_model=False,
+    trusted=None,
+    export_to_phy=False,
+    enforce_metric_params=False,
+    n_jobs=1,
+):
+    """
+    Labels the units of several sorting analyzers with the same model, see `model_based_label_units()`.
+
+    The model is loaded once (and kept in cache for further calls with the same model), the features of all
+    the analyzers are assembled in a single DataFrame, and the predictions are run in parallel across analyzers.
+
+    Parameters
+    ----------
+    sorting_analyzers : list of SortingAnalyzer
+        The sorting analyzers to label.
+    model_folder : str or Path, default: None
+        The path to the folder containing the model
+    repo_id : str, default: None
+        Hugging face repo id which contains the model e.g. 'username/model'
+    model_name: str, default: None
+        Filename of model e.g. 'my_model.skops'. If None, uses first model found.
+    label_conversion : dic | None, default: None
+        A dictionary for converting the predicted labels (which are integers) to custom labels. If None,
+        tries to extract from `model_info.json` file. The dictionary should have the format {old_label: new_label}.
+    trust_model : bool, default: False
+        Whether to trust the model, see `model_based_label_units()`.
+    trusted : list of str, default: None
+        Passed to skops.load, see `model_based_label_units()`.
+    export_to_phy : bool, default: False
+        Whether to export the results to Phy format.
+    enforce_metric_params : bool, default: False
+        If True and the parameters used to compute the metrics are different than the parameters
+        used to compute the metrics used to train the model, this function will raise an error.
+    n_jobs : int, default: 1
+        The number of threads used to run the predictions.
+
+    Returns
+    -------
+    classified_units : list of pd.DataFrame
+        For each sorting analyzer, a dataframe containing the classified units, indexed by the `unit_ids`,
+        containing the predicted label and confidence probability of each labelled unit.
+    """
+    import pandas as pd
+    from concurrent.futures import ThreadPoolExecutor
+    from sklearn.pipeline import Pipeline
+
+    model, model_info = load_model(
+        model_folder=model_folder,
+        repo_id=repo_id,
+        model_name=model_name,
+        trust_model=trust_model,
+        trusted=trusted,
+        use_cache=True,
+    )
+
+    if not isinstance(model, Pipeline):
+        raise ValueError("The model must be an instance of sklearn.pipeline.Pipeline")
+
+    classifications = [ModelBasedClassification(sorting_analyzer, model) for sorting_analyzer in sorting_analyzers]
+    if len(classifications) == 0:
+        return []
+
+    all_input_data = [
+        classification.get_input_data(model_info=model_info, enforce_metric_params=enforce_metric_params)
+        for classification in classifications
+    ]
+    label_conversion = _get_label_conversion(label_conversion, model_info)
+
+    # the metrics of all analyzers are formatted at once
+    all_input_data = _format_metric_dataframe(pd.concat(all_input_data, keys=range(len(classifications))))
+
+    def _predict(analyzer_index):
+        return _predict_with_pipeline(model, all_input_data.loc[analyzer_index])
+
+    if n_jobs == 1:
+        all_predictions = [_predict(analyzer_index) for analyzer_index in range(len(classifications))]
+    else:
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            all_predictions = list(executor.map(_predict, range(len(classifications))))
+
+    classified_units = [
+        classification.set_predictions(predictions, probabilities, label_conversion, export_to_phy=export_to_phy)
+        for classification, (predictions, probabilities) in zip(classifications, all_predictions)
+    ]
+
+    return classified_units
+
+
+def _get_label_conversion(label_conversion, model_info):
+    """
+    Gets the label conversion dictionary from the `model_info` if not provided.
+    """
+    if model_info is not None and label_conversion is None:
+        try:
+            string_label_conversion = model_info["label_conversion"]
+            # json keys are strings; we convert these to ints
+            label_conversion = {}
+            for key, value in string_label_conversion.items():
+                label_conversion[int(key)] = value
+        except:
+            warnings.warn("Could not find `label_conversion` key in `model_info.json` file")
+    return label_conversion
+
+
+def _predict_with_pipeline(pipeline, input_data):
+    """
+    Returns the predictions and the probability of the predicted label of a pipeline.
+    """
+    predictions = pipeline.predict(input_data)
+    probabilities = pipeline.predict_proba(input_data)
+    probabilities = np.max(probabilities, axis=1)
+    return predictions, probabilities
+
+
 def auto_label_units(*args, **kwargs):
     """
     Deprecated function. Please use `model_based_label_units` instead.
@@ -329,7 +488,11 @@ def auto_label_units(*args, **kwargs):
     return model_based_label_units(*args, **kwargs)
 
 
-def load_model(model_folder=None, repo_id=None, model_name=None, trust_model=False, trusted=None):
+# models loaded with `use_cache=True`, keyed by their location and loading parameters
+_loaded_models = {}
+
+
+def load_model(model_folder=None, repo_id=None, model_name=None, trust_model=False, trusted=None, use_cache=False):
     """
     Loads a model and model_info from a HuggingFaceHub repo or a local folder.
 
@@ -346,6 +509,8 @@ def load_model(model_folder=None, repo_id=None, model_name=None, trust_model=Fal
         automatically inferred. If False, the `trusted` parameter must be provided to indicate the trusted objects.
     trusted : list of str, default: None
         Passed to skops.load. The object will be loaded only if there are only trusted objects and objects of types listed in trusted in the dumped file.
+    use_cache : bool, default: False
+        If True, the model is kept in memory and reused by the next calls loading the same model.
 
 
     Returns
@@ -354,6 +519,21 @@ def load_model(model_folder=None, repo_id=None, model_name=None, trust_model=Fal
         A model and metadata about the model
     """
 
+    if use_cache:
+        location = str(Path(model_folder).resolve()) if model_folder is not None else repo_id
+        trusted_key = tuple(trusted) if trusted is not None else None
+        cache_key = (location, model_name, trust_model, trusted_key)
+        if cache_key not in _loaded_models:
+            _loaded_models[cache_key] = load_model(
+                model_folder=model_folder,
+                repo_id=repo_id,
+                model_name=model_name,
+                trust_model=trust_model,
+                trusted=trusted,
+            )
+        model, model_info = _loaded_models[cache_key]
+        return model, deepcopy(model_info)
+
     if model_folder is None and repo_id is None:
         raise ValueError("Please provide a 'model_folder' or a 'repo_id'.")
     elif model_folder is not None and repo_id is not None:
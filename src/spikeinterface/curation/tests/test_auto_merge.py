@@ -1,8 +1,17 @@
 import pytest
+import numpy as np
 
 
 from spikeinterface.core import create_sorting_analyzer
 from spikeinterface.curation import compute_merge_unit_groups, auto_merge_units
+from spikeinterface.curation.auto_merge import (
+    get_candidate_pairs,
+    binom_sf,
+    binom_sf_batch,
+    estimate_cross_contamination,
+    estimate_cross_contaminations,
+    clean_merge_cache,
+)
 from spikeinterface.generation import split_sorting_by_times
 
 
@@ -39,6 +48,12 @@ def test_compute_merge_unit_groups(sorting_analyzer_with_splits, preset):
             # firing_contamination_balance=1.5,
             extra_outputs=True,
         )
+        if "unit_distances" in outs:
+            num_units = sorting_analyzer.get_num_units()
+            assert isinstance(outs["unit_distances"], np.ndarray)
+            assert outs["unit_distances"].shape == (num_units, num_units)
+            pair_indices, pair_distances = outs["candidate_pairs"]
+            assert np.allclose(outs["unit_distances"][pair_indices[:, 0], pair_indices[:, 1]], pair_distances)
         if preset == "x_contaminations":
             assert len(merge_unit_groups) == num_unit_splitted
             for true_pair in other_ids.values():
@@ -68,6 +83,57 @@ def test_compute_merge_unit_groups_multi_segment(sorting_analyzer_multi_segment_
     )
 
 
+def test_get_candidate_pairs(sorting_analyzer_for_curation):
+    import scipy.spatial
+
+    sorting_analyzer = sorting_analyzer_for_curation
+    sorting_analyzer.compute(["random_spikes", "templates", "unit_locations"])
+    max_distance_um = 50.0
+
+    pair_indices, pair_distances = get_candidate_pairs(sorting_analyzer, max_distance_um=max_distance_um)
+
+    unit_locations = sorting_analyzer.get_extension("unit_locations").get_data()[:, :2]
+    unit_distances = scipy.spatial.distance.cdist(unit_locations, unit_locations, metric="euclidean")
+    expected_pairs = np.argwhere(np.triu(unit_distances <= max_distance_um, 1))
+    assert np.array_equal(pair_indices, expected_pairs)
+    assert np.allclose(pair_distances, unit_distances[expected_pairs[:, 0], expected_pairs[:, 1]])
+
+    # pair_mask restricts the candidates
+    pair_mask = np.zeros(unit_distances.shape, dtype="bool")
+    pair_mask[tuple(expected_pairs[:1].T)] = True
+    pair_indices, _ = get_candidate_pairs(sorting_analyzer, max_distance_um=max_distance_um, pair_mask=pair_mask)
+    assert np.array_equal(pair_indices, expected_pairs[:1])
+
+
+def test_binom_sf_batch():
+    rng = np.random.default_rng(seed=2205)
+    x = rng.integers(0, 200, size=20)
+    n = np.concatenate([[0.5, 1.5, 4.0], rng.uniform(0, 2000, size=17)])
+    sf = binom_sf_batch(x, n, 0.02)
+    expected = np.array([binom_sf(int(x_), n_, 0.02) for x_, n_ in zip(x, n)])
+    assert np.allclose(sf, expected)
+
+
+def test_estimate_cross_contaminations():
+    rng = np.random.default_rng(seed=2205)
+    sf, T = 30000.0, 300_000
+    spike_trains = [np.sort(rng.choice(T, size=size, replace=False)).astype(np.int64) for size in (500, 800, 300)]
+    spike_samples = np.concatenate(spike_trains)
+    unit_bounds = np.cumsum([0] + [st.size for st in spike_trains])
+    inds1, inds2 = np.array([0, 0, 1]), np.array([1, 2, 2])
+    C1 = np.array([0.05, 0.05, 0.1])
+
+    estimation, p_values = estimate_cross_contaminations(
+        spike_samples, unit_bounds, inds1, inds2, sf, T, (0.3, 1.0), 0.1, C1
+    )
+    for i in range(inds1.size):
+        expected = estimate_cross_contamination(
+            spike_trains[inds1[i]], spike_trains[inds2[i]], sf, T, (0.3, 1.0), limit=0.1, C1=C1[i]
+        )
+        assert np.isclose(estimation[i], expected[0])
+        assert np.isclose(p_values[i], expected[1])
+
+
 def test_auto_merge_units(sorting_analyzer_for_curation):
     recording = sorting_analyzer_for_curation.recording
     new_sorting, _ = split_sorting_by_times(sorting_analyzer_for_curation)
@@ -92,6 +158,36 @@ def test_auto_merge_units_iterative(sorting_analyzer_for_curation):
     assert len(merged_analyzer.unit_ids) < len(new_sorting_analyzer.unit_ids)
 
 
+def test_auto_merge_units_incremental(sorting_analyzer_for_curation):
+    recording = sorting_analyzer_for_curation.recording
+    new_sorting, _ = split_sorting_by_times(sorting_analyzer_for_curation, seed=0)
+    new_sorting_analyzer = create_sorting_analyzer(new_sorting, recording, format="memory")
+    # seeded extensions computed once, so that every copy made by auto_merge_units starts from the same state
+    new_sorting_analyzer.compute("random_spikes", seed=2205)
+    new_sorting_analyzer.compute(["templates", "unit_locations", "template_similarity", "correlograms"])
+    presets = ["x_contaminations", "similarity_correlograms", "temporal_splits"]
+
+    results = []
+    for incremental in (False, False, True, True):
+        merged_analyzer, merges, _, _ = auto_merge_units(
+            new_sorting_analyzer, presets=presets, recursive=True, incremental=incremental, extra_outputs=True
+        )
+        results.append((merged_analyzer.unit_ids, merges))
+
+    # each path is deterministic and both paths give the same merges
+    for unit_ids, merges in results[1:]:
+        assert np.array_equal(results[0][0], unit_ids)
+        assert merges == results[0][1]
+
+
+def test_clean_merge_cache():
+    cache = {("step",): {"units": {0: 1.0, 1: 2.0, 2: 3.0}, "pairs": {(0, 1): (1.0,), (0, 2): (2.0,), (1, 2): (3.0,)}}}
+    # units 1 and 2 are merged into unit 3
+    clean_merge_cache(cache, unit_ids=[0, 3], new_unit_ids=[3])
+    assert cache[("step",)]["units"] == {0: 1.0}
+    assert cache[("step",)]["pairs"] == {}
+
+
 if __name__ == "__main__":
     sorting_analyzer = make_sorting_analyzer(sparse=True)
     preset = None
@@ -3,7 +3,7 @@ from pathlib import Path
 
 from spikeinterface.curation.tests.common import sorting_analyzer_for_unitrefine_curation, trained_pipeline_path
 from spikeinterface.curation.model_based_curation import ModelBasedClassification
-from spikeinterface.curation import model_based_label_units, load_model
+from spikeinterface.curation import model_based_label_units, model_based_label_units_batch, load_model
 
 
 import numpy as np
@@ -142,6 +142,32 @@ def test_model_based_classification_predict_labels(sorting_analyzer_for_unitrefi
     assert np.all(predictions_labelled == expected_result_converted)
 
 
+def test_model_based_label_units_batch(sorting_analyzer_for_unitrefine_curation, trained_pipeline_path):
+    """Labelling several analyzers in one call should give the same results as labelling them one by one,
+    and the model should be loaded only once."""
+    from spikeinterface.curation import model_based_curation
+
+    sorting_analyzer_for_unitrefine_curation.compute(
+        "template_metrics", metric_names=["half_width", "peak_to_trough_duration", "number_of_peaks"]
+    )
+    sorting_analyzer_for_unitrefine_curation.compute("quality_metrics", metric_names=["num_spikes", "snr"])
+    sorting_analyzers = [sorting_analyzer_for_unitrefine_curation, sorting_analyzer_for_unitrefine_curation.copy()]
+
+    expected = model_based_label_units(
+        sorting_analyzer_for_unitrefine_curation, model_folder=trained_pipeline_path, trusted=["numpy.dtype"]
+    )
+
+    model_based_curation._loaded_models.clear()
+    for n_jobs in (1, 2):
+        classified_units = model_based_label_units_batch(
+            sorting_analyzers, model_folder=trained_pipeline_path, trusted=["numpy.dtype"], n_jobs=n_jobs
+        )
+        assert len(classified_units) == 2
+        for classified in classified_units:
+            assert classified.equals(expected)
+    assert len(model_based_curation._loaded_models) == 1
+
+
 @pytest.mark.skip(reason="We need to retrain the model to reflect any changes in metric computation")
 def test_exception_raised_when_metric_params_not_equal(sorting_analyzer_for_unitrefine_curation, trained_pipeline_path):
     """We track whether the metric parameters used to compute the metrics used to train
@@ -830,7 +830,7 @@ def check_metric_names_are_the_same(metrics_for_each_analyzer):
 
 def _format_metric_dataframe(input_data):
 
-    input_data = input_data.map(lambda x: np.nan if np.isinf(x) else x)
+    input_data = input_data.replace([np.inf, -np.inf], np.nan)
     input_data = input_data.astype("float32")
 
     return input_data
@@ -21,4 +21,5 @@ from .misc_metrics import (
     compute_sd_ratio,
     compute_synchrony_metrics,
     compute_refrac_period_violations,
+    compute_spike_train_statistics,
 )
@@ -15,7 +15,8 @@ import importlib.util
 import numpy as np
 
 from spikeinterface.core.analyzer_extension_core import BaseMetric
-from spikeinterface.core import SortingAnalyzer, NumpySorting
+from spikeinterface.core import SortingAnalyzer
+from spikeinterface.core.sorting_tools import select_sorting_periods_mask
 from spikeinterface.core.template_tools import (
     get_template_extremum_channel,
     get_template_extremum_amplitude,
@@ -35,8 +36,32 @@ else:
     HAVE_NUMBA = False
 
 
+def _with_spike_train_statistics(compute_function):
+    """
+    Wrap a metric computed from the spike trains so that it reads the spike train statistics
+    precomputed once for all these metrics in `tmp_data` (see `compute_spike_train_statistics()`).
+    """
+
+    def metric_function(sorting_analyzer, unit_ids=None, tmp_data=None, periods=None, **metric_params):
+        spike_train_statistics = None if tmp_data is None else tmp_data.get("spike_train_statistics")
+        return compute_function(
+            sorting_analyzer,
+            unit_ids=unit_ids,
+            periods=periods,
+            spike_train_statistics=spike_train_statistics,
+            **metric_params,
+        )
+
+    return metric_function
+
+
 def compute_presence_ratios(
-    sorting_analyzer, unit_ids=None, periods=None, bin_duration_s=60.0, mean_fr_ratio_thresh=0.0
+    sorting_analyzer,
+    unit_ids=None,
+    periods=None,
+    bin_duration_s=60.0,
+    mean_fr_ratio_thresh=0.0,
+    spike_train_statistics=None,
 ):
     """
     Calculate the presence ratio, the fraction of time the unit is firing above a certain threshold.
@@ -56,6 +81,9 @@ def compute_presence_ratios(
     mean_fr_ratio_thresh : float, default: 0
         The unit is considered active in a bin if its firing rate during that bin.
         is strictly above `mean_fr_ratio_thresh` times its mean firing rate throughout the recording.
+    spike_train_statistics : dict | None, default: None
+        Precomputed statistics from `compute_spike_train_statistics()`. If None or if they do not cover
+        the requested units and parameters, they are computed.
 
     Returns
     -------
@@ -78,12 +106,6 @@ def compute_presence_ratios(
     total_durations = compute_total_durations_per_unit(sorting_analyzer, periods=periods)
     total_samples = np.sum(segment_samples)
     bin_duration_samples = int((bin_duration_s * sorting_analyzer.sampling_frequency))
-    bin_edges_per_unit = compute_bin_edges_per_unit(
-        sorting,
-        segment_samples=segment_samples,
-        periods=periods,
-        bin_duration_s=bin_duration_s,
-    )
 
     mean_fr_ratio_thresh = float(mean_fr_ratio_thresh)
     if mean_fr_ratio_thresh < 0:
@@ -101,43 +123,37 @@ def compute_presence_ratios(
         presence_ratios = {unit_id: np.nan for unit_id in unit_ids}
     else:
 
+        spike_train_statistics = _get_spike_train_statistics(
+            spike_train_statistics, sorting_analyzer, unit_ids, periods, bin_durations_s=[bin_duration_s]
+        )
+        binned_spike_counts = spike_train_statistics["binned_spike_counts"][bin_duration_s]
         for unit_id in unit_ids:
             if num_spikes[unit_id] == 0:
                 presence_ratios[unit_id] = np.nan
                 continue
-            spike_train = []
-            bin_edges = bin_edges_per_unit[unit_id]
-            if len(bin_edges) < 2:
+            bin_spike_counts = binned_spike_counts[unit_id]
+            if len(bin_spike_counts) < 1:
                 presence_ratios[unit_id] = 0.0
                 continue
             total_duration = total_durations[unit_id]
 
-            spike_train = []
-            for segment_index in range(num_segs):
-                st = sorting.get_unit_spike_train(unit_id=unit_id, segment_index=segment_index)
-                st = st + np.sum(segment_samples[:segment_index])
-                spike_train.append(st)
-            spike_train = np.concatenate(spike_train)
-
-            unit_fr = spike_train.size / total_duration
+            unit_fr = num_spikes[unit_id] / total_duration
             bin_n_spikes_thres = math.floor(unit_fr * bin_duration_s * mean_fr_ratio_thresh)
 
-            presence_ratios[unit_id] = presence_ratio(
-                spike_train,
-                bin_edges=bin_edges,
-                bin_n_spikes_thres=bin_n_spikes_thres,
-            )
+            presence_ratios[unit_id] = np.sum(bin_spike_counts > bin_n_spikes_thres) / len(bin_spike_counts)
 
     return presence_ratios
 
 
 class PresenceRatio(BaseMetric):
     metric_name = "presence_ratio"
-    metric_function = compute_presence_ratios
+    metric_function = _with_spike_train_statistics(compute_presence_ratios)
     metric_params = {"bin_duration_s": 60, "mean_fr_ratio_thresh": 0.0}
     metric_columns = {"presence_ratio": float}
     metric_descriptions = {"presence_ratio": "Fraction of time the unit is active."}
+    needs_tmp_data = True
     supports_periods = True
+    supports_unit_parallel = True
 
 
 def compute_snrs(
@@ -336,7 +352,9 @@ class SNR(BaseMetric):
 #     depend_on = ["waveforms", "templates"]
 
 
-def compute_isi_violations(sorting_analyzer, unit_ids=None, periods=None, isi_threshold_ms=1.5, min_isi_ms=0):
+def compute_isi_violations(
+    sorting_analyzer, unit_ids=None, periods=None, isi_threshold_ms=1.5, min_isi_ms=0, spike_train_statistics=None
+):
     """
     Calculate Inter-Spike Interval (ISI) violations.
 
@@ -361,6 +379,9 @@ def compute_isi_violations(sorting_analyzer, unit_ids=None, periods=None, isi_th
         Minimum possible inter-spike interval, in ms.
         This is the artificial refractory period enforced.
         by the data acquisition system or post-processing algorithms.
+    spike_train_statistics : dict | None, default: None
+        Precomputed statistics from `compute_spike_train_statistics()`. If None or if they do not cover
+        the requested units and parameters, they are computed.
 
     Returns
     -------
@@ -398,7 +419,6 @@ def compute_isi_violations(sorting_analyzer, unit_ids=None, periods=None, isi_th
 
     total_durations = compute_total_durations_per_unit(sorting_analyzer, periods=periods)
     num_spikes = sorting.count_num_spikes_per_unit(unit_ids=unit_ids)
-    fs = sorting_analyzer.sampling_frequency
 
     isi_threshold_s = isi_threshold_ms / 1000
     min_isi_s = min_isi_ms / 1000
@@ -406,41 +426,48 @@ def compute_isi_violations(sorting_analyzer, unit_ids=None, periods=None, isi_th
     isi_violations_count = {}
     isi_violations_ratio = {}
 
+    spike_train_statistics = _get_spike_train_statistics(
+        spike_train_statistics, sorting_analyzer, unit_ids, periods, isi_threshold_ms=isi_threshold_ms
+    )
     for unit_id in unit_ids:
         if num_spikes[unit_id] == 0:
             isi_violations_ratio[unit_id] = np.nan
             isi_violations_count[unit_id] = -1
             continue
 
-        spike_train_list = []
-        for segment_index in range(sorting_analyzer.get_num_segments()):
-            spike_train = sorting.get_unit_spike_train(unit_id=unit_id, segment_index=segment_index)
-            if len(spike_train) > 0:
-                spike_train_list.append(spike_train / fs)
-
         total_duration = total_durations[unit_id]
-        ratio, _, count = isi_violations(spike_train_list, total_duration, isi_threshold_s, min_isi_s)
+        num_violations = np.int64(spike_train_statistics["isi_violations_count"][unit_id])
+        violation_time = 2 * num_spikes[unit_id] * (isi_threshold_s - min_isi_s)
+        total_rate = num_spikes[unit_id] / total_duration
+        violation_rate = num_violations / violation_time
 
-        isi_violations_ratio[unit_id] = ratio
-        isi_violations_count[unit_id] = count
+        isi_violations_ratio[unit_id] = violation_rate / total_rate
+        isi_violations_count[unit_id] = num_violations
 
     return res(isi_violations_ratio, isi_violations_count)
 
 
 class ISIViolation(BaseMetric):
     metric_name = "isi_violation"
-    metric_function = compute_isi_violations
+    metric_function = _with_spike_train_statistics(compute_isi_violations)
     metric_params = {"isi_threshold_ms": 1.5, "min_isi_ms": 0}
     metric_columns = {"isi_violations_ratio": float, "isi_violations_count": int}
     metric_descriptions = {
         "isi_violations_ratio": "Ratio of ISI violations for each unit.",
         "isi_violations_count": "Count of ISI violations for each unit.",
     }
+    needs_tmp_data = True
     supports_periods = True
+    supports_unit_parallel = True
 
 
 def compute_refrac_period_violations(
-    sorting_analyzer, unit_ids=None, periods=None, refractory_period_ms: float = 1.0, censored_period_ms: float = 0.0
+    sorting_analyzer,
+    unit_ids=None,
+    periods=None,
+    refractory_period_ms: float = 1.0,
+    censored_period_ms: float = 0.0,
+    spike_train_statistics=None,
 ):
     """
     Calculate the number of refractory period violations.
@@ -463,6 +490,9 @@ def compute_refrac_period_violations(
     censored_period_ms : float, default: 0.0
         The period (in ms) where no 2 spikes can occur (because they are not detected, or
         because they were removed by another mean).
+    spike_train_statistics : dict | None, default: None
+        Precomputed statistics from `compute_spike_train_statistics()`. If None or if they do not cover
+        the requested units and parameters, they are computed.
 
     Returns
     -------
@@ -505,6 +535,10 @@ def compute_refrac_period_violations(
 
     total_samples = compute_total_samples_per_unit(sorting_analyzer, periods=periods)
 
+    spike_train_statistics = _get_spike_train_statistics(
+        spike_train_statistics, sorting_analyzer, unit_ids, periods, refractory_period_ms=refractory_period_ms
+    )
+
     nb_violations = {}
     rp_contamination = {}
     for unit_id in unit_ids:
@@ -513,13 +547,9 @@ def compute_refrac_period_violations(
             nb_violations[unit_id] = -1
             continue
 
-        nb_violations[unit_id] = 0
+        nb_violations[unit_id] = spike_train_statistics["rp_violations_count"][unit_id]
         total_samples_unit = total_samples[unit_id]
 
-        for segment_index in range(sorting_analyzer.get_num_segments()):
-            spike_times = sorting.get_unit_spike_train(unit_id=unit_id, segment_index=segment_index)
-            nb_violations[unit_id] += _compute_rp_violations_numba(spike_times, t_c, t_r)
-
         rp_contamination[unit_id] = _compute_rp_contamination_one_unit(
             nb_violations[unit_id],
             num_spikes[unit_id],
@@ -533,13 +563,14 @@ def compute_refrac_period_violations(
 
 class RPViolation(BaseMetric):
     metric_name = "rp_violation"
-    metric_function = compute_refrac_period_violations
+    metric_function = _with_spike_train_statistics(compute_refrac_period_violations)
     metric_params = {"refractory_period_ms": 1.0, "censored_period_ms": 0.0}
     metric_columns = {"rp_contamination": float, "rp_violations": int}
     metric_descriptions = {
         "rp_contamination": "Refractory period contamination described in Llobet & Wyngaard 2022.",
         "rp_violations": "Number of refractory period violations.",
     }
+    needs_tmp_data = True
     supports_periods = True
 
 
@@ -553,6 +584,7 @@ def compute_sliding_rp_violations(
     exclude_ref_period_below_ms=0.5,
     max_ref_period_ms=10,
     contamination_values=None,
+    spike_train_statistics=None,
 ):
     """
     Compute sliding refractory period violations, a metric developed by IBL which computes
@@ -581,6 +613,9 @@ def compute_sliding_rp_violations(
         Maximum refractory period to test in ms.
     contamination_values : 1d array or None, default: None
         The contamination values to test, If None, it is set to np.arange(0.5, 35, 0.5).
+    spike_train_statistics : dict | None, default: None
+        Precomputed statistics from `compute_spike_train_statistics()`. If None or if they do not cover
+        the requested units and parameters, they are computed.
 
     Returns
     -------
@@ -600,35 +635,32 @@ def compute_sliding_rp_violations(
     if unit_ids is None:
         unit_ids = sorting_analyzer.unit_ids
 
-    fs = sorting_analyzer.sampling_frequency
-
-    contamination = {}
+    num_spikes = sorting.count_num_spikes_per_unit(unit_ids=unit_ids)
 
-    spikes, slices = sorting.to_reordered_spike_vector(
-        ["sample_index", "segment_index", "unit_index"], return_order=False
+    spike_train_statistics = _get_spike_train_statistics(
+        spike_train_statistics,
+        sorting_analyzer,
+        unit_ids,
+        periods,
+        sliding_rp_bin_size_ms=bin_size_ms,
+        sliding_rp_window_size_s=window_size_s,
+        sliding_rp_max_ref_period_ms=max_ref_period_ms,
     )
 
+    contamination = {}
     for unit_id in unit_ids:
-        unit_index = sorting.id_to_index(unit_id)
-        u0 = slices[unit_index, 0, 0]
-        u1 = slices[unit_index, -1, 1]
-        sub_spikes = spikes[u0:u1].copy()
-        sub_spikes["unit_index"] = 0  # single unit sorting
-
-        unit_n_spikes = len(sub_spikes)
+        unit_n_spikes = num_spikes[unit_id]
         if unit_n_spikes <= min_spikes:
             contamination[unit_id] = np.nan
             continue
 
         duration = total_durations[unit_id]
 
-        sub_sorting = NumpySorting(sub_spikes, fs, unit_ids=[unit_id])
-
-        contamination[unit_id] = slidingRP_violations(
-            sub_sorting,
+        contamination[unit_id] = _sliding_rp_violations_from_correlogram(
+            spike_train_statistics["sliding_rp_correlogram"][unit_id],
+            unit_n_spikes,
             duration,
             bin_size_ms,
-            window_size_s,
             exclude_ref_period_below_ms,
             max_ref_period_ms,
             contamination_values,
@@ -639,7 +671,7 @@ def compute_sliding_rp_violations(
 
 class SlidingRPViolation(BaseMetric):
     metric_name = "sliding_rp_violation"
-    metric_function = compute_sliding_rp_violations
+    metric_function = _with_spike_train_statistics(compute_sliding_rp_violations)
     metric_params = {
         "min_spikes": 0,
         "bin_size_ms": 0.25,
@@ -652,7 +684,9 @@ class SlidingRPViolation(BaseMetric):
     metric_descriptions = {
         "sliding_rp_violation": "Minimum contamination at 90% confidence using sliding refractory period method."
     }
+    needs_tmp_data = True
     supports_periods = True
+    supports_unit_parallel = True
 
 
 def compute_synchrony_metrics(sorting_analyzer, unit_ids=None, periods=None, synchrony_sizes=None):
@@ -729,9 +763,12 @@ class Synchrony(BaseMetric):
         "sync_spike_8": "Fraction of spikes that are synchronous with at least seven other spikes.",
     }
     supports_periods = True
+    population_dependency = "all"
 
 
-def compute_firing_ranges(sorting_analyzer, unit_ids=None, periods=None, bin_size_s=5, percentiles=(5, 95)):
+def compute_firing_ranges(
+    sorting_analyzer, unit_ids=None, periods=None, bin_size_s=5, percentiles=(5, 95), spike_train_statistics=None
+):
     """
     Calculate firing range, the range between the 5th and 95th percentiles of the firing rates distribution
     computed in non-overlapping time bins.
@@ -749,6 +786,9 @@ def compute_firing_ranges(sorting_analyzer, unit_ids=None, periods=None, bin_siz
         The size of the bin in seconds.
     percentiles : tuple, default: (5, 95)
         The percentiles to compute.
+    spike_train_statistics : dict | None, default: None
+        Precomputed statistics from `compute_spike_train_statistics()`. If None or if they do not cover
+        the requested units and parameters, they are computed.
 
     Returns
     -------
@@ -763,9 +803,6 @@ def compute_firing_ranges(sorting_analyzer, unit_ids=None, periods=None, bin_siz
     bin_size_samples = int(bin_size_s * sampling_frequency)
     sorting = sorting_analyzer.sorting
     sorting = sorting.select_periods(periods=periods)
-    segment_samples = [
-        sorting_analyzer.get_num_samples(segment_index) for segment_index in range(sorting_analyzer.get_num_segments())
-    ]
 
     if unit_ids is None:
         unit_ids = sorting.unit_ids
@@ -773,31 +810,13 @@ def compute_firing_ranges(sorting_analyzer, unit_ids=None, periods=None, bin_siz
     num_spikes = sorting.count_num_spikes_per_unit(unit_ids=unit_ids)
     total_samples = compute_total_samples_per_unit(sorting_analyzer, periods=periods)
 
-    # for each segment, we compute the firing rate histogram and we concatenate them
-    firing_rate_histograms = {unit_id: np.array([], dtype=float) for unit_id in unit_ids}
-    bin_edges_per_unit = compute_bin_edges_per_unit(
-        sorting,
-        segment_samples=segment_samples,
-        periods=periods,
-        bin_duration_s=bin_size_s,
+    # the firing rate histograms are computed on the spike trains concatenated across segments,
+    # since bin edges are already cumulative
+    spike_train_statistics = _get_spike_train_statistics(
+        spike_train_statistics, sorting_analyzer, unit_ids, periods, bin_durations_s=[bin_size_s]
     )
-    cumulative_segment_samples = np.cumsum([0] + segment_samples[:-1])
-    for unit_id in unit_ids:
-        if num_spikes[unit_id] == 0 or total_samples[unit_id] < bin_size_samples:
-            continue
-        bin_edges = bin_edges_per_unit[unit_id]
-
-        # we can concatenate spike trains across segments adding the cumulative number of samples
-        # as offset, since bin edges are already cumulative
-        spike_trains = []
-        for segment_index in range(sorting_analyzer.get_num_segments()):
-            spike_times = sorting.get_unit_spike_train(unit_id=unit_id, segment_index=segment_index)
-            spike_times = spike_times + cumulative_segment_samples[segment_index]
-            spike_trains.append(spike_times)
-        spike_train = np.concatenate(spike_trains, dtype="int64")
-
-        spike_counts, _ = np.histogram(spike_train, bins=bin_edges)
-        firing_rate_histograms[unit_id] = spike_counts / bin_size_s
+    binned_spike_counts = spike_train_statistics["binned_spike_counts"][bin_size_s]
+    firing_rate_histograms = {unit_id: binned_spike_counts[unit_id] / bin_size_s for unit_id in unit_ids}
 
     # finally we compute the percentiles
     firing_ranges = {}
@@ -821,13 +840,15 @@ def compute_firing_ranges(sorting_analyzer, unit_ids=None, periods=None, bin_siz
 
 class FiringRange(BaseMetric):
     metric_name = "firing_range"
-    metric_function = compute_firing_ranges
+    metric_function = _with_spike_train_statistics(compute_firing_ranges)
     metric_params = {"bin_size_s": 5, "percentiles": (5, 95)}
     metric_columns = {"firing_range": float}
     metric_descriptions = {
         "firing_range": "Range between the percentiles (default: 5th and 95th) of the firing rates distribution."
     }
+    needs_tmp_data = True
     supports_periods = True
+    supports_unit_parallel = True
 
 
 def compute_amplitude_cv_metrics(
@@ -946,6 +967,7 @@ class AmplitudeCV(BaseMetric):
     }
     supports_periods = True
     depend_on = ["spike_amplitudes|amplitude_scalings"]
+    supports_unit_parallel = True
 
 
 def compute_amplitude_cutoffs(
@@ -1044,6 +1066,7 @@ class AmplitudeCutoff(BaseMetric):
     }
     supports_periods = True
     depend_on = ["spike_amplitudes|amplitude_scalings"]
+    supports_unit_parallel = True
 
 
 def compute_amplitude_medians(sorting_analyzer, unit_ids=None, periods=None):
@@ -1091,6 +1114,7 @@ class AmplitudeMedian(BaseMetric):
     metric_descriptions = {"amplitude_median": "Median of the amplitude distributions for each unit in µV."}
     supports_periods = True
     depend_on = ["spike_amplitudes"]
+    supports_unit_parallel = True
 
 
 def compute_noise_cutoffs(
@@ -1177,6 +1201,7 @@ class NoiseCutoff(BaseMetric):
     }
     supports_periods = True
     depend_on = ["spike_amplitudes|amplitude_scalings"]
+    supports_unit_parallel = True
 
 
 def compute_drift_metrics(
@@ -1189,6 +1214,7 @@ def compute_drift_metrics(
     min_fraction_valid_intervals=0.5,
     min_num_bins=2,
     return_positions=False,
+    locations_chunk_size=None,
 ):
     """
     Compute drifts metrics using estimated spike locations.
@@ -1228,6 +1254,10 @@ def compute_drift_metrics(
         less bins, the metric values are set to NaN.
     return_positions : bool, default: False
         If True, median positions are returned (for debugging).
+    locations_chunk_size : int | None, default: None
+        If not None, the spike locations are read by chunks of this number of spikes and only the
+        `direction` coordinate is kept in memory. This is useful when the "spike_locations" extension
+        is memory-mapped (e.g. loaded with `backend_options=dict(lazy=True)`).
 
     Returns
     -------
@@ -1237,13 +1267,16 @@ def compute_drift_metrics(
         The drift signal standard deviation in µm.
     drift_mad : dict
         The drift signal median absolute deviation in µm.
-    median_positions : np.array (optional)
-        The median positions of each unit over time (only returned if return_positions=True).
+    median_positions : dict (optional)
+        The median positions of each unit in each interval (only returned if return_positions=True).
 
     Notes
     -----
     For multi-segment object, segments are concatenated before the computation. This means that if
     there are large displacements in between segments, the resulting metric values will be very high.
+
+    The median positions of all units and intervals are computed at once with a single sort of the
+    spike positions grouped by interval.
     """
     check_has_required_extensions("drift", sorting_analyzer)
     res = namedtuple("drift_metrics", ["drift_ptp", "drift_std", "drift_mad"])
@@ -1251,60 +1284,84 @@ def compute_drift_metrics(
     sorting = sorting.select_periods(periods=periods)
     if unit_ids is None:
         unit_ids = sorting.unit_ids
+    num_units = len(unit_ids)
+    num_segments = sorting_analyzer.get_num_segments()
 
     spike_locations_ext = sorting_analyzer.get_extension("spike_locations")
-    spike_locations_by_unit_and_segments = spike_locations_ext.get_data(
-        outputs="by_unit", concatenated=False, periods=periods
+    spike_locations = spike_locations_ext.get_data(outputs="numpy", copy=False)
+    assert direction in spike_locations.dtype.names, (
+        f"Direction {direction} is invalid. Available directions: " f"{spike_locations.dtype.names}"
     )
-    spike_locations_by_unit = spike_locations_ext.get_data(outputs="by_unit", concatenated=True, periods=periods)
 
-    segment_samples = [sorting_analyzer.get_num_samples(i) for i in range(sorting_analyzer.get_num_segments())]
-    data = spike_locations_by_unit[unit_ids[0]]
-    assert direction in data.dtype.names, (
-        f"Direction {direction} is invalid. Available directions: " f"{data.dtype.names}"
-    )
+    # spike positions along the direction, restricted to the periods
+    spikes = sorting_analyzer.sorting.to_spike_vector()
+    keep_mask = select_sorting_periods_mask(sorting_analyzer.sorting, periods) if periods is not None else None
+    positions = _get_spike_positions(spike_locations, direction, keep_mask, locations_chunk_size)
+    if keep_mask is not None:
+        spikes = spikes[keep_mask]
+
+    # keep only the spikes of the requested units, with unit indices relative to unit_ids
+    unit_map = np.full(sorting_analyzer.get_num_units(), -1, dtype="int64")
+    unit_map[sorting_analyzer.sorting.ids_to_indices(unit_ids)] = np.arange(num_units)
+    spike_unit_indices = unit_map[spikes["unit_index"]]
+    spike_mask = spike_unit_indices >= 0
+    spike_unit_indices = spike_unit_indices[spike_mask]
+    spike_segment_indices = spikes["segment_index"][spike_mask].astype("int64")
+    spike_sample_indices = spikes["sample_index"][spike_mask].astype("int64")
+    positions = positions[spike_mask]
+
+    # reference positions are the medians across segments
+    reference_positions = _compute_grouped_medians(spike_unit_indices, positions, num_units)
+
+    # the bin edges of all units and segments are flattened and made strictly increasing by
+    # offsetting them with the (unit, segment) group index
+    segment_samples = [sorting_analyzer.get_num_samples(i) for i in range(num_segments)]
     bin_edges_for_units = compute_bin_edges_per_unit(
         sorting, segment_samples=segment_samples, periods=periods, bin_duration_s=interval_s, concatenated=False
     )
+    group_stride = int(max(segment_samples)) + 2
     failed_units = []
+    flat_bin_edges = []
+    bin_edges_group = []
+    for i, unit_id in enumerate(unit_ids):
+        for segment_index in range(num_segments):
+            bins = np.asarray(bin_edges_for_units[unit_id][segment_index], dtype="int64")
+            if (len(bins) - 1) < min_num_bins and unit_id not in failed_units:
+                failed_units.append(unit_id)
+            group_index = i * num_segments + segment_index
+            flat_bin_edges.append(bins + group_index * group_stride)
+            bin_edges_group.append(np.full(len(bins), group_index, dtype="int64"))
+    flat_bin_edges = np.concatenate(flat_bin_edges)
+    bin_edges_group = np.concatenate(bin_edges_group)
+    # a bin is identified by its left edge, so the last edge of each group does not start a bin
+    is_bin_start = np.ones(flat_bin_edges.size, dtype=bool)
+    is_bin_start[:-1] = bin_edges_group[1:] == bin_edges_group[:-1]
+    is_bin_start[-1:] = False
+
+    spike_group = spike_unit_indices * num_segments + spike_segment_indices
+    spike_bins = np.searchsorted(flat_bin_edges, spike_group * group_stride + spike_sample_indices, side="right") - 1
+    valid = spike_bins >= 0
+    valid[valid] = (bin_edges_group[spike_bins[valid]] == spike_group[valid]) & is_bin_start[spike_bins[valid]]
+    median_positions_all_bins = _compute_grouped_medians(
+        spike_bins[valid], positions[valid], flat_bin_edges.size, min_count=min_spikes_per_interval
+    )
+    bin_unit_indices = bin_edges_group[is_bin_start] // num_segments
+    median_positions_all_bins = median_positions_all_bins[is_bin_start]
 
-    # we need
+    # finally, compute deviations and drifts
     drift_ptps = {}
     drift_stds = {}
     drift_mads = {}
-
-    # reference positions are the medians across segments
-    reference_positions = {}
-    median_position_segments = {unit_id: np.array([]) for unit_id in unit_ids}
-
-    for unit_id in unit_ids:
-        reference_positions[unit_id] = np.median(spike_locations_by_unit[unit_id][direction])
-
-    for segment_index in range(sorting_analyzer.get_num_segments()):
-        for unit_id in unit_ids:
-            bins = bin_edges_for_units[unit_id][segment_index]
-            num_bin_edges = len(bins)
-            if (num_bin_edges - 1) < min_num_bins:
-                failed_units.append(unit_id)
-                continue
-            median_positions = np.nan * np.zeros((num_bin_edges - 1))
-            spikes_in_segment_of_unit = sorting.get_unit_spike_train(unit_id, segment_index)
-            bounds = np.searchsorted(spikes_in_segment_of_unit, bins, side="left")
-            for bin_index, (i0, i1) in enumerate(zip(bounds[:-1], bounds[1:])):
-                spike_locations_in_bin = spike_locations_by_unit_and_segments[segment_index][unit_id][i0:i1][direction]
-                if (i1 - i0) >= min_spikes_per_interval:
-                    median_positions[bin_index] = np.median(spike_locations_in_bin)
-            median_position_segments[unit_id] = np.concatenate((median_position_segments[unit_id], median_positions))
-
-    # finally, compute deviations and drifts
-    for unit_id in unit_ids:
+    median_position_segments = {}
+    for i, unit_id in enumerate(unit_ids):
+        median_position_segments[unit_id] = median_positions_all_bins[bin_unit_indices == i]
         # Skip units that already failed because not enough bins in at least one segment
         if unit_id in failed_units:
             drift_ptps[unit_id] = np.nan
             drift_stds[unit_id] = np.nan
             drift_mads[unit_id] = np.nan
             continue
-        position_diff = median_position_segments[unit_id] - reference_positions[unit_id]
+        position_diff = median_position_segments[unit_id] - reference_positions[i]
         # deal with nans: if more than 50% nans (default) --> set to nan
         if np.sum(np.isnan(position_diff)) > min_fraction_valid_intervals * len(position_diff):
             ptp_drift = np.nan
@@ -1326,7 +1383,7 @@ def compute_drift_metrics(
         )
 
     if return_positions:
-        outs = res(drift_ptps, drift_stds, drift_mads), median_positions
+        outs = res(drift_ptps, drift_stds, drift_mads), median_position_segments
     else:
         outs = res(drift_ptps, drift_stds, drift_mads)
     return outs
@@ -1340,6 +1397,7 @@ class Drift(BaseMetric):
         "min_spikes_per_interval": 100,
         "direction": "y",
         "min_num_bins": 2,
+        "locations_chunk_size": None,
     }
     metric_columns = {"drift_ptp": float, "drift_std": float, "drift_mad": float}
     metric_descriptions = {
@@ -1349,6 +1407,7 @@ class Drift(BaseMetric):
     }
     supports_periods = True
     depend_on = ["spike_locations"]
+    supports_unit_parallel = True
 
 
 def compute_sd_ratio(
@@ -1545,6 +1604,231 @@ def check_has_required_extensions(metric_name, sorting_analyzer):
 
 
 ### LOW-LEVEL FUNCTIONS ###
+def compute_spike_train_statistics(
+    sorting_analyzer,
+    unit_ids=None,
+    periods=None,
+    isi_threshold_ms=None,
+    refractory_period_ms=None,
+    sliding_rp_bin_size_ms=None,
+    sliding_rp_window_size_s=1,
+    sliding_rp_max_ref_period_ms=10,
+    bin_durations_s=None,
+):
+    """
+    Compute the spike train statistics shared by the ISI, refractory period, sliding refractory period,
+    presence ratio and firing range metrics.
+
+    The spike vector reordered by unit is walked once: for each unit and segment, the inter-spike intervals,
+    the refractory period violations, the short-lag autocorrelogram and the binned spike counts are computed
+    in the same (compiled, if numba is installed) pass.
+
+    Parameters
+    ----------
+    sorting_analyzer : SortingAnalyzer
+        A SortingAnalyzer object.
+    unit_ids : list or None, default: None
+        List of unit ids to compute the statistics for. If None, all units are used.
+    periods : array of unit_period_dtype | None, default: None
+        Periods (segment_index, start_sample_index, end_sample_index, unit_index)
+        on which to compute the statistics. If None, the entire recording duration is used.
+    isi_threshold_ms : float | None, default: None
+        Threshold for counting ISI violations (as in `compute_isi_violations`). If None, ISI violations are not counted.
+    refractory_period_ms : float | None, default: None
+        Refractory period for counting violations (as in `compute_refrac_period_violations`).
+        If None, refractory period violations are not counted.
+    sliding_rp_bin_size_ms : float | None, default: None
+        Bin size of the autocorrelogram used by `compute_sliding_rp_violations`. If None, it is not computed.
+    sliding_rp_window_size_s : float, default: 1
+        Window of the autocorrelogram used by `compute_sliding_rp_violations`.
+    sliding_rp_max_ref_period_ms : float, default: 10
+        Maximum refractory period tested by `compute_sliding_rp_violations`.
+    bin_durations_s : list of float | None, default: None
+        Bin durations for which the spike counts per bin are computed (as in `compute_presence_ratios`
+        and `compute_firing_ranges`).
+
+    Returns
+    -------
+    spike_train_statistics : dict
+        Dictionary with the parameters used ("params") and, for each computed statistic, a dictionary
+        with unit ids as keys: "num_spikes", "isi_violations_count", "rp_violations_count",
+        "sliding_rp_correlogram" (positive lags of the autocorrelogram) and "binned_spike_counts"
+        (a dictionary with bin durations as keys).
+    """
+    sorting = sorting_analyzer.sorting
+    sorting = sorting.select_periods(periods=periods)
+    if unit_ids is None:
+        unit_ids = sorting_analyzer.unit_ids
+    unit_ids = list(unit_ids)
+    bin_durations_s = [] if bin_durations_s is None else list(bin_durations_s)
+
+    fs = sorting_analyzer.sampling_frequency
+    num_segs = sorting_analyzer.get_num_segments()
+    segment_samples = [sorting_analyzer.get_num_samples(segment_index) for segment_index in range(num_segs)]
+    segment_offsets = np.cumsum([0] + segment_samples[:-1]).astype("int64")
+
+    spikes, slices = sorting.to_reordered_spike_vector(
+        ["sample_index", "segment_index", "unit_index"], return_order=False
+    )
+    sample_indices = spikes["sample_index"].astype("int64", copy=False)
+    unit_indices = sorting.ids_to_indices(unit_ids)
+    unit_slices = slices[unit_indices].astype("int64")
+    num_units = len(unit_ids)
+
+    isi_threshold_s = isi_threshold_ms / 1000 if isi_threshold_ms is not None else -1.0
+    t_r = int(round(refractory_period_ms * fs * 1e-3)) if refractory_period_ms is not None else -1
+
+    if sliding_rp_bin_size_ms is not None:
+        # same lag bins as the autocorrelogram used in `slidingRP_violations()`
+        acg_bin_size = max(int(sliding_rp_bin_size_ms / 1000 * fs), 1)
+        acg_num_bins = np.arange(0, sliding_rp_max_ref_period_ms / 1000, sliding_rp_bin_size_ms / 1000).size
+        acg_max_lag = min(int(sliding_rp_window_size_s * fs), acg_num_bins * acg_bin_size)
+    else:
+        acg_bin_size, acg_num_bins, acg_max_lag = 1, 0, 0
+
+    # bin edges of all units and bin durations are flattened with start/stop slices
+    bin_edges = []
+    bin_edges_slices = np.zeros((len(bin_durations_s), num_units, 2), dtype="int64")
+    num_edges = 0
+    for b, bin_duration_s in enumerate(bin_durations_s):
+        bin_edges_per_unit = compute_bin_edges_per_unit(
+            sorting,
+            segment_samples=segment_samples,
+            periods=periods,
+            bin_duration_s=bin_duration_s,
+        )
+        for i, unit_id in enumerate(unit_ids):
+            edges = np.asarray(bin_edges_per_unit[unit_id], dtype="int64")
+            bin_edges.append(edges)
+            bin_edges_slices[b, i] = num_edges, num_edges + edges.size
+            num_edges += edges.size
+    bin_edges = np.concatenate(bin_edges) if len(bin_edges) > 0 else np.zeros(0, dtype="int64")
+
+    isi_counts = np.zeros(num_units, dtype="int64")
+    rp_counts = np.zeros(num_units, dtype="int64")
+    acg_counts = np.zeros((num_units, acg_num_bins), dtype="int64")
+    binned_counts = np.zeros(bin_edges.size, dtype="int64")
+
+    if HAVE_NUMBA:
+        kernel = _compute_spike_train_statistics_numba
+    else:
+        kernel = _compute_spike_train_statistics_numpy
+    kernel(
+        sample_indices,
+        unit_slices,
+        segment_offsets,
+        float(fs),
+        isi_threshold_s,
+        t_r,
+        acg_bin_size,
+        acg_num_bins,
+        acg_max_lag,
+        bin_edges,
+        bin_edges_slices,
+        isi_counts,
+        rp_counts,
+        acg_counts,
+        binned_counts,
+    )
+
+    num_spikes = np.sum(unit_slices[:, :, 1] - unit_slices[:, :, 0], axis=1)
+    spike_train_statistics = dict(
+        params=dict(
+            unit_ids=unit_ids,
+            isi_threshold_ms=isi_threshold_ms,
+            refractory_period_ms=refractory_period_ms,
+            sliding_rp_bin_size_ms=sliding_rp_bin_size_ms,
+            sliding_rp_window_size_s=sliding_rp_window_size_s,
+            sliding_rp_max_ref_period_ms=sliding_rp_max_ref_period_ms,
+            bin_durations_s=bin_durations_s,
+        ),
+        num_spikes=dict(zip(unit_ids, num_spikes.tolist())),
+    )
+    if isi_threshold_ms is not None:
+        spike_train_statistics["isi_violations_count"] = dict(zip(unit_ids, isi_counts.tolist()))
+    if refractory_period_ms is not None:
+        spike_train_statistics["rp_violations_count"] = dict(zip(unit_ids, rp_counts.tolist()))
+    if sliding_rp_bin_size_ms is not None:
+        spike_train_statistics["sliding_rp_correlogram"] = dict(zip(unit_ids, acg_counts))
+    spike_train_statistics["binned_spike_counts"] = {}
+    for b, bin_duration_s in enumerate(bin_durations_s):
+        spike_train_statistics["binned_spike_counts"][bin_duration_s] = {
+            unit_id: binned_counts[e0 : max(e1 - 1, e0)] for unit_id, (e0, e1) in zip(unit_ids, bin_edges_slices[b])
+        }
+
+    return spike_train_statistics
+
+
+def _get_spike_train_statistics(spike_train_statistics, sorting_analyzer, unit_ids, periods, **params):
+    """
+    Return the precomputed `spike_train_statistics` if they cover the units and parameters
+    requested, otherwise compute them with `compute_spike_train_statistics()`.
+    """
+    if spike_train_statistics is not None:
+        computed_params = spike_train_statistics["params"]
+        covered = all(unit_id in spike_train_statistics["num_spikes"] for unit_id in unit_ids)
+        for param_name, value in params.items():
+            if param_name == "bin_durations_s":
+                covered = covered and all(b in computed_params["bin_durations_s"] for b in value)
+            elif param_name.startswith("sliding_rp"):
+                covered = covered and computed_params[param_name] == value
+            else:
+                covered = covered and value is not None and computed_params[param_name] == value
+        if covered:
+            return spike_train_statistics
+    return compute_spike_train_statistics(sorting_analyzer, unit_ids=unit_ids, periods=periods, **params)
+
+
+def _compute_spike_train_statistics_numpy(
+    sample_indices,
+    unit_slices,
+    segment_offsets,
+    sampling_frequency,
+    isi_threshold_s,
+    t_r,
+    acg_bin_size,
+    acg_num_bins,
+    acg_max_lag,
+    bin_edges,
+    bin_edges_slices,
+    isi_counts,
+    rp_counts,
+    acg_counts,
+    binned_counts,
+):
+    """
+    Numpy version of `_compute_spike_train_statistics_numba()`, used when numba is not installed.
+    The counts are filled in-place.
+    """
+    acg_lags = np.minimum(np.arange(acg_num_bins + 1) * acg_bin_size, acg_max_lag)
+    for u in range(unit_slices.shape[0]):
+        spike_trains = []
+        for seg_index in range(unit_slices.shape[1]):
+            s0, s1 = unit_slices[u, seg_index]
+            spike_train = sample_indices[s0:s1]
+            spike_trains.append(spike_train + segment_offsets[seg_index])
+            if spike_train.size == 0:
+                continue
+            arange = np.arange(spike_train.size)
+            if isi_threshold_s >= 0:
+                isi_counts[u] += np.sum(np.diff(spike_train / sampling_frequency) < isi_threshold_s)
+            if t_r >= 0:
+                rp_counts[u] += np.sum(np.searchsorted(spike_train, spike_train + t_r, side="right") - arange - 1)
+            if acg_num_bins > 0:
+                # number of (ordered) pairs with a lag below each bin edge, the zero lags are counted twice
+                num_pairs = [0] + [
+                    np.sum(np.searchsorted(spike_train, spike_train + lag, side="left") - arange - 1)
+                    for lag in acg_lags[1:]
+                ]
+                acg_counts[u] += np.diff(num_pairs)
+                acg_counts[u, 0] += np.sum(np.searchsorted(spike_train, spike_train, side="right") - arange - 1)
+        spike_train = np.concatenate(spike_trains)
+        for b in range(bin_edges_slices.shape[0]):
+            e0, e1 = bin_edges_slices[b, u]
+            if e1 - e0 >= 2:
+                binned_counts[e0 : e1 - 1] = np.histogram(spike_train, bins=bin_edges[e0:e1])[0]
+
+
 def presence_ratio(spike_train, bin_edges=None, num_bin_edges=None, bin_n_spikes_thres=0):
     """
     Calculate the presence ratio for a single unit.
@@ -1579,6 +1863,51 @@ def presence_ratio(spike_train, bin_edges=None, num_bin_edges=None, bin_n_spikes
     return np.sum(h > bin_n_spikes_thres) / (num_bin_edges - 1)
 
 
+def _get_spike_positions(spike_locations, direction, keep_mask=None, chunk_size=None):
+    """
+    Get the spike positions along `direction` as a float array, optionally restricted to `keep_mask`.
+
+    If `chunk_size` is given, `spike_locations` (which can be a memmap) is read by chunks so that
+    only the `direction` coordinate of the kept spikes is loaded in memory.
+    """
+    num_spikes = spike_locations.shape[0]
+    if chunk_size is None:
+        chunk_size = max(num_spikes, 1)
+    positions = []
+    for i0 in range(0, num_spikes, chunk_size):
+        i1 = min(i0 + chunk_size, num_spikes)
+        positions_chunk = np.asarray(spike_locations[i0:i1][direction], dtype="float64")
+        if keep_mask is not None:
+            positions_chunk = positions_chunk[keep_mask[i0:i1]]
+        positions.append(positions_chunk)
+    if len(positions) == 0:
+        return np.zeros(0, dtype="float64")
+    return np.concatenate(positions)
+
+
+def _compute_grouped_medians(group_indices, values, num_groups, min_count=1):
+    """
+    Compute the median of `values` for each group with a single sort over (group, value).
+
+    Groups with less than `min_count` values are set to NaN. As for `np.median`, groups containing
+    NaN values are set to NaN.
+    """
+    order = np.lexsort((values, group_indices))
+    sorted_values = values[order]
+    counts = np.bincount(group_indices, minlength=num_groups)
+    starts = np.cumsum(counts) - counts
+
+    medians = np.full(num_groups, np.nan)
+    valid = counts >= max(min_count, 1)
+    low = starts[valid] + (counts[valid] - 1) // 2
+    high = starts[valid] + counts[valid] // 2
+    medians[valid] = (sorted_values[low] + sorted_values[high]) / 2
+
+    num_nans = np.bincount(group_indices, weights=np.isnan(values), minlength=num_groups)
+    medians[num_nans > 0] = np.nan
+    return medians
+
+
 def isi_violations(spike_trains, total_duration_s, isi_threshold_s=0.0015, min_isi_s=0):
     """
     Calculate Inter-Spike Interval (ISI) violations.
@@ -1729,15 +2058,8 @@ def slidingRP_violations(
     min_cont_with_90_confidence : dict of floats
         The minimum contamination with confidence > 90%.
     """
-    if contamination_values is None:
-        contamination_values = np.arange(0.5, 35, 0.5) / 100  # vector of contamination values to test
-    rp_bin_size = bin_size_ms / 1000
-    rp_edges = np.arange(0, max_ref_period_ms / 1000, rp_bin_size)  # in s
-    rp_centers = rp_edges + ((rp_edges[1] - rp_edges[0]) / 2)  # vector of refractory period durations to test
-
-    # compute firing rate and spike count (concatenate for multi-segments)
+    # compute spike count (concatenate for multi-segments)
     n_spikes = len(sorting.to_spike_vector())
-    firing_rate = n_spikes / duration
 
     method = "numba" if HAVE_NUMBA else "numpy"
 
@@ -1758,6 +2080,41 @@ def slidingRP_violations(
     # correlogram = compute_correlograms(sorting, 2*window_size_s*1000, bin_size_ms, method=method)[0][0, 0]
     correlogram_positive = correlogram[len(correlogram) // 2 :]
 
+    return _sliding_rp_violations_from_correlogram(
+        correlogram_positive,
+        n_spikes,
+        duration,
+        bin_size_ms,
+        exclude_ref_period_below_ms,
+        max_ref_period_ms,
+        contamination_values,
+        return_conf_matrix,
+    )
+
+
+def _sliding_rp_violations_from_correlogram(
+    correlogram_positive,
+    n_spikes,
+    duration,
+    bin_size_ms=0.25,
+    exclude_ref_period_below_ms=0.5,
+    max_ref_period_ms=10,
+    contamination_values=None,
+    return_conf_matrix=False,
+):
+    """
+    Compute the sliding refractory period contamination from the positive lags of the autocorrelogram.
+
+    See `slidingRP_violations()` for the documentation of the parameters.
+    """
+    if contamination_values is None:
+        contamination_values = np.arange(0.5, 35, 0.5) / 100  # vector of contamination values to test
+    rp_bin_size = bin_size_ms / 1000
+    rp_edges = np.arange(0, max_ref_period_ms / 1000, rp_bin_size)  # in s
+    rp_centers = rp_edges + ((rp_edges[1] - rp_edges[0]) / 2)  # vector of refractory period durations to test
+
+    firing_rate = n_spikes / duration
+
     conf_matrix = _compute_violations(
         np.cumsum(correlogram_positive[0 : rp_centers.size])[np.newaxis, :],
         firing_rate,
@@ -1998,3 +2355,65 @@ if HAVE_NUMBA:
     def _compute_rp_violations_numba(spike_train, t_c, t_r):
 
         return _compute_nb_violations_numba(spike_train, t_r)
+
+    @numba.jit(nopython=True, nogil=True, cache=False)
+    def _compute_spike_train_statistics_numba(
+        sample_indices,
+        unit_slices,
+        segment_offsets,
+        sampling_frequency,
+        isi_threshold_s,
+        t_r,
+        acg_bin_size,
+        acg_num_bins,
+        acg_max_lag,
+        bin_edges,
+        bin_edges_slices,
+        isi_counts,
+        rp_counts,
+        acg_counts,
+        binned_counts,
+    ):
+        """
+        Walk the spike trains of all units once and fill in-place the ISI violation counts,
+        the refractory period violation counts, the positive lags of the autocorrelogram
+        and the spike counts per bin.
+        """
+        max_lag = max(t_r + 1, acg_max_lag)
+        num_units, num_segments, _ = unit_slices.shape
+        num_binnings = bin_edges_slices.shape[0]
+        for u in range(num_units):
+            for seg_index in range(num_segments):
+                s0 = unit_slices[u, seg_index, 0]
+                s1 = unit_slices[u, seg_index, 1]
+                for i in range(s0, s1):
+                    t_i = sample_indices[i]
+                    if isi_threshold_s >= 0 and i > s0:
+                        if t_i / sampling_frequency - sample_indices[i - 1] / sampling_frequency < isi_threshold_s:
+                            isi_counts[u] += 1
+                    for j in range(i + 1, s1):
+                        diff = sample_indices[j] - t_i
+                        if diff >= max_lag:
+                            break
+                        if diff <= t_r:
+                            rp_counts[u] += 1
+                        if diff < acg_max_lag:
+                            # the correlogram counts ordered pairs, so zero lags are counted twice
+                            acg_counts[u, diff // acg_bin_size] += 2 if diff == 0 else 1
+
+            # spike counts per bin on the spike train concatenated across segments
+            for b in range(num_binnings):
+                e0 = bin_edges_slices[b, u, 0]
+                e1 = bin_edges_slices[b, u, 1]
+                num_bins = e1 - e0 - 1
+                if num_bins < 1:
+                    continue
+                k = 0
+                for seg_index in range(num_segments):
+                    for i in range(unit_slices[u, seg_index, 0], unit_slices[u, seg_index, 1]):
+                        t = sample_indices[i] + segment_offsets[seg_index]
+                        if t < bin_edges[e0] or t > bin_edges[e1 - 1]:
+                            continue
+                        while k < num_bins - 1 and t >= bin_edges[e0 + k + 1]:
+                            k += 1
+                        binned_counts[e0 + k] += 1
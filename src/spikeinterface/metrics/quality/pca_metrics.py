@@ -2,17 +2,14 @@
 
 import warnings
 from collections import namedtuple
-from pathlib import Path
 import numpy as np
 
 # Parallel processing
-import platform
-import multiprocessing as mp
-from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
 
 
 from spikeinterface.core.analyzer_extension_core import BaseMetric
-from spikeinterface.core import get_random_data_chunks, compute_sparsity, load
+from spikeinterface.core import get_random_data_chunks, compute_sparsity
 from spikeinterface.metrics.spiketrain.metrics import compute_num_spikes, compute_firing_rates
 
 
@@ -53,6 +50,8 @@ class Mahalanobis(BaseMetric):
     depend_on = ["principal_components"]
     needs_tmp_data = True
     deprecated_names = ["l_ratio", "isolation_distance"]
+    supports_unit_parallel = True
+    population_dependency = "neighbors"
 
 
 def _d_prime_metric_function(sorting_analyzer, unit_ids, tmp_data, **metric_params):
@@ -87,6 +86,7 @@ class DPrime(BaseMetric):
     metric_descriptions = {"d_prime": "D-prime metric based on Linear Discriminant Analysis in PCA space."}
     depend_on = ["principal_components"]
     needs_tmp_data = True
+    population_dependency = "neighbors"
 
 
 def _nn_one_unit(args):
@@ -101,25 +101,33 @@ def _nn_one_unit(args):
     return unit_id, nn_hit_rate, nn_miss_rate
 
 
-def _nearest_neighbor_metric_function(sorting_analyzer, unit_ids, tmp_data, **metric_params):
+def _nearest_neighbor_metric_function(sorting_analyzer, unit_ids, tmp_data, job_kwargs, **metric_params):
     nn_result = namedtuple("NearestNeighborResult", ["nn_hit_rate", "nn_miss_rate"])
 
-    # Use pre-computed PCA data
-    pca_data_per_unit = tmp_data["pca_data_per_unit"]
+    n_jobs = job_kwargs.get("n_jobs", 1)
 
     nn_hit_rate_dict = {}
     nn_miss_rate_dict = {}
 
-    for unit_id in unit_ids:
-        pcs_flat = pca_data_per_unit[unit_id]["pcs_flat"]
-        labels = pca_data_per_unit[unit_id]["labels"]
+    # when all units share the same PC space, a single pre-computed index is queried
+    nn_index = tmp_data.get("nn_index", None)
+    if nn_index is not None:
+        nn_hit_rate_dict, nn_miss_rate_dict = nearest_neighbors_metrics_from_index(nn_index, unit_ids, n_jobs=n_jobs)
+        return nn_result(nn_hit_rate=nn_hit_rate_dict, nn_miss_rate=nn_miss_rate_dict)
 
-        try:
-            nn_hit_rate, nn_miss_rate = nearest_neighbors_metrics(pcs_flat, labels, unit_id, **metric_params)
-        except:
-            nn_hit_rate = np.nan
-            nn_miss_rate = np.nan
+    # otherwise each unit has its own neighborhood and units are processed in parallel threads
+    pca_data_per_unit = tmp_data["pca_data_per_unit"]
+    args_list = [
+        (unit_id, pca_data_per_unit[unit_id]["pcs_flat"], pca_data_per_unit[unit_id]["labels"], metric_params)
+        for unit_id in unit_ids
+    ]
+    if n_jobs == 1:
+        results = [_nn_one_unit(args) for args in args_list]
+    else:
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            results = list(executor.map(_nn_one_unit, args_list))
 
+    for unit_id, nn_hit_rate, nn_miss_rate in results:
         nn_hit_rate_dict[unit_id] = nn_hit_rate
         nn_miss_rate_dict[unit_id] = nn_miss_rate
 
@@ -137,14 +145,12 @@ class NearestNeighbor(BaseMetric):
     }
     depend_on = ["principal_components"]
     needs_tmp_data = True
+    needs_job_kwargs = True
+    population_dependency = "neighbors"
 
 
 def _nn_advanced_one_unit(args):
-    unit_id, sorting_analyzer_or_folder, n_spikes_all_units, fr_all_units, metric_params, seed = args
-    if isinstance(sorting_analyzer_or_folder, (str, Path)):
-        sorting_analyzer = load(sorting_analyzer_or_folder)
-    else:
-        sorting_analyzer = sorting_analyzer_or_folder
+    unit_id, sorting_analyzer, n_spikes_all_units, fr_all_units, sparsity, metric_params, seed = args
 
     nn_isolation_params = {
         k: v
@@ -174,6 +180,7 @@ def _nn_advanced_one_unit(args):
             unit_id,
             n_spikes_all_units=n_spikes_all_units,
             fr_all_units=fr_all_units,
+            sparsity=sparsity,
             seed=seed,
             **nn_isolation_params,
         )
@@ -187,6 +194,7 @@ def _nn_advanced_one_unit(args):
             unit_id,
             n_spikes_all_units=n_spikes_all_units,
             fr_all_units=fr_all_units,
+            sparsity=sparsity,
             seed=seed,
             **nn_noise_params,
         )
@@ -202,64 +210,41 @@ def _nn_advanced_metric_function(sorting_analyzer, unit_ids, tmp_data, job_kwarg
     # Use pre-computed data
     n_spikes_all_units = tmp_data["n_spikes_all_units"]
     fr_all_units = tmp_data["fr_all_units"]
+    sparsity = tmp_data.get("nn_advanced_sparsity", None)
 
     # Extract job parameters
     n_jobs = job_kwargs.get("n_jobs", 1)
     progress_bar = False
-    mp_context = job_kwargs.get("mp_context", None)
     seed = metric_params.get("seed", None)
 
-    if sorting_analyzer.format == "memory" and n_jobs > 1:
-        warnings.warn(
-            "Computing 'nn_advanced' metric in parallel with a SortingAnalyzer in memory is not supported. "
-            "Falling back to n_jobs=1."
-        )
-        n_jobs = 1
-
     nn_isolation_dict = {}
-    nn_unit_id_dict = {}
     nn_noise_overlap_dict = {}
 
+    # units are processed in threads sharing the same SortingAnalyzer, so there is no need
+    # to save the analyzer and to reload it in every worker
+    args_list = [
+        (unit_id, sorting_analyzer, n_spikes_all_units, fr_all_units, sparsity, metric_params, seed)
+        for unit_id in unit_ids
+    ]
     if n_jobs == 1:
-        # Sequential processing
-        units_loop = unit_ids
+        results = map(_nn_advanced_one_unit, args_list)
         if progress_bar:
             from tqdm.auto import tqdm
 
-            units_loop = tqdm(units_loop, desc="Advanced NN metrics")
-
-        for unit_id in units_loop:
-            _, nn_isolation, nn_unit_id, nn_noise_overlap = _nn_advanced_one_unit(
-                (unit_id, sorting_analyzer, n_spikes_all_units, fr_all_units, metric_params, seed)
-            )
-            nn_isolation_dict[unit_id] = nn_isolation
-            nn_noise_overlap_dict[unit_id] = nn_noise_overlap
+            results = tqdm(results, total=len(unit_ids), desc="Advanced NN metrics")
+        results = list(results)
     else:
-        if mp_context is not None and platform.system() == "Windows":
-            assert mp_context != "fork", "'fork' mp_context not supported on Windows!"
-        elif mp_context == "fork" and platform.system() == "Darwin":
-            warnings.warn('As of Python 3.8 "fork" is no longer considered safe on macOS')
-
-        # Prepare arguments
-        # If we got here, we are sure the sorting_analyzer is saved on disk
-        args_list = []
-        for unit_id in unit_ids:
-            args_list.append((unit_id, sorting_analyzer.folder, n_spikes_all_units, fr_all_units, metric_params, seed))
-
-        with ProcessPoolExecutor(
-            max_workers=n_jobs,
-            mp_context=mp.get_context(mp_context) if mp_context else None,
-        ) as executor:
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
             results = executor.map(_nn_advanced_one_unit, args_list)
             if progress_bar:
                 from tqdm.auto import tqdm
 
                 results = tqdm(results, total=len(unit_ids), desc="Advanced NN metrics")
+            results = list(results)
 
-            for unit_id, nn_isolation, nn_unit_id, nn_noise_overlap in results:
-                nn_isolation_dict[unit_id] = nn_isolation
-                nn_unit_id_dict[unit_id] = nn_unit_id
-                nn_noise_overlap_dict[unit_id] = nn_noise_overlap
+    for unit_id, nn_isolation, nn_unit_id, nn_noise_overlap in results:
+        nn_isolation_dict[unit_id] = nn_isolation
+        nn_noise_overlap_dict[unit_id] = nn_noise_overlap
 
     return nn_advanced_result(nn_isolation=nn_isolation_dict, nn_noise_overlap=nn_noise_overlap_dict)
 
@@ -287,6 +272,7 @@ class NearestNeighborAdvanced(BaseMetric):
     needs_tmp_data = True
     needs_job_kwargs = True
     deprecated_names = ["nn_isolation", "nn_noise_overlap"]
+    population_dependency = "neighbors"
 
 
 def _silhouette_metric_function(sorting_analyzer, unit_ids, tmp_data, **metric_params):
@@ -321,6 +307,8 @@ class Silhouette(BaseMetric):
     metric_descriptions = {"silhouette": "Silhouette score metric based on PCA space."}
     depend_on = ["principal_components"]
     needs_tmp_data = True
+    supports_unit_parallel = True
+    population_dependency = "neighbors"
 
 
 pca_metrics_list = [
@@ -508,6 +496,112 @@ def nearest_neighbors_metrics(all_pcs, all_labels, this_unit_id, max_spikes, n_n
     return hit_rate, miss_rate
 
 
+def build_nearest_neighbors_index(all_pcs, all_labels, max_spikes, n_neighbors):
+    """
+    Build a nearest neighbors index (KD-tree or ball-tree) over a subsample of the spikes of all units.
+
+    When all units share the same PC space, this index replaces the per-unit indices of
+    `nearest_neighbors_metrics()`: the index is built once and the nearest neighbors of all indexed
+    spikes are then queried with `nearest_neighbors_metrics_from_index()`.
+
+    Parameters
+    ----------
+    all_pcs : 2d array
+        The PCs for all spikes, organized as [num_spikes, PCs].
+    all_labels : 1d array
+        The cluster labels for all spikes. Must have length of number of spikes.
+    max_spikes : int
+        The total number of spikes to index. Spikes are subsampled with a regular step, which keeps
+        the same proportion of spikes for each unit.
+    n_neighbors : int
+        The number of neighbors to use.
+
+    Returns
+    -------
+    nn_index : dict
+        Dictionary with the fitted "nbrs" (sklearn.neighbors.NearestNeighbors) and the "labels" of the indexed spikes.
+        The "indices" of the neighbors are added on the first query.
+    """
+    from sklearn.neighbors import NearestNeighbors
+
+    order = np.argsort(all_labels, kind="stable")
+    total_spikes = all_pcs.shape[0]
+    ratio = max_spikes / total_spikes
+    if ratio < 1:
+        inds = np.arange(0, total_spikes - 1, 1 / ratio).astype("int")
+        order = order[inds]
+
+    nbrs = NearestNeighbors(n_neighbors=n_neighbors).fit(all_pcs[order])
+    return dict(nbrs=nbrs, labels=all_labels[order])
+
+
+def nearest_neighbors_metrics_from_index(nn_index, unit_ids, n_jobs=1):
+    """
+    Calculate the nearest neighbors hit and miss rates of several units with a shared index
+    built by `build_nearest_neighbors_index()`.
+
+    Parameters
+    ----------
+    nn_index : dict
+        The index returned by `build_nearest_neighbors_index()`.
+    unit_ids : list
+        The unit ids to calculate these metrics for.
+    n_jobs : int, default: 1
+        Number of threads used to query the index.
+
+    Returns
+    -------
+    hit_rates : dict
+        Fraction of neighbors for target cluster that are also in target cluster, per unit.
+    miss_rates : dict
+        Fraction of neighbors outside target cluster that are in target cluster, per unit.
+    """
+    labels = nn_index["labels"]
+
+    # if no other units in the vicinity, return best possible option
+    if np.unique(labels).size == 1:
+        warnings.warn("No other units found in the vicinity. Setting nn_hit_rate=1 and nn_miss_rate=0")
+        return {unit_id: 1.0 for unit_id in unit_ids}, {unit_id: 0.0 for unit_id in unit_ids}
+
+    if "indices" in nn_index:
+        # the neighbors do not change when units are merged, only the labels
+        indices = nn_index["indices"]
+    else:
+        nbrs = nn_index["nbrs"]
+        nbrs.set_params(n_jobs=n_jobs)
+        indices = nbrs.kneighbors(return_distance=False)  # don't feed X so it won't return itself as neighbor
+        nn_index["indices"] = indices
+    n_neighbors = indices.shape[1]
+
+    unit_ids_, label_indices = np.unique(labels, return_inverse=True)
+    label_indices = label_indices.reshape(-1)
+    neighbor_label_indices = label_indices[indices]
+    same_label = neighbor_label_indices == label_indices[:, None]
+
+    num_units = unit_ids_.size
+    num_spikes_per_unit = np.bincount(label_indices, minlength=num_units)
+    # number of neighbors of the spikes of each unit that are in the same unit
+    num_hits = np.bincount(label_indices, weights=np.sum(same_label, axis=1), minlength=num_units)
+    # number of neighbors of the spikes of other units that are in each unit
+    num_misses = np.bincount(neighbor_label_indices[~same_label], minlength=num_units)
+
+    hit_rates = {}
+    miss_rates = {}
+    for unit_id in unit_ids:
+        unit_index = np.flatnonzero(unit_ids_ == unit_id)
+        if unit_index.size == 0:
+            hit_rates[unit_id] = np.nan
+            miss_rates[unit_id] = 0.0
+            continue
+        unit_index = unit_index[0]
+        num_spikes_this_unit = num_spikes_per_unit[unit_index]
+        num_spikes_other_units = labels.size - num_spikes_this_unit
+        hit_rates[unit_id] = num_hits[unit_index] / (num_spikes_this_unit * n_neighbors)
+        miss_rates[unit_id] = num_misses[unit_index] / (num_spikes_other_units * n_neighbors)
+
+    return hit_rates, miss_rates
+
+
 def nearest_neighbors_isolation(
     sorting_analyzer,
     this_unit_id: int | str,
@@ -521,6 +615,7 @@ def nearest_neighbors_isolation(
     radius_um: float = 100,
     peak_sign: str = "neg",
     min_spatial_overlap: float = 0.5,
+    sparsity=None,
     seed=None,
 ):
     """
@@ -560,6 +655,9 @@ def nearest_neighbors_isolation(
     min_spatial_overlap : float, default: 100
         In case sorting_analyzer is sparse, other units are selected if they share at least
         `min_spatial_overlap` times `n_target_unit_channels` with the target unit.
+    sparsity : ChannelSparsity | None, default: None
+        Pre-computed sparsity used to select the channels (and neighbor units). If None, the sparsity
+        of the sorting_analyzer is used, or computed with `radius_um` and `peak_sign` if it is not sparse.
     seed : int, default: None
         Seed for random subsampling of spikes.
 
@@ -650,10 +748,11 @@ def nearest_neighbors_isolation(
 
         # find units whose signal channels (i.e. channels inside some radius around
         # the channel with largest amplitude) overlap with signal channels of the target unit
-        if sorting_analyzer.is_sparse():
-            sparsity = sorting_analyzer.sparsity
-        else:
-            sparsity = compute_sparsity(sorting_analyzer, method="radius", peak_sign=peak_sign, radius_um=radius_um)
+        if sparsity is None:
+            if sorting_analyzer.is_sparse():
+                sparsity = sorting_analyzer.sparsity
+            else:
+                sparsity = compute_sparsity(sorting_analyzer, method="radius", peak_sign=peak_sign, radius_um=radius_um)
         closest_chans_target_unit = sparsity.unit_id_to_channel_indices[this_unit_id]
         n_channels_target_unit = len(closest_chans_target_unit)
         # select other units that have a minimum spatial overlap with target unit
@@ -737,6 +836,7 @@ def nearest_neighbors_noise_overlap(
     n_components: int = 10,
     radius_um: float = 100,
     peak_sign: str = "neg",
+    sparsity=None,
     seed=None,
 ):
     """
@@ -771,6 +871,9 @@ def nearest_neighbors_noise_overlap(
     peak_sign : "neg" | "pos" | "both", default: "neg"
         The peak_sign used to compute sparsity and neighbor units. Used if sorting_analyzer
         is not sparse already.
+    sparsity : ChannelSparsity | None, default: None
+        Pre-computed sparsity used to select the channels (and neighbor units). If None, the sparsity
+        of the sorting_analyzer is used, or computed with `radius_um` and `peak_sign` if it is not sparse.
     seed : int, default: 0
         Random seed for subsampling spikes.
 
@@ -864,10 +967,11 @@ def nearest_neighbors_noise_overlap(
             n_snippets = max_spikes
 
         # restrict to channels with significant signal
-        if sorting_analyzer.is_sparse():
-            sparsity = sorting_analyzer.sparsity
-        else:
-            sparsity = compute_sparsity(sorting_analyzer, method="radius", peak_sign=peak_sign, radius_um=radius_um)
+        if sparsity is None:
+            if sorting_analyzer.is_sparse():
+                sparsity = sorting_analyzer.sparsity
+            else:
+                sparsity = compute_sparsity(sorting_analyzer, method="radius", peak_sign=peak_sign, radius_um=radius_um)
         noise_cluster = noise_cluster[:, :, sparsity.unit_id_to_channel_indices[this_unit_id]]
 
         # compute weighted noise snippet (Z)
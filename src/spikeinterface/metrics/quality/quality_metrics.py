@@ -4,11 +4,12 @@ import warnings
 import numpy as np
 
 from spikeinterface.core.template_tools import get_template_extremum_channel
+from spikeinterface.core.sparsity import compute_sparsity
 from spikeinterface.core.sortinganalyzer import register_result_extension
 from spikeinterface.core.analyzer_extension_core import BaseMetricExtension
 
-from .misc_metrics import misc_metrics_list
-from .pca_metrics import pca_metrics_list
+from .misc_metrics import misc_metrics_list, compute_spike_train_statistics
+from .pca_metrics import pca_metrics_list, build_nearest_neighbors_index
 
 
 class ComputeQualityMetrics(BaseMetricExtension):
@@ -46,6 +47,7 @@ class ComputeQualityMetrics(BaseMetricExtension):
     need_job_kwargs = True
     need_backward_compatibility_on_load = True
     metric_list = misc_metrics_list + pca_metrics_list
+    tmp_data_to_cache = ["nn_index"]
 
     @classmethod
     def get_required_dependencies(cls, **params):
@@ -130,13 +132,71 @@ class ComputeQualityMetrics(BaseMetricExtension):
             skip_pc_metrics=skip_pc_metrics,
         )
 
-    def _prepare_data(self, sorting_analyzer, unit_ids=None):
+    def _update_tmp_data_cache_after_merge(self, merge_unit_groups, new_unit_ids, new_sorting_analyzer, keep_mask):
+        # the shared nearest neighbors index (and its neighbors) stays valid after a merge: only the labels
+        # of the indexed spikes change. This is not true anymore if some spikes are removed.
+        if self._tmp_data_cache is None or "nn_index" not in self._tmp_data_cache:
+            return None
+        if keep_mask is not None and not np.all(keep_mask):
+            return None
+        nn_index = self._tmp_data_cache["nn_index"]
+        labels = nn_index["labels"]
+        new_labels = labels.astype(np.promote_types(labels.dtype, np.asarray(new_unit_ids).dtype))
+        for merge_group, new_unit_id in zip(merge_unit_groups, new_unit_ids):
+            new_labels[np.isin(labels, merge_group)] = new_unit_id
+        new_nn_index = dict(nn_index)
+        new_nn_index["labels"] = new_labels
+        return dict(nn_index=new_nn_index)
+
+    def _prepare_data(self, sorting_analyzer, unit_ids=None, tmp_data_cache=None):
         """Prepare shared data for quality metrics computation."""
         # Pre-compute shared PCA data
         from spikeinterface.metrics.spiketrain.metrics import compute_num_spikes, compute_firing_rates
 
         tmp_data = {}
 
+        # The spike train metrics share the statistics computed in a single pass over the spike vector
+        metric_names = self.params["metric_names"]
+        spike_train_metric_names = [
+            "isi_violation",
+            "rp_violation",
+            "sliding_rp_violation",
+            "presence_ratio",
+            "firing_range",
+        ]
+        metric_params = {
+            metric_name: {
+                **self.get_metric_by_name(metric_name).metric_params,
+                **self.params["metric_params"].get(metric_name, {}),
+            }
+            for metric_name in spike_train_metric_names
+        }
+        spike_train_statistics_kwargs = {}
+        bin_durations_s = []
+        if "isi_violation" in metric_names:
+            spike_train_statistics_kwargs["isi_threshold_ms"] = metric_params["isi_violation"]["isi_threshold_ms"]
+        if "rp_violation" in metric_names:
+            spike_train_statistics_kwargs["refractory_period_ms"] = metric_params["rp_violation"][
+                "refractory_period_ms"
+            ]
+        if "sliding_rp_violation" in metric_names:
+            sliding_rp_params = metric_params["sliding_rp_violation"]
+            spike_train_statistics_kwargs["sliding_rp_bin_size_ms"] = sliding_rp_params["bin_size_ms"]
+            spike_train_statistics_kwargs["sliding_rp_window_size_s"] = sliding_rp_params["window_size_s"]
+            spike_train_statistics_kwargs["sliding_rp_max_ref_period_ms"] = sliding_rp_params["max_ref_period_ms"]
+        if "presence_ratio" in metric_names:
+            bin_durations_s.append(metric_params["presence_ratio"]["bin_duration_s"])
+        if "firing_range" in metric_names:
+            bin_durations_s.append(metric_params["firing_range"]["bin_size_s"])
+        if len(spike_train_statistics_kwargs) > 0 or len(bin_durations_s) > 0:
+            tmp_data["spike_train_statistics"] = compute_spike_train_statistics(
+                sorting_analyzer,
+                unit_ids=unit_ids,
+                periods=self.params.get("periods", None),
+                bin_durations_s=bin_durations_s,
+                **spike_train_statistics_kwargs,
+            )
+
         # Check if any PCA metrics are requested
         pca_metric_names = [m.metric_name for m in pca_metrics_list]
         requested_pca_metrics = [m for m in self.params["metric_names"] if m in pca_metric_names]
@@ -151,9 +211,11 @@ class ComputeQualityMetrics(BaseMetricExtension):
 
         if unit_ids is None:
             unit_ids = sorting_analyzer.unit_ids
+        # metrics are computed for unit_ids, but the neighbors are searched among all units
+        all_unit_ids = sorting_analyzer.unit_ids
 
-        # Get dense PCA projections for all requested units
-        dense_projections, spike_unit_indices = pca_ext.get_some_projections(channel_ids=None, unit_ids=unit_ids)
+        # Get dense PCA projections for all units
+        dense_projections, spike_unit_indices = pca_ext.get_some_projections(channel_ids=None, unit_ids=all_unit_ids)
         all_labels = sorting_analyzer.sorting.unit_ids[spike_unit_indices]
 
         # Get extremum channels for neighbor selection in sparse mode
@@ -162,8 +224,33 @@ class ComputeQualityMetrics(BaseMetricExtension):
         # Pre-compute spike counts and firing rates if advanced NN metrics are requested
         advanced_nn_metrics = ["nn_advanced"]  # Our grouped advanced NN metric
         if any(m in advanced_nn_metrics for m in requested_pca_metrics):
-            tmp_data["n_spikes_all_units"] = compute_num_spikes(sorting_analyzer, unit_ids=unit_ids)
-            tmp_data["fr_all_units"] = compute_firing_rates(sorting_analyzer, unit_ids=unit_ids)
+            tmp_data["n_spikes_all_units"] = compute_num_spikes(sorting_analyzer, unit_ids=all_unit_ids)
+            tmp_data["fr_all_units"] = compute_firing_rates(sorting_analyzer, unit_ids=all_unit_ids)
+            # the sparsity used to select channels and neighbor units is computed once for all units
+            if sorting_analyzer.is_sparse():
+                tmp_data["nn_advanced_sparsity"] = sorting_analyzer.sparsity
+            else:
+                nn_advanced_params = self.params["metric_params"].get("nn_advanced", {})
+                tmp_data["nn_advanced_sparsity"] = compute_sparsity(
+                    sorting_analyzer,
+                    method="radius",
+                    peak_sign=nn_advanced_params.get("peak_sign", "neg"),
+                    radius_um=nn_advanced_params.get("radius_um", 100),
+                )
+
+        # Without sparsity all units share the same PC space and the same neighbor units,
+        # so a single nearest neighbors index is built for all of them
+        if "nearest_neighbor" in requested_pca_metrics and not sorting_analyzer.is_sparse():
+            nn_params = self.params["metric_params"].get("nearest_neighbor", {})
+            if tmp_data_cache is not None and "nn_index" in tmp_data_cache:
+                tmp_data["nn_index"] = tmp_data_cache["nn_index"]
+            else:
+                tmp_data["nn_index"] = build_nearest_neighbors_index(
+                    dense_projections.reshape(dense_projections.shape[0], -1),
+                    all_labels,
+                    max_spikes=nn_params.get("max_spikes", 10000),
+                    n_neighbors=nn_params.get("n_neighbors", 5),
+                )
 
         # Pre-compute per-unit PCA data and neighbor information
         pca_data_per_unit = {}
@@ -172,12 +259,12 @@ class ComputeQualityMetrics(BaseMetricExtension):
             if sorting_analyzer.is_sparse():
                 neighbor_channel_ids = sorting_analyzer.sparsity.unit_id_to_channel_ids[unit_id]
                 neighbor_unit_ids = [
-                    other_unit for other_unit in unit_ids if extremum_channels[other_unit] in neighbor_channel_ids
+                    other_unit for other_unit in all_unit_ids if extremum_channels[other_unit] in neighbor_channel_ids
                 ]
                 neighbor_channel_indices = sorting_analyzer.channel_ids_to_indices(neighbor_channel_ids)
             else:
                 neighbor_channel_ids = sorting_analyzer.channel_ids
-                neighbor_unit_ids = unit_ids
+                neighbor_unit_ids = all_unit_ids
                 neighbor_channel_indices = sorting_analyzer.channel_ids_to_indices(neighbor_channel_ids)
 
             # Filter projections to neighbor units
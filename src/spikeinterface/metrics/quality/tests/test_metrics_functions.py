@@ -28,6 +28,7 @@ from spikeinterface.metrics.quality.misc_metrics import (
     compute_firing_ranges,
     compute_amplitude_cv_metrics,
     compute_sd_ratio,
+    compute_spike_train_statistics,
     _noise_cutoff,
     _get_synchrony_counts,
     amplitude_cutoff,
@@ -37,6 +38,8 @@ from spikeinterface.metrics.quality.pca_metrics import (
     mahalanobis_metrics,
     d_prime_metric,
     nearest_neighbors_metrics,
+    build_nearest_neighbors_index,
+    nearest_neighbors_metrics_from_index,
     silhouette_score,
     simplified_silhouette_score,
 )
@@ -253,6 +256,26 @@ def test_nearest_neighbors_metrics():
     assert miss_rate1 > miss_rate2
 
 
+def test_nearest_neighbors_metrics_from_index():
+    all_pcs, all_labels = create_ground_truth_pc_distributions([1, -1, 3], [1000, 800, 500])
+
+    # without subsampling, the shared index gives the same results as one index per unit
+    nn_index = build_nearest_neighbors_index(all_pcs, all_labels, max_spikes=5000, n_neighbors=3)
+    hit_rates, miss_rates = nearest_neighbors_metrics_from_index(nn_index, [0, 1, 2], n_jobs=2)
+    for unit_id in [0, 1, 2]:
+        hit_rate, miss_rate = nearest_neighbors_metrics(all_pcs, all_labels, unit_id, 5000, 3)
+        assert np.isclose(hit_rates[unit_id], hit_rate)
+        assert np.isclose(miss_rates[unit_id], miss_rate)
+
+    # with subsampling, results are close
+    nn_index = build_nearest_neighbors_index(all_pcs, all_labels, max_spikes=1000, n_neighbors=3)
+    assert nn_index["labels"].size <= 1000
+    hit_rates_sub, miss_rates_sub = nearest_neighbors_metrics_from_index(nn_index, [0, 1, 2])
+    for unit_id in [0, 1, 2]:
+        assert abs(hit_rates_sub[unit_id] - hit_rates[unit_id]) < 0.1
+        assert abs(miss_rates_sub[unit_id] - miss_rates[unit_id]) < 0.1
+
+
 def test_silhouette_score_metrics():
     all_pcs1, all_labels1 = create_ground_truth_pc_distributions([1, -1], [1000, 1000])
     all_pcs2, all_labels2 = create_ground_truth_pc_distributions(
@@ -475,6 +498,62 @@ def test_calculate_rp_violations(sorting_analyzer_violations, periods_violations
     assert np.isnan(rp_contamination[1])
 
 
+def test_compute_spike_train_statistics(sorting_analyzer_violations, periods_violations):
+    from spikeinterface.metrics.quality import misc_metrics
+
+    sorting_analyzer = sorting_analyzer_violations
+    sorting = sorting_analyzer.sorting
+    fs = sorting_analyzer.sampling_frequency
+    params = dict(
+        isi_threshold_ms=1.5,
+        refractory_period_ms=1.0,
+        sliding_rp_bin_size_ms=0.25,
+        sliding_rp_max_ref_period_ms=10,
+        bin_durations_s=[1.0, 5.0],
+    )
+    stats = compute_spike_train_statistics(sorting_analyzer, **params)
+
+    for unit_id in sorting_analyzer.unit_ids:
+        spike_train = sorting.get_unit_spike_train(unit_id=unit_id, segment_index=0)
+        assert stats["num_spikes"][unit_id] == spike_train.size
+        assert stats["isi_violations_count"][unit_id] == np.sum(np.diff(spike_train / fs) < 0.0015)
+        t_r = int(round(fs * 1e-3))
+        num_rp_violations = np.sum(np.searchsorted(spike_train, spike_train + t_r, side="right") - 1)
+        num_rp_violations -= np.sum(np.arange(spike_train.size))
+        assert stats["rp_violations_count"][unit_id] == num_rp_violations
+        bin_edges = np.arange(0, sorting_analyzer.get_num_samples() + 1, int(5.0 * fs))
+        np.testing.assert_array_equal(
+            stats["binned_spike_counts"][5.0][unit_id], np.histogram(spike_train, bins=bin_edges)[0]
+        )
+
+    # the numpy fallback gives the same results as the compiled kernel
+    stats_periods = compute_spike_train_statistics(sorting_analyzer, periods=periods_violations, **params)
+    have_numba = misc_metrics.HAVE_NUMBA
+    try:
+        misc_metrics.HAVE_NUMBA = False
+        stats_numpy = compute_spike_train_statistics(sorting_analyzer, periods=periods_violations, **params)
+    finally:
+        misc_metrics.HAVE_NUMBA = have_numba
+    for unit_id in sorting_analyzer.unit_ids:
+        assert stats_numpy["isi_violations_count"][unit_id] == stats_periods["isi_violations_count"][unit_id]
+        assert stats_numpy["rp_violations_count"][unit_id] == stats_periods["rp_violations_count"][unit_id]
+        np.testing.assert_array_equal(
+            stats_numpy["sliding_rp_correlogram"][unit_id], stats_periods["sliding_rp_correlogram"][unit_id]
+        )
+        for bin_duration_s in params["bin_durations_s"]:
+            np.testing.assert_array_equal(
+                stats_numpy["binned_spike_counts"][bin_duration_s][unit_id],
+                stats_periods["binned_spike_counts"][bin_duration_s][unit_id],
+            )
+
+    # precomputed statistics are reused by the metric functions
+    isi_ratio, isi_count = compute_isi_violations(sorting_analyzer, isi_threshold_ms=1.5)
+    isi_ratio_stats, isi_count_stats = compute_isi_violations(
+        sorting_analyzer, isi_threshold_ms=1.5, spike_train_statistics=stats
+    )
+    assert isi_count == isi_count_stats
+
+
 def test_synchrony_metrics(sorting_analyzer_simple, periods_simple):
     sorting_analyzer = sorting_analyzer_simple
     sorting = sorting_analyzer.sorting
@@ -556,6 +635,26 @@ def test_calculate_drift_metrics(sorting_analyzer_simple):
     assert drifts_stds == drifts_stds_periods
     assert drift_mads == drift_mads_periods
 
+    # reading the spike locations by chunks gives the same results
+    drifts_ptps_chunks, drifts_stds_chunks, drift_mads_chunks = compute_drift_metrics(
+        sorting_analyzer, periods=periods, min_spikes_per_interval=10, interval_s=10, locations_chunk_size=1000
+    )
+    assert drifts_ptps_chunks == drifts_ptps_periods
+    assert drifts_stds_chunks == drifts_stds_periods
+    assert drift_mads_chunks == drift_mads_periods
+
+    # the median positions match the medians of the spike locations in each interval
+    _, median_positions = compute_drift_metrics(
+        sorting_analyzer, interval_s=10, min_spikes_per_interval=10, return_positions=True
+    )
+    spike_locations_by_unit = sorting_analyzer.get_extension("spike_locations").get_data(outputs="by_unit")
+    unit_id = sorting_analyzer.unit_ids[0]
+    spike_train = sorting_analyzer.sorting.get_unit_spike_train(unit_id=unit_id, segment_index=0)
+    bin_size = int(10 * sorting_analyzer.sampling_frequency)
+    in_first_bin = spike_train < bin_size
+    expected_median = np.median(spike_locations_by_unit[0][unit_id]["y"][in_first_bin])
+    assert np.isclose(median_positions[unit_id][0], expected_median)
+
     # calculate num spikes with empty periods
     empty_periods = np.empty(0, dtype=unit_period_dtype)
     drifts_ptps_empty, drifts_stds_empty, drift_mads_empty = compute_drift_metrics(
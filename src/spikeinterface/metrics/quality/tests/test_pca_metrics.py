@@ -15,18 +15,19 @@ def test_compute_pc_metrics_multi_processing(small_sorting_analyzer, tmp_path):
         sorting_analyzer, metric_names=metric_names, n_jobs=1, progress_bar=True, seed=1205, metric_params=metric_params
     )
 
-    # this should raise a warning, since nn_advanced can be parallelized only if not in memory
-    with pytest.warns(UserWarning):
-        res2 = compute_quality_metrics(
-            sorting_analyzer,
-            metric_names=metric_names,
-            n_jobs=2,
-            progress_bar=True,
-            seed=1205,
-            metric_params=metric_params,
-        )
+    # units are processed in threads, so an analyzer in memory can be used in parallel
+    res2 = compute_quality_metrics(
+        sorting_analyzer,
+        metric_names=metric_names,
+        n_jobs=2,
+        progress_bar=True,
+        seed=1205,
+        metric_params=metric_params,
+    )
+    for metric_name in res1.columns:
+        np.testing.assert_array_equal(res1[metric_name].values, res2[metric_name].values)
 
-    # now we cache the analyzer and there should be no warning
+    # there should be no warning with a cached analyzer
     sorting_analyzer_saved = sorting_analyzer.save_as(folder=tmp_path / "analyzer", format="binary_folder")
     # assert no warnings this time
     with warnings.catch_warnings():
@@ -75,6 +75,22 @@ def test_compute_quality_metrics(sorting_analyzer_simple):
     assert "isolation_distance" in metrics.columns
 
 
+@pytest.mark.parametrize("pool_engine", ["thread", "process"])
+def test_compute_quality_metrics_unit_parallel(sorting_analyzer_simple, pool_engine):
+    sorting_analyzer = sorting_analyzer_simple
+    metric_names = ["presence_ratio", "isi_violation", "firing_range", "amplitude_cutoff", "snr"]
+
+    metrics = compute_quality_metrics(sorting_analyzer, metric_names=metric_names, n_jobs=1, seed=2205)
+    metrics_par = compute_quality_metrics(
+        sorting_analyzer, metric_names=metric_names, n_jobs=2, pool_engine=pool_engine, seed=2205
+    )
+    qm = sorting_analyzer.get_extension("quality_metrics")
+    assert set(metric_names) <= set(qm.data["runtime_s"].keys())
+    assert list(metrics.index) == list(metrics_par.index)
+    for column in metrics.columns:
+        np.testing.assert_array_equal(metrics[column].values, metrics_par[column].values)
+
+
 def test_merging_quality_metrics(sorting_analyzer_simple):
 
     sorting_analyzer = sorting_analyzer_simple
@@ -101,6 +117,37 @@ def test_merging_quality_metrics(sorting_analyzer_simple):
     assert len(metrics.index) > len(new_metrics.index)
 
 
+@pytest.mark.parametrize("sparse", [True, False])
+def test_merging_quality_metrics_incremental(sorting_analyzer_simple, sparse):
+    sorting_analyzer = sorting_analyzer_simple
+    if not sparse:
+        sorting_analyzer = create_sorting_analyzer(
+            sorting_analyzer.sorting, sorting_analyzer.recording, format="memory", sparse=False
+        )
+        sorting_analyzer.compute(["random_spikes", "noise_levels", "waveforms", "templates"])
+    if not sorting_analyzer.has_extension("principal_components"):
+        sorting_analyzer.compute("principal_components")
+
+    metric_names = ["presence_ratio", "synchrony", "d_prime", "silhouette", "nearest_neighbor"]
+    metric_params = dict(nearest_neighbor=dict(max_spikes=100_000))
+    compute_quality_metrics(sorting_analyzer, metric_names=metric_names, metric_params=metric_params)
+
+    # unit-local metrics are only computed for the new unit, the other ones for the affected units
+    new_sorting_analyzer = sorting_analyzer.merge_units([[0, 1]])
+    qm_ext = new_sorting_analyzer.get_extension("quality_metrics")
+    new_metrics = qm_ext.get_data()
+    if not sparse:
+        # the nearest neighbors index of the first computation was updated and re-used
+        assert qm_ext._tmp_data_cache is not None and "nn_index" in qm_ext._tmp_data_cache
+
+    # the incremental update gives the same results as a full computation
+    full_metrics = compute_quality_metrics(new_sorting_analyzer, metric_names=metric_names, metric_params=metric_params)
+    for column in full_metrics.columns:
+        np.testing.assert_allclose(
+            new_metrics[column].values.astype(float), full_metrics[column].values.astype(float), atol=0.01
+        )
+
+
 def test_compute_quality_metrics_recordingless(sorting_analyzer_simple):
 
     sorting_analyzer = sorting_analyzer_simple
@@ -703,16 +703,20 @@ def sort_template_and_locations(template, channel_locations, depth_direction="y"
 def fit_line_robust(x, y, eps=1e-12):
     """
     Fit line using robust Theil-Sen estimator (median of pairwise slopes).
+
+    The pairwise slopes are computed at once on the upper triangle of the pairwise
+    differences, which gives the same estimate as looping over all pairs of points.
     """
-    import itertools
+    x = np.asarray(x)
+    y = np.asarray(y)
 
     # Calculate slope and bias using Theil-Sen estimator
-    slopes = []
-    for (x0, y0), (x1, y1) in itertools.combinations(zip(x, y), 2):
-        if np.abs(x1 - x0) > eps:
-            slopes.append((y1 - y0) / (x1 - x0))
-    if len(slopes) == 0:  # all x are identical
+    i0, i1 = np.triu_indices(x.size, k=1)
+    dx = x[i1] - x[i0]
+    valid = np.abs(dx) > eps
+    if not np.any(valid):  # all x are identical
         return np.nan, -np.inf
+    slopes = (y[i1][valid] - y[i0][valid]) / dx[valid]
     slope = np.median(slopes)
     bias = np.median(y - slope * x)
 
@@ -775,7 +779,7 @@ def get_velocity_fits(template, channel_locations, sampling_frequency, **kwargs)
         template_above = template[:, channels_above]
         channel_locations_above = channel_locations[channels_above]
         peak_times_ms_above = np.argmin(template_above, 0) / sampling_frequency * 1000 - max_peak_time
-        distances_um_above = np.array([np.linalg.norm(cl - max_channel_location) for cl in channel_locations_above])
+        distances_um_above = np.linalg.norm(channel_locations_above - max_channel_location, axis=1)
         inv_velocity_above, score = fit_line_robust(distances_um_above, peak_times_ms_above)
         if score > min_r2 and inv_velocity_above != 0:
             velocity_above = 1 / inv_velocity_above
@@ -790,7 +794,7 @@ def get_velocity_fits(template, channel_locations, sampling_frequency, **kwargs)
         template_below = template[:, channels_below]
         channel_locations_below = channel_locations[channels_below]
         peak_times_ms_below = np.argmin(template_below, 0) / sampling_frequency * 1000 - max_peak_time
-        distances_um_below = np.array([np.linalg.norm(cl - max_channel_location) for cl in channel_locations_below])
+        distances_um_below = np.linalg.norm(channel_locations_below - max_channel_location, axis=1)
         inv_velocity_below, score = fit_line_robust(distances_um_below, peak_times_ms_below)
         if score > min_r2 and inv_velocity_below != 0:
             velocity_below = 1 / inv_velocity_below
@@ -886,7 +890,7 @@ def get_exp_decay(template, channel_locations, sampling_frequency=None, **kwargs
 
         # Set y distances to max for channels outside x tolerance (so they won't be selected)
         y_dist_masked = y_dist.copy()
-        y_dist_masked[~np.isin(np.arange(len(y_dist)), valid_x_channels)] = y_dist.max() + 1
+        y_dist_masked[x_dist > channel_tolerance] = y_dist.max() + 1
 
         # Select the closest channels in y-distance
         use_these_channels = np.argsort(y_dist_masked)[:num_channels_for_fit]
@@ -914,7 +918,7 @@ def get_exp_decay(template, channel_locations, sampling_frequency=None, **kwargs
 
     else:
         # Old style: use all channels sorted by distance
-        channel_distances = np.array([np.linalg.norm(cl - max_channel_location) for cl in channel_locations])
+        channel_distances = np.linalg.norm(channel_locations - max_channel_location, axis=1)
         distances_sort_indices = np.argsort(channel_distances)
 
         # longdouble is float128 when the platform supports it, otherwise it is float64
@@ -228,7 +228,7 @@ class ComputeTemplateMetrics(BaseMetricExtension):
             min_extremum_distance_samples=min_extremum_distance_samples,
         )
 
-    def _prepare_data(self, sorting_analyzer, unit_ids):
+    def _prepare_data(self, sorting_analyzer, unit_ids, tmp_data_cache=None):
         import warnings
         import pandas as pd
         from scipy.signal import resample_poly
@@ -265,21 +265,22 @@ class ComputeTemplateMetrics(BaseMetricExtension):
         # the template metrics only work for 2D probes. We warn users with 3D locations above.
         channel_locations = analyzer_channel_locations[:, :2]
 
-        main_channel_templates = []
+        # extract and upsample the main channel templates of all units at once
+        unit_indices = sorting_analyzer.sorting.ids_to_indices(unit_ids)
+        main_channel_indices = np.array([extremum_channel_indices[unit_id] for unit_id in unit_ids], dtype=int)
+        main_channel_templates = all_templates[unit_indices, :, main_channel_indices]
+        if upsampling_factor > 1 and len(unit_ids) > 0:
+            main_channel_templates = resample_poly(main_channel_templates, up=upsampling_factor, down=1, axis=1)
+
         peaks_info = []
         multi_channel_templates = []
         channel_locations_multi = []
-        for unit_id in unit_ids:
-            unit_index = sorting_analyzer.sorting.id_to_index(unit_id)
+        for i, unit_id in enumerate(unit_ids):
+            unit_index = unit_indices[i]
             template_all_chans = all_templates[unit_index]
-            template_single = template_all_chans[:, extremum_channel_indices[unit_id]]
+            template_upsampled = main_channel_templates[i]
 
             # compute single_channel metrics
-            if upsampling_factor > 1:
-                template_upsampled = resample_poly(template_single, up=upsampling_factor, down=1)
-            else:
-                template_upsampled = template_single
-
             peaks_info_unit = get_trough_and_peak_idx(
                 template_upsampled,
                 sampling_frequency_up,
@@ -288,8 +289,6 @@ class ComputeTemplateMetrics(BaseMetricExtension):
                 min_peak_trough_distance_ratio=min_peak_trough_distance_ratio,
                 min_extremum_distance_samples=min_extremum_distance_samples,
             )
-            main_channel_templates.append(template_upsampled)
-
             peaks_info.append(peaks_info_unit)
 
             if include_multi_channel_metrics:
@@ -314,7 +313,7 @@ class ComputeTemplateMetrics(BaseMetricExtension):
                 channel_locations_multi.append(channel_location_multi)
 
         tmp_data["peaks_info"] = peaks_info
-        tmp_data["main_channel_templates"] = np.array(main_channel_templates)
+        tmp_data["main_channel_templates"] = main_channel_templates
 
         if include_multi_channel_metrics:
             # multi_channel_templates is a list of 2D arrays of shape (n_times, n_channels)
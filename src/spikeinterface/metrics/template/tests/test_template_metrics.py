@@ -1,3 +1,6 @@
+import itertools
+
+import numpy as np
 import pytest
 
 from spikeinterface.postprocessing.tests.common_extension_tests import AnalyzerExtensionCommonTestSuite
@@ -6,7 +9,7 @@ from spikeinterface.metrics.template import (
     compute_template_metrics,
     get_single_channel_template_metric_names,
 )
-from spikeinterface.metrics.template.metrics import single_channel_metrics, multi_channel_metrics
+from spikeinterface.metrics.template.metrics import single_channel_metrics, multi_channel_metrics, fit_line_robust
 
 template_metrics = get_single_channel_template_metric_names()
 
@@ -136,6 +139,26 @@ def test_save_template_metrics(small_sorting_analyzer, create_cache_folder):
             assert metric_name not in metric_names
 
 
+def test_fit_line_robust():
+    """
+    Checks that the vectorized Theil-Sen fit matches the estimate computed pair by pair.
+    """
+    rng = np.random.default_rng(seed=2205)
+    x = np.round(rng.uniform(0, 100, size=20))
+    y = 0.05 * x + rng.normal(0, 0.1, size=20)
+
+    slopes = [(y1 - y0) / (x1 - x0) for (x0, y0), (x1, y1) in itertools.combinations(zip(x, y), 2) if x1 != x0]
+    expected_slope = np.median(slopes)
+
+    slope, r2_score = fit_line_robust(x, y)
+    assert np.isclose(slope, expected_slope)
+    assert r2_score > 0.9
+
+    slope, r2_score = fit_line_robust(np.ones(5), y[:5])
+    assert np.isnan(slope)
+    assert r2_score == -np.inf
+
+
 class TestTemplateMetrics(AnalyzerExtensionCommonTestSuite):
 
     @pytest.mark.parametrize(
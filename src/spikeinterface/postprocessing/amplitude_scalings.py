@@ -1,3 +1,5 @@
+import importlib.util
+
 import numpy as np
 
 from spikeinterface.core import ChannelSparsity
@@ -8,6 +10,12 @@ from spikeinterface.core.analyzer_extension_core import BaseSpikeVectorExtension
 
 from spikeinterface.core.node_pipeline import SpikeRetriever, PipelineNode, find_parent_of_type
 
+numba_spec = importlib.util.find_spec("numba")
+if numba_spec is not None:
+    HAVE_NUMBA = True
+else:
+    HAVE_NUMBA = False
+
 
 class ComputeAmplitudeScalings(BaseSpikeVectorExtension):
     """
@@ -47,7 +55,9 @@ class ComputeAmplitudeScalings(BaseSpikeVectorExtension):
     handle_collisions: bool, default: True
         Whether to handle collisions between spikes. If True, the amplitude scaling of colliding spikes
         (defined as spikes within `delta_collision_ms` ms and with overlapping sparsity) is computed by fitting a
-        multi-linear regression model (with `sklearn.LinearRegression`). If False, each spike is fitted independently.
+        non-negative multi-linear regression model with intercept. If numba is installed, all the collisions of a
+        chunk are found and fitted in one compiled kernel, otherwise `sklearn.LinearRegression` is used for each
+        collision. If False, each spike is fitted independently.
     delta_collision_ms: float, default: 2
         The maximum time difference in ms before and after a spike to gather colliding spikes.
     """
@@ -205,6 +215,9 @@ class AmplitudeScalingNode(PipelineNode):
         # for some edge cases a template can be zero, leading to problems later
         template_is_zero = [np.all(template == 0) for template in all_templates]
 
+        # units_overlap[i, j] is True when units i and j share at least one channel
+        self._units_overlap = (sparsity_mask.astype("int64") @ sparsity_mask.T.astype("int64")) > 0
+
         self._all_templates = all_templates
         self._sparsity_mask = sparsity_mask
         self._nbefore = nbefore
@@ -255,22 +268,37 @@ class AmplitudeScalingNode(PipelineNode):
         local_spikes_within_margin = peaks
         local_spikes = local_spikes_within_margin[~peaks["in_margin"]]
 
+        # compute the scaling for each spike
+        scalings = np.zeros(len(local_spikes), dtype=float)
+        spike_collision_mask = np.zeros(len(local_spikes), dtype=bool)
+
         # set colliding spikes apart (if needed)
-        if handle_collisions:
+        collisions = {}
+        if handle_collisions and HAVE_NUMBA:
+            # all collisions of the chunk are found and fitted at once in compiled code
+            collision_spike_indices, collision_scalings = fit_collisions_batched(
+                local_spikes_within_margin,
+                traces,
+                nbefore,
+                all_templates,
+                sparsity_mask,
+                self._units_overlap,
+                cut_out_before,
+                cut_out_after,
+                delta_collision_samples,
+            )
+            scalings[collision_spike_indices] = collision_scalings
+            spike_collision_mask[collision_spike_indices] = True
+        elif handle_collisions:
             # local spikes with margin!
             collisions = find_collisions(
                 local_spikes, local_spikes_within_margin, delta_collision_samples, sparsity_mask
             )
-        else:
-            collisions = {}
-
-        # compute the scaling for each spike
-        scalings = np.zeros(len(local_spikes), dtype=float)
-        spike_collision_mask = np.zeros(len(local_spikes), dtype=bool)
+            spike_collision_mask[list(collisions.keys())] = True
 
         for spike_index, spike in enumerate(local_spikes):
-            if spike_index in collisions.keys():
-                # we deal with overlapping spikes later
+            if spike_collision_mask[spike_index]:
+                # we deal with overlapping spikes separately
                 continue
 
             unit_index = spike["unit_index"]
@@ -550,6 +578,272 @@ def fit_collision(
     return scalings
 
 
+def fit_collisions_batched(
+    spikes_within_margin,
+    traces_with_margin,
+    nbefore,
+    all_templates,
+    sparsity_mask,
+    units_overlap,
+    cut_out_before,
+    cut_out_after,
+    delta_collision_samples,
+):
+    """
+    Find and fit all the collisions of a chunk with compiled code.
+
+    This is equivalent to `find_collisions()` followed by `fit_collision()` for each collision,
+    but the collisions are stored as flat arrays (CSR-like) and the design matrices of the shifted
+    templates are built and solved (non-negative least squares with intercept) in a single numba kernel.
+
+    Parameters
+    ----------
+    spikes_within_margin: np.array
+        The spikes of the chunk, including the spikes in the margin (with the "in_margin" field).
+    traces_with_margin: np.ndarray
+        A numpy array of shape (n_samples, n_channels) containing the traces with a margin.
+    nbefore: int
+        The number of samples before the peak in the templates.
+    all_templates: np.ndarray
+        A numpy array of shape (n_units, n_samples, n_channels) containing the templates.
+    sparsity_mask: boolean mask
+        A num_units x num_channels boolean array indicating whether
+        the unit is represented on the channel.
+    units_overlap: boolean mask
+        A num_units x num_units boolean array indicating whether two units share at least one channel.
+    cut_out_before: int
+        The number of samples to cut out before the spike.
+    cut_out_after: int
+        The number of samples to cut out after the spike.
+    delta_collision_samples: int
+        The maximum number of samples between two spikes to consider them as overlapping
+
+    Returns
+    -------
+    collision_spike_indices: np.ndarray
+        The indices (among the spikes not in margin) of the spikes with a collision.
+    collision_scalings: np.ndarray
+        The fitted scaling of each of these spikes.
+    """
+    assert HAVE_NUMBA, "fit_collisions_batched() requires numba"
+
+    sample_indices = spikes_within_margin["sample_index"].astype(np.int64)
+    unit_indices = spikes_within_margin["unit_index"].astype(np.int64)
+    (local_indices,) = np.nonzero(~spikes_within_margin["in_margin"])
+
+    collision_spike_indices, collision_ptr, collision_members = _find_collisions_numba(
+        sample_indices, unit_indices, local_indices, delta_collision_samples, units_overlap
+    )
+
+    collision_scalings = np.zeros(collision_spike_indices.size, dtype=np.float64)
+    if collision_spike_indices.size > 0:
+        _fit_collisions_numba(
+            traces_with_margin,
+            sample_indices,
+            unit_indices,
+            collision_ptr,
+            collision_members,
+            all_templates,
+            sparsity_mask,
+            nbefore,
+            cut_out_before,
+            cut_out_after,
+            collision_scalings,
+        )
+
+    return collision_spike_indices, collision_scalings
+
+
+if HAVE_NUMBA:
+    import numba
+
+    @numba.jit(nopython=True, nogil=True, cache=False)
+    def _find_collisions_numba(sample_indices, unit_indices, local_indices, delta_collision_samples, units_overlap):
+        """
+        Same logic as `find_collisions()` but returns flat arrays: the members of collision `c`
+        are `collision_members[collision_ptr[c]:collision_ptr[c + 1]]` (indices in the spikes with margin),
+        with the spike itself at first position.
+        """
+        num_spikes = sample_indices.size
+        window_starts = np.searchsorted(sample_indices, sample_indices[local_indices] - delta_collision_samples)
+        window_ends = np.searchsorted(sample_indices, sample_indices[local_indices] + delta_collision_samples)
+
+        # first pass: count the overlapping spikes
+        num_overlapping = np.zeros(local_indices.size, dtype=np.int64)
+        for i in range(local_indices.size):
+            spike_index = local_indices[i]
+            for other_index in range(window_starts[i], min(window_ends[i], num_spikes)):
+                if other_index == spike_index:
+                    continue
+                if units_overlap[unit_indices[spike_index], unit_indices[other_index]]:
+                    num_overlapping[i] += 1
+
+        (collision_spike_indices,) = np.nonzero(num_overlapping)
+        collision_ptr = np.zeros(collision_spike_indices.size + 1, dtype=np.int64)
+        for c in range(collision_spike_indices.size):
+            collision_ptr[c + 1] = collision_ptr[c] + num_overlapping[collision_spike_indices[c]] + 1
+
+        # second pass: fill the members
+        collision_members = np.zeros(collision_ptr[-1], dtype=np.int64)
+        for c in range(collision_spike_indices.size):
+            i = collision_spike_indices[c]
+            spike_index = local_indices[i]
+            pos = collision_ptr[c]
+            collision_members[pos] = spike_index
+            pos += 1
+            for other_index in range(window_starts[i], min(window_ends[i], num_spikes)):
+                if other_index == spike_index:
+                    continue
+                if units_overlap[unit_indices[spike_index], unit_indices[other_index]]:
+                    collision_members[pos] = other_index
+                    pos += 1
+
+        return collision_spike_indices, collision_ptr, collision_members
+
+    @numba.jit(nopython=True, nogil=True, cache=False)
+    def _fit_collisions_numba(
+        traces,
+        sample_indices,
+        unit_indices,
+        collision_ptr,
+        collision_members,
+        all_templates,
+        sparsity_mask,
+        nbefore,
+        cut_out_before,
+        cut_out_after,
+        scalings,
+    ):
+        """
+        Build the design matrix of shifted templates of each collision (see `fit_collision()`)
+        and solve the non-negative least squares with intercept. The scaling of the spike
+        of interest is written in `scalings`.
+        """
+        num_samples, num_channels = traces.shape
+        template_width = cut_out_before + cut_out_after
+
+        for c in range(collision_ptr.size - 1):
+            members = collision_members[collision_ptr[c] : collision_ptr[c + 1]]
+            num_members = members.size
+
+            # union of the channels of all colliding units
+            common_mask = np.zeros(num_channels, dtype=np.bool_)
+            first_sample = sample_indices[members[0]]
+            last_sample = sample_indices[members[0]]
+            for m in members:
+                common_mask |= sparsity_mask[unit_indices[m]]
+                first_sample = min(first_sample, sample_indices[m])
+                last_sample = max(last_sample, sample_indices[m])
+            (channel_indices,) = np.nonzero(common_mask)
+            num_local_channels = channel_indices.size
+
+            start = max(0, first_sample - cut_out_before)
+            end = min(num_samples, last_sample + cut_out_after)
+            num_local_samples = end - start
+
+            X = np.zeros((num_local_samples * num_local_channels, num_members), dtype=np.float64)
+            y = np.zeros(num_local_samples * num_local_channels, dtype=np.float64)
+            for ci in range(num_local_channels):
+                for s in range(num_local_samples):
+                    y[ci * num_local_samples + s] = traces[start + s, channel_indices[ci]]
+
+            for i in range(num_members):
+                unit_index = unit_indices[members[i]]
+                sample_centered = sample_indices[members[i]] - start
+                for s in range(template_width):
+                    pos = sample_centered - cut_out_before + s
+                    if pos < 0 or pos >= num_local_samples:
+                        continue
+                    for ci in range(num_local_channels):
+                        X[ci * num_local_samples + pos, i] = all_templates[
+                            unit_index, nbefore - cut_out_before + s, channel_indices[ci]
+                        ]
+
+            coefs = _nnls_with_intercept(X, y)
+            scalings[c] = coefs[0]
+
+    @numba.jit(nopython=True, nogil=True, cache=False)
+    def _nnls_with_intercept(X, y):
+        """
+        Non-negative least squares with a free intercept, equivalent to
+        `LinearRegression(fit_intercept=True, positive=True)`.
+        The intercept is removed by centering and the problem is solved on the
+        normal equations with the Lawson-Hanson active set algorithm.
+        """
+        num_rows, num_cols = X.shape
+
+        y_mean = np.mean(y)
+        X_mean = np.zeros(num_cols)
+        for j in range(num_cols):
+            X_mean[j] = np.mean(X[:, j])
+
+        gram = np.zeros((num_cols, num_cols))
+        h = np.zeros(num_cols)
+        for i in range(num_cols):
+            xi = X[:, i] - X_mean[i]
+            h[i] = np.sum(xi * (y - y_mean))
+            for j in range(i, num_cols):
+                gram[i, j] = np.sum(xi * (X[:, j] - X_mean[j]))
+                gram[j, i] = gram[i, j]
+
+        tol = 1e-10 * max(np.max(np.abs(h)), 1e-30)
+        coefs = np.zeros(num_cols)
+        passive = np.zeros(num_cols, dtype=np.bool_)
+        gradient = h.copy()
+
+        for _ in range(3 * num_cols):
+            # add the most violating variable to the passive set
+            best = -1
+            best_gradient = tol
+            for j in range(num_cols):
+                if not passive[j] and gradient[j] > best_gradient:
+                    best = j
+                    best_gradient = gradient[j]
+            if best == -1:
+                break
+            passive[best] = True
+
+            for _ in range(3 * num_cols):
+                (passive_indices,) = np.nonzero(passive)
+                sub_gram = np.empty((passive_indices.size, passive_indices.size))
+                sub_h = np.empty(passive_indices.size)
+                for a in range(passive_indices.size):
+                    sub_h[a] = h[passive_indices[a]]
+                    for b in range(passive_indices.size):
+                        sub_gram[a, b] = gram[passive_indices[a], passive_indices[b]]
+                sub_solution = np.linalg.lstsq(sub_gram, sub_h)[0]
+
+                candidate = np.zeros(num_cols)
+                feasible = True
+                for a in range(passive_indices.size):
+                    candidate[passive_indices[a]] = sub_solution[a]
+                    if sub_solution[a] <= 0:
+                        feasible = False
+                if feasible:
+                    coefs = candidate
+                    break
+
+                # move towards the candidate until a variable hits zero and remove it
+                alpha = 1.0
+                for j in passive_indices:
+                    if candidate[j] <= 0:
+                        alpha = min(alpha, coefs[j] / (coefs[j] - candidate[j]))
+                coefs = coefs + alpha * (candidate - coefs)
+                for j in passive_indices:
+                    if coefs[j] <= tol * 1e-3:
+                        coefs[j] = 0.0
+                        passive[j] = False
+                if not passive[best]:
+                    # the entering variable cannot become positive (numerical limit)
+                    break
+
+            gradient = h - gram @ coefs
+            if not passive[best]:
+                gradient[best] = 0.0
+
+        return coefs
+
+
 ### Debugging ###
 def _plot_collisions(sorting_analyzer, sparsity=None, num_collisions=None):
     """
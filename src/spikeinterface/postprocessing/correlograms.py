@@ -42,8 +42,13 @@ class ComputeCorrelograms(AnalyzerExtension):
         The bin size in ms. This determines the bin size over which to
         combine lags. For example, with a window size of -25 ms to 25 ms, and
         bin size 1 ms, the correlation will be binned as -25 ms, -24 ms, ...
-    method : "auto" | "numpy" | "numba", default: "auto"
+    method : "auto" | "numpy" | "numba" | "binned", default: "auto"
          If "auto" and numba is installed, numba is used, otherwise numpy is used.
+         If "binned", the spike trains are first binned with `bin_ms` and all correlograms
+         are computed at once with FFT or sparse matrix products (whichever has the lowest
+         estimated cost). This is much faster for long windows (e.g. 1 s) but, as the lag of
+         a pair of spikes is the difference of their bin indices, counts can be shifted by
+         one bin compared to the exact "numpy" and "numba" methods.
     fast_mode : "auto" | "on" | "off", default: "auto"
         If "auto", a faster multithreaded implementations is used if method is "numba" and
         if the number of units is greater than 300.
@@ -454,7 +459,7 @@ def _compute_correlograms_on_sorting(sorting, window_ms, bin_ms, method="auto",
     bin_ms : float
         The size of which to bin lags, in ms.
     method : str
-        To use "numpy" or "numba". "auto" will use numba if available,
+        To use "numpy", "numba" or "binned". "auto" will use numba if available,
         otherwise numpy.
     fast_mode : "auto" | "on" | "off", default: "auto"
         If "auto", a faster multithreaded implementations is used if method is "numba" and
@@ -470,7 +475,7 @@ def _compute_correlograms_on_sorting(sorting, window_ms, bin_ms, method="auto",
     bins : np.array
         The bins edges in ms
     """
-    assert method in ("auto", "numba", "numpy"), "method must be 'auto', 'numba' or 'numpy'"
+    assert method in ("auto", "numba", "numpy", "binned"), "method must be 'auto', 'numba', 'numpy' or 'binned'"
 
     if method == "auto":
         method = "numba" if HAVE_NUMBA else "numpy"
@@ -489,6 +494,8 @@ def _compute_correlograms_on_sorting(sorting, window_ms, bin_ms, method="auto",
         correlograms = _compute_correlograms_numpy(sorting, window_size, bin_size)
     if method == "numba":
         correlograms = _compute_correlograms_numba(sorting, window_size, bin_size, fast_mode=fast_mode, **job_kwargs)
+    if method == "binned":
+        correlograms = _compute_correlograms_binned(sorting, window_size, bin_size)
 
     return correlograms, bins
 
@@ -692,6 +699,168 @@ def _compute_correlograms_numba(sorting, window_size, bin_size, fast_mode, **job
     return correlograms
 
 
+def _compute_correlograms_binned(sorting, window_size, bin_size, engine="auto"):
+    """
+    Computes cross-correlograms between all units in `sorting` from binned spike trains.
+
+    Each segment is binned with `bin_size` (sparsely, only the bins of the spikes are kept)
+    and the lag of a pair of spikes is the difference of their bin indices. All pairs are then
+    computed at once either with FFT on blocks of bins or with one sparse matrix product per lag.
+    Contrary to the brute force methods, the cost does not depend on the number of spikes
+    inside the window, which makes it suitable for long windows.
+
+    Parameters
+    ----------
+    sorting : Sorting
+        A SpikeInterface Sorting object
+    window_size : int
+        The window size over which to perform the cross-correlation, in samples
+    bin_size : int
+        The size of which to bin lags, in samples.
+    engine : "auto" | "fft" | "sparse", default: "auto"
+        The engine used for each segment. If "auto", the one with the lowest estimated
+        cost is chosen, see `_estimate_binned_correlograms_engine()`.
+
+    Returns
+    -------
+    correlograms: np.array
+        A (num_units, num_units, num_bins) array of correlograms
+        between all units at each lag time bin.
+    """
+    assert engine in ("auto", "fft", "sparse"), "engine must be 'auto', 'fft' or 'sparse'"
+
+    num_bins, num_half_bins = _compute_num_bins(window_size, bin_size)
+    num_units = len(sorting.unit_ids)
+
+    spikes = sorting.to_spike_vector(concatenated=False)
+    correlograms = np.zeros((num_units, num_units, num_bins), dtype=np.int64)
+
+    for seg_index in range(sorting.get_num_segments()):
+        spike_bins = spikes[seg_index]["sample_index"].astype(np.int64) // bin_size
+        spike_unit_indices = spikes[seg_index]["unit_index"].astype(np.int64)
+        if spike_bins.size == 0:
+            continue
+        num_time_bins = int(spike_bins[-1]) + 1
+
+        seg_engine = engine
+        if seg_engine == "auto":
+            seg_engine = _estimate_binned_correlograms_engine(spike_bins.size, num_units, num_time_bins, num_half_bins)
+
+        if seg_engine == "fft":
+            _correlograms_binned_fft(correlograms, spike_bins, spike_unit_indices, num_time_bins, num_half_bins)
+        else:
+            _correlograms_binned_sparse(correlograms, spike_bins, spike_unit_indices, num_time_bins, num_half_bins)
+
+        # each spike is paired with itself at lag 0, this is not a coincidence
+        spike_counts = np.bincount(spike_unit_indices, minlength=num_units)
+        correlograms[np.arange(num_units), np.arange(num_units), num_half_bins] -= spike_counts
+
+    return correlograms
+
+
+def _estimate_binned_correlograms_engine(num_spikes, num_units, num_time_bins, num_half_bins):
+    """
+    Simple cost model to choose between "fft" and "sparse" for `_compute_correlograms_binned()`.
+
+    The "sparse" engine makes one sparse product per positive lag, each costing a pass over the
+    spikes plus the number of coincident pairs at this lag.
+    The "fft" engine costs the FFT of every unit block plus one dense (num_units, num_units)
+    complex product per frequency and per block, which is done with BLAS and so is cheaper per
+    operation (the factor 0.25 is a rough empirical weight).
+    """
+    num_lags = num_half_bins + 1
+    sparse_cost = num_lags * (2.0 * num_spikes + num_spikes**2 / num_time_bins)
+
+    fft_size, block_size = _get_binned_fft_sizes(num_half_bins)
+    num_blocks = num_time_bins / block_size + 1
+    fft_cost = 2.0 * num_units * num_blocks * fft_size * np.log2(fft_size)
+    fft_cost += 0.25 * num_units**2 * num_blocks * (fft_size // 2 + 1)
+    fft_cost += num_units**2 * fft_size * np.log2(fft_size)
+
+    return "fft" if fft_cost < sparse_cost else "sparse"
+
+
+def _get_binned_fft_sizes(num_half_bins):
+    """
+    The blocks of the "fft" engine are correlated with blocks extended by `num_half_bins` on
+    both sides, so the FFT size must be at least block_size + 2 * num_half_bins to avoid
+    wrap-around. Using block_size = 2 * num_half_bins is a good balance.
+    """
+    block_size = max(2 * num_half_bins, 64)
+    fft_size = block_size + 2 * num_half_bins
+    return fft_size, block_size
+
+
+def _correlograms_binned_sparse(correlograms, spike_bins, spike_unit_indices, num_time_bins, num_half_bins):
+    """
+    Add the binned correlograms of one segment to `correlograms` using one sparse product
+    between the (num_units, num_time_bins) binned spike trains and their shifted version per lag.
+
+    The product for lag k >= 0 gives correlograms[:, :, num_half_bins + k] and, transposed,
+    correlograms[:, :, num_half_bins - k].
+    """
+    import scipy.sparse
+
+    num_units = correlograms.shape[0]
+    binned = scipy.sparse.csc_matrix(
+        (np.ones(spike_bins.size, dtype=np.int64), (spike_unit_indices, spike_bins)),
+        shape=(num_units, num_time_bins),
+    )
+
+    for lag in range(0, min(num_half_bins, num_time_bins - 1) + 1):
+        coincidences = (binned[:, lag:] @ binned[:, : num_time_bins - lag].T).toarray()
+        if lag < num_half_bins:
+            correlograms[:, :, num_half_bins + lag] += coincidences
+        if lag > 0:
+            correlograms[:, :, num_half_bins - lag] += coincidences.T
+
+
+def _correlograms_binned_fft(
+    correlograms, spike_bins, spike_unit_indices, num_time_bins, num_half_bins, max_memory_bytes=256 * 1024**2
+):
+    """
+    Add the binned correlograms of one segment to `correlograms` using FFT.
+
+    The binned spike trains are cut into blocks of `block_size` bins. For each block, the trains
+    of all units are correlated with the trains of all units on the same block extended by
+    `num_half_bins` on both sides. As the correlation is linear, the cross spectra are summed
+    over all blocks (with a batched matrix product per frequency) and only one inverse FFT
+    per pair of units is done at the end.
+    The blocks are processed by groups so that the dense binned trains of a group stay
+    below `max_memory_bytes`.
+    """
+    num_units = correlograms.shape[0]
+    fft_size, block_size = _get_binned_fft_sizes(num_half_bins)
+    num_freqs = fft_size // 2 + 1
+    num_blocks = num_time_bins // block_size + 1
+
+    blocks_per_group = max(1, int(max_memory_bytes // (num_units * num_freqs * 16 * 2)))
+
+    cross_spectra = np.zeros((num_freqs, num_units, num_units), dtype=np.complex128)
+    for first_block in range(0, num_blocks, blocks_per_group):
+        last_block = min(first_block + blocks_per_group, num_blocks)
+        start = first_block * block_size - num_half_bins
+        span = (last_block - first_block) * block_size + 2 * num_half_bins
+
+        # dense binned trains of the group, including the margins on both sides
+        i0, i1 = np.searchsorted(spike_bins, [start, start + span])
+        flat_indices = spike_unit_indices[i0:i1] * span + (spike_bins[i0:i1] - start)
+        traces = np.bincount(flat_indices, minlength=num_units * span).astype(np.float64).reshape(num_units, span)
+
+        windows = np.lib.stride_tricks.sliding_window_view(traces, block_size + 2 * num_half_bins, axis=1)
+        extended_blocks = windows[:, ::block_size][:, : last_block - first_block]
+        blocks = extended_blocks[:, :, num_half_bins : num_half_bins + block_size]
+
+        # shape (num_freqs, num_units, num_blocks_in_group) and (num_freqs, num_blocks_in_group, num_units)
+        spectra = np.fft.rfft(blocks, n=fft_size, axis=2).transpose(2, 0, 1)
+        extended_spectra = np.fft.rfft(extended_blocks, n=fft_size, axis=2).transpose(2, 1, 0)
+        cross_spectra += np.conj(spectra) @ extended_spectra
+
+    # xcorr[a, b, m] = sum_t train_a[t] * train_b[t + m - num_half_bins] so lag = num_half_bins - m
+    xcorr = np.fft.irfft(cross_spectra, n=fft_size, axis=0)[1 : 2 * num_half_bins + 1][::-1]
+    correlograms += np.rint(xcorr).astype(np.int64).transpose(1, 2, 0)
+
+
 if HAVE_NUMBA:
     import numba
 
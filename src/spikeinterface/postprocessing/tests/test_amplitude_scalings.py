@@ -4,6 +4,7 @@ import pytest
 from spikeinterface.postprocessing.tests.common_extension_tests import AnalyzerExtensionCommonTestSuite
 
 from spikeinterface.postprocessing import ComputeAmplitudeScalings
+from spikeinterface.postprocessing.amplitude_scalings import HAVE_NUMBA
 
 
 class TestAmplitudeScalingsExtension(AnalyzerExtensionCommonTestSuite):
@@ -35,3 +36,25 @@ class TestAmplitudeScalingsExtension(AnalyzerExtensionCommonTestSuite):
             scalings = ext.data["amplitude_scalings"][mask]
             median_scaling = np.median(scalings)
             np.testing.assert_array_equal(np.round(median_scaling), 1)
+
+    @pytest.mark.skipif(not HAVE_NUMBA, reason="Numba not available")
+    def test_collisions_batched(self, monkeypatch):
+        """
+        The compiled batched collision fitting should give the same scalings
+        as the per-collision `sklearn.LinearRegression` fit.
+        """
+        import spikeinterface.postprocessing.amplitude_scalings as amplitude_scalings_module
+
+        sorting_analyzer = self._prepare_sorting_analyzer(
+            "memory", sparse=True, extension_class=ComputeAmplitudeScalings
+        )
+        ext = sorting_analyzer.compute("amplitude_scalings", handle_collisions=True, delta_collision_ms=5)
+        scalings_batched = ext.data["amplitude_scalings"].copy()
+        collision_mask_batched = ext.data["collision_mask"].copy()
+        assert np.any(collision_mask_batched)
+
+        monkeypatch.setattr(amplitude_scalings_module, "HAVE_NUMBA", False)
+        ext = sorting_analyzer.compute("amplitude_scalings", handle_collisions=True, delta_collision_ms=5)
+
+        np.testing.assert_array_equal(collision_mask_batched, ext.data["collision_mask"])
+        np.testing.assert_allclose(scalings_batched, ext.data["amplitude_scalings"], rtol=1e-6, atol=1e-9)
@@ -22,6 +22,7 @@ from spikeinterface.postprocessing import ComputeACG3D, ComputeCorrelograms, Com
 from spikeinterface.postprocessing.correlograms import (
     _compute_3d_acg_one_unit,
     _compute_correlograms_on_sorting,
+    _compute_correlograms_binned,
     _compute_auto_correlograms_on_sorting,
     _make_bins,
     compute_acgs_3d,
@@ -40,6 +41,7 @@ class TestComputeCorrelograms(AnalyzerExtensionCommonTestSuite):
             dict(method="numpy"),
             dict(method="auto"),
             param(dict(method="numba"), marks=SKIP_NUMBA),
+            dict(method="binned"),
         ],
     )
     def test_extension(self, params):
@@ -135,6 +137,34 @@ def test_equal_results_correlograms(window_and_bin_ms):
     assert np.array_equal(result_numpy, result_numba)
 
 
+@pytest.mark.parametrize("engine", ["fft", "sparse"])
+@pytest.mark.parametrize("window_ms", [10.0, 60.0, 1000.0])
+def test_equal_results_binned_correlograms(engine, window_ms):
+    """
+    Test that the "binned" method gives the same results as the exact
+    "numpy" method when all spike times fall on the start of a time bin.
+    """
+    sampling_frequency = 30000.0
+    bin_ms = 1.0
+    bin_size = int(sampling_frequency * bin_ms / 1000)
+
+    rng = np.random.default_rng(seed=0)
+    samples_list, labels_list = [], []
+    for duration in (10.0, 3.5):
+        num_spikes = int(duration * 200)
+        samples_list.append(np.sort(rng.integers(0, int(duration * 1000), size=num_spikes)) * bin_size)
+        labels_list.append(rng.integers(0, 5, size=num_spikes))
+    sorting = NumpySorting.from_samples_and_labels(samples_list, labels_list, sampling_frequency)
+
+    result_numpy, bins_numpy = _compute_correlograms_on_sorting(
+        sorting, window_ms=window_ms, bin_ms=bin_ms, method="numpy"
+    )
+    bins, window_size, bin_size = _make_bins(sorting, window_ms, bin_ms)
+    result_binned = _compute_correlograms_binned(sorting, window_size, bin_size, engine=engine)
+
+    assert np.array_equal(result_numpy, result_binned)
+
+
 @pytest.mark.skipif(not HAVE_NUMBA, reason="Numba not available")
 @pytest.mark.parametrize("window_and_bin_ms", [(60.0, 2.0), (3.57, 1.6421)])
 def test_equal_results_fast_correlograms(window_and_bin_ms):
@@ -4,6 +4,11 @@ import numpy as np
 from spikeinterface.core.base import unit_period_dtype
 from spikeinterface.postprocessing.tests.common_extension_tests import AnalyzerExtensionCommonTestSuite
 from spikeinterface.postprocessing import ComputeValidUnitPeriods
+from spikeinterface.postprocessing.valid_unit_periods import (
+    compute_fps_and_fns_in_periods,
+    compute_subperiods,
+    fp_fn_worker_func,
+)
 
 
 class TestComputeValidUnitPeriods(AnalyzerExtensionCommonTestSuite):
@@ -138,3 +143,29 @@ class TestComputeValidUnitPeriods(AnalyzerExtensionCommonTestSuite):
         # check that valid periods correspond to intersection of auto-computed and user defined periods
         ext_periods = ext.get_data(outputs="numpy")
         assert len(ext_periods) <= len(periods)  # should be less or equal than user defined ones
+
+    def test_fps_and_fns_in_periods(self):
+        """
+        The vectorized computation of false positives and negatives should match
+        the per-period computation of `fp_fn_worker_func()`.
+        """
+        sorting_analyzer = self._prepare_sorting_analyzer(
+            "memory", sparse=False, extension_class=ComputeValidUnitPeriods
+        )
+        params = sorting_analyzer.get_default_extension_params(ComputeValidUnitPeriods.extension_name)
+        params.update(num_histogram_bins=10, amplitudes_bins_min_ratio=1)
+        _, periods_w_margins = compute_subperiods(sorting_analyzer, period_duration_s_absolute=1.0)
+
+        amp_scalings = sorting_analyzer.get_extension("amplitude_scalings")
+        fps, fns = compute_fps_and_fns_in_periods(
+            sorting_analyzer.sorting, amp_scalings.get_data(), periods_w_margins, params, num_threads=2
+        )
+
+        amplitudes_by_unit = amp_scalings.get_data(outputs="by_unit")
+        for i in range(len(periods_w_margins)):
+            fp, fn = fp_fn_worker_func(
+                periods_w_margins[i : i + 1], sorting_analyzer.sorting, amplitudes_by_unit, params
+            )
+            np.testing.assert_allclose(fps[i], fp, equal_nan=True)
+            np.testing.assert_allclose(fns[i], fn, equal_nan=True)
+        assert np.any(~np.isnan(fns))
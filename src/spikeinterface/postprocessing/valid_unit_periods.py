@@ -3,11 +3,6 @@ import warnings
 
 import numpy as np
 
-from concurrent.futures import ProcessPoolExecutor
-import multiprocessing as mp
-from threadpoolctl import threadpool_limits
-from tqdm.auto import tqdm
-
 from spikeinterface.core.base import unit_period_dtype
 from spikeinterface.core.job_tools import fix_job_kwargs
 from spikeinterface.core.sorting_tools import cast_periods_to_unit_period_dtype, remap_unit_indices_in_vector
@@ -379,38 +374,13 @@ class ComputeValidUnitPeriods(AnalyzerExtension):
 
             job_kwargs = fix_job_kwargs(job_kwargs)
             n_jobs = job_kwargs["n_jobs"]
-            progress_bar = job_kwargs["progress_bar"]
-            max_threads_per_worker = job_kwargs["max_threads_per_worker"]
-            mp_context = job_kwargs["mp_context"]
 
-            # Compute fp and fn for all periods
-            # Process units in parallel
+            # Compute fp and fn for all periods at once from the spike vector
             amp_scalings = sorting_analyzer.get_extension("amplitude_scalings")
-            all_amplitudes_by_unit = amp_scalings.get_data(outputs="by_unit", concatenated=False)
-
-            init_args = (sorting_analyzer.sorting, all_amplitudes_by_unit, self.params, max_threads_per_worker)
-
-            # Each item is one computation of fp and fn for one period and one unit
-            items = [(period,) for period in all_periods_w_margins]
-            job_name = f"computing false positives and negatives"
-
-            # parallel
-            with ProcessPoolExecutor(
-                max_workers=n_jobs,
-                initializer=fp_fn_worker_init,
-                mp_context=mp.get_context(mp_context),
-                initargs=init_args,
-            ) as executor:
-                results = executor.map(fp_fn_worker_func_wrapper, items)
-
-                if progress_bar:
-                    results = tqdm(results, desc=f"{job_name} (workers: {n_jobs} processes)", total=len(items))
-
-                all_fps = np.zeros(len(all_periods))
-                all_fns = np.zeros(len(all_periods))
-                for i, (fp, fn) in enumerate(results):
-                    all_fps[i] = fp
-                    all_fns[i] = fn
+            amplitudes = amp_scalings.get_data(outputs="numpy", copy=False)
+            all_fps, all_fns = compute_fps_and_fns_in_periods(
+                sorting_analyzer.sorting, amplitudes, all_periods_w_margins, self.params, num_threads=n_jobs
+            )
 
             # set NaNs to 1 (they will be exluded anyways)
             all_fps[np.isnan(all_fps)] = 1.0
@@ -721,20 +691,141 @@ register_result_extension(ComputeValidUnitPeriods)
 compute_valid_unit_periods = ComputeValidUnitPeriods.function_factory()
 
 
-global worker_ctx
+def compute_fps_and_fns_in_periods(sorting, amplitudes, periods, params, num_threads=1):
+    """
+    Compute false positives (refractory period contamination) and false negatives (amplitude cutoff)
+    for all periods (and units) at once.
+
+    The spike vector is reordered by (segment, unit, sample) so that the spikes of one unit in one
+    period are a contiguous slice, found for all periods with a single `np.searchsorted`.
+    The amplitude histograms of all periods are then computed with a single `np.bincount` pass
+    (with the same binning as `np.histogram`) and smoothed/cut at once, while the refractory
+    period violations are counted by a parallel numba kernel over periods.
+    This gives the same result as `fp_fn_worker_func()` applied to each period.
+
+    Parameters
+    ----------
+    sorting : BaseSorting
+        The sorting object.
+    amplitudes : np.ndarray
+        The amplitudes (e.g. amplitude scalings) of all spikes, aligned with the concatenated spike vector.
+    periods : np.ndarray
+        Array of dtype unit_period_dtype with the periods (including margins) on which to estimate the rates.
+    params : dict
+        The ComputeValidUnitPeriods params.
+    num_threads : int, default: 1
+        Number of threads used to count refractory period violations.
+
+    Returns
+    -------
+    fps : np.ndarray
+        The false positive rate of each period (NaN if not enough spikes).
+    fns : np.ndarray
+        The false negative rate of each period (NaN if not enough spikes).
+    """
+    from scipy.ndimage import gaussian_filter1d
+
+    num_units = len(sorting.unit_ids)
+    num_segments = sorting.get_num_segments()
+    spikes = sorting.to_spike_vector()
+
+    # reorder spikes by (segment, unit, sample): one contiguous block per segment and unit
+    order = np.lexsort((spikes["sample_index"], spikes["unit_index"], spikes["segment_index"]))
+    samples = spikes["sample_index"][order].astype(np.int64)
+    amplitudes = np.asarray(amplitudes)[order].astype(np.float64)
+    blocks = spikes["segment_index"][order].astype(np.int64) * num_units + spikes["unit_index"][order]
+    block_bounds = np.searchsorted(blocks, np.arange(num_segments * num_units + 1))
+
+    # make sure amplitudes are positive (median sign per segment and unit)
+    for block_index in range(num_segments * num_units):
+        i0, i1 = block_bounds[block_index], block_bounds[block_index + 1]
+        if i1 > i0 and np.median(amplitudes[i0:i1]) < 0:
+            amplitudes[i0:i1] = -amplitudes[i0:i1]
+
+    # slice of each period in the reordered spikes
+    stride = max(int(np.max(periods["end_sample_index"], initial=0)), int(np.max(samples, initial=0))) + 1
+    spike_keys = blocks * stride + samples
+    period_keys = (periods["segment_index"].astype(np.int64) * num_units + periods["unit_index"]) * stride
+    period_starts = np.searchsorted(spike_keys, period_keys + periods["start_sample_index"])
+    period_ends = np.searchsorted(spike_keys, period_keys + periods["end_sample_index"])
+    num_spikes = period_ends - period_starts
+    total_samples = (periods["end_sample_index"] - periods["start_sample_index"]).astype(np.int64)
+
+    # false positives: refractory period violations
+    fs = sorting.sampling_frequency
+    t_c = int(round(params["censored_period_ms"] * fs * 1e-3))
+    t_r = int(round(params["refractory_period_ms"] * fs * 1e-3))
+    num_threads = max(1, min(num_threads, numba.config.NUMBA_NUM_THREADS))
+    n_v = _compute_nb_violations_in_periods_numba(samples, period_starts, period_ends, t_r, num_threads)
+    fps = np.full(len(periods), np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        denom = 1 - n_v * (total_samples - 2 * num_spikes * t_c) / (num_spikes**2 * (t_r - t_c))
+    valid_fp = num_spikes > 1
+    fps[valid_fp] = np.where(denom[valid_fp] < 0, 1.0, 1 - np.sqrt(np.maximum(denom[valid_fp], 0)))
+
+    # false negatives: amplitude cutoff
+    num_bins = params["num_histogram_bins"]
+    fns = np.full(len(periods), np.nan)
+    (valid_fn,) = np.nonzero((num_spikes / num_bins >= params["amplitudes_bins_min_ratio"]) & (num_spikes > 0))
+    if valid_fn.size > 0:
+        counts = num_spikes[valid_fn]
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+        member_periods = np.repeat(np.arange(valid_fn.size), counts)
+        member_spikes = np.repeat(period_starts[valid_fn] - offsets[:-1], counts) + np.arange(offsets[-1])
+        amps = amplitudes[member_spikes]
+
+        # same binning as np.histogram(amps, num_bins) for each period
+        first_edges = np.minimum.reduceat(amps, offsets[:-1])
+        last_edges = np.maximum.reduceat(amps, offsets[:-1])
+        same = first_edges == last_edges
+        first_edges[same] -= 0.5
+        last_edges[same] += 0.5
+        bin_edges = np.linspace(first_edges, last_edges, num_bins + 1, axis=1)
+        norm_denom = (last_edges - first_edges)[member_periods]
+        bin_indices = (((amps - first_edges[member_periods]) / norm_denom) * num_bins).astype(np.intp)
+        bin_indices[bin_indices == num_bins] -= 1
+        decrement = amps < bin_edges[member_periods, bin_indices]
+        bin_indices[decrement] -= 1
+        increment = (amps >= bin_edges[member_periods, bin_indices + 1]) & (bin_indices != num_bins - 1)
+        bin_indices[increment] += 1
+        histograms = np.bincount(member_periods * num_bins + bin_indices, minlength=valid_fn.size * num_bins).reshape(
+            valid_fn.size, num_bins
+        )
+
+        pdfs = gaussian_filter1d(histograms, params["histogram_smoothing_value"], mode="nearest", axis=1)
+        # last occurrence where pdf was greater than the first bin and sum of the pdf after it
+        above_cutoff = pdfs >= pdfs[:, :1]
+        last_above = num_bins - 1 - np.argmax(above_cutoff[:, ::-1], axis=1)
+        tail_sums = np.zeros((valid_fn.size, num_bins + 1), dtype=pdfs.dtype)
+        tail_sums[:, :-1] = np.cumsum(pdfs[:, ::-1], axis=1)[:, ::-1]
+        num_missed_spikes = tail_sums[np.arange(valid_fn.size), last_above + 1]
+        fraction_missing = num_missed_spikes / (counts + num_missed_spikes)
+        fns[valid_fn] = np.minimum(fraction_missing, 0.5)
 
+    return fps, fns
 
-def fp_fn_worker_init(sorting, all_amplitudes_by_unit, params, max_threads_per_worker):
-    global worker_ctx
-    worker_ctx = {}
 
-    # cache spike vector and spiketrains
-    sorting.precompute_spike_trains()
+if HAVE_NUMBA:
+    import numba
 
-    worker_ctx["sorting"] = sorting
-    worker_ctx["all_amplitudes_by_unit"] = all_amplitudes_by_unit
-    worker_ctx["params"] = params
-    worker_ctx["max_threads_per_worker"] = max_threads_per_worker
+    @numba.jit(nopython=True, nogil=True, cache=False, parallel=True)
+    def _compute_nb_violations_in_periods_numba(samples, period_starts, period_ends, t_r, num_threads):
+        """
+        Count refractory period violations (pairs of spikes closer than `t_r`) in each
+        period, given by its slice `period_starts[p]:period_ends[p]` in the sorted `samples`.
+        """
+        numba.set_num_threads(num_threads)
+        num_periods = period_starts.size
+        n_v = np.zeros(num_periods, dtype=np.int64)
+        for p in numba.prange(num_periods):
+            count = 0
+            for i in range(period_starts[p], period_ends[p]):
+                for j in range(i + 1, period_ends[p]):
+                    if samples[j] - samples[i] > t_r:
+                        break
+                    count += 1
+            n_v[p] = count
+        return n_v
 
 
 def fp_fn_worker_func(period, sorting, all_amplitudes_by_unit, params):
@@ -789,15 +880,3 @@ def fp_fn_worker_func(period, sorting, all_amplitudes_by_unit, params):
         params["amplitudes_bins_min_ratio"],
     )
     return fp, fn
-
-
-def fp_fn_worker_func_wrapper(period):
-    global worker_ctx
-    with threadpool_limits(limits=worker_ctx["max_threads_per_worker"]):
-        fp, fn = fp_fn_worker_func(
-            period,
-            worker_ctx["sorting"],
-            worker_ctx["all_amplitudes_by_unit"],
-            worker_ctx["params"],
-        )
-    return fp, fn
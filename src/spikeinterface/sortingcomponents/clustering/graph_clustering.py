@@ -3,6 +3,7 @@ from pathlib import Path
 import numpy as np
 
 
+from spikeinterface.core.job_tools import fix_job_kwargs
 from spikeinterface.sortingcomponents.waveforms.peak_svd import extract_peaks_svd
 from spikeinterface.sortingcomponents.clustering.graph_tools import create_graph_from_peak_features
 
@@ -36,6 +37,9 @@ class GraphClustering:
             # sparse_mode="connected_to_all_neighbors"
             apply_local_svd=True,
             enforce_diagonal_to_zero=True,
+            # knn_method="nn_descent",
+            knn_method="exact",
+            cache_folder=None,
         ),
         "clusterer": dict(
             method="sknetwork-louvain",
@@ -55,6 +59,9 @@ class GraphClustering:
         See spikeinterface.sortingcomponents.waveforms.peak_svd.extract_peaks_svd
                         for more details.,
         seed : Random seed for reproducibility.,
+        graph_kwargs : params for the graph construction. See
+                 spikeinterface.sortingcomponents.clustering.graph_tools.create_graph_from_peak_features
+                 for more details (knn_method="nn_descent" for large number of peaks).,
         merge_from_templates : params for the merging step based on templates. See
                  spikeinterface.sortingcomponents.clustering.merging_tools.merge_peak_labels_from_templates
                  for more details.,
@@ -106,6 +113,9 @@ class GraphClustering:
 
         ensure_symetric = clustering_method in ("hdbscan",)
 
+        if "n_jobs" not in graph_kwargs:
+            graph_kwargs["n_jobs"] = fix_job_kwargs(job_kwargs)["n_jobs"]
+
         distances = create_graph_from_peak_features(
             recording,
             peaks,
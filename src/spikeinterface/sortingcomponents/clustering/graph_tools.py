@@ -1,9 +1,19 @@
+import importlib
+from pathlib import Path
+
 import numpy as np
 
 from tqdm.auto import tqdm
 
 from spikeinterface.sortingcomponents.clustering.tools import aggregate_sparse_features
 
+numba_spec = importlib.util.find_spec("numba")
+if numba_spec is not None:
+    HAVE_NUMBA = True
+    import numba
+else:
+    HAVE_NUMBA = False
+
 
 def create_graph_from_peak_features(
     recording,
@@ -25,6 +35,11 @@ def create_graph_from_peak_features(
     n_neighbors=20,
     ensure_symetric=False,
     enforce_diagonal_to_zero=True,
+    knn_method="exact",
+    knn_target_recall=0.95,
+    knn_max_iter=10,
+    n_jobs=1,
+    cache_folder=None,
     progress_bar=True,
 ):
     """
@@ -45,15 +60,45 @@ def create_graph_from_peak_features(
       * the corrected peak location if the peak_features is computed with motion_awre in mind
 
     Note : the binarization works for linear probe only. This need to be extended to 2d grid binarization for planar mea.
+
+    For sparse_mode="knn", knn_method can be:
+      * "exact" : exact neighbours with sklearn NearestNeighbors
+      * "nn_descent" : approximate neighbours with NN-descent (numba), the iterations stop when the recall
+        estimated on a subset of peaks reaches knn_target_recall or after knn_max_iter iterations.
+        This is much faster for bins with many peaks.
+
+    Bins are processed with n_jobs threads.
+    If cache_folder is given, the graph is saved in this folder and reloaded when called again with the same
+    peaks, features and parameters.
     """
 
     import scipy.sparse
-    from scipy.spatial.distance import cdist
 
-    if sparse_mode == "knn":
-        from sklearn.neighbors import NearestNeighbors
-    if apply_local_svd:
-        from sklearn.decomposition import TruncatedSVD
+    if cache_folder is not None:
+        graph_params = dict(
+            bin_mode=bin_mode,
+            neighbors_radius_um=neighbors_radius_um,
+            bin_um=bin_um,
+            direction=direction,
+            sparse_mode=sparse_mode,
+            apply_local_svd=apply_local_svd,
+            n_components=n_components,
+            seed=seed,
+            normed_distances=normed_distances,
+            n_neighbors=n_neighbors,
+            ensure_symetric=ensure_symetric,
+            enforce_diagonal_to_zero=enforce_diagonal_to_zero,
+            knn_method=knn_method,
+            knn_target_recall=knn_target_recall,
+            knn_max_iter=knn_max_iter,
+        )
+        graph_hash = _get_graph_hash(recording, peaks, peak_features, sparse_mask, peak_locations, graph_params)
+        cache_file = Path(cache_folder) / f"graph_{graph_hash}.npz"
+        if cache_file.exists():
+            return scipy.sparse.load_npz(cache_file)
+
+    if sparse_mode == "knn" and knn_method == "nn_descent" and not HAVE_NUMBA:
+        raise ImportError("create_graph_from_peak_features() knn_method='nn_descent' needs numba")
 
     channel_locations = recording.get_channel_locations()
 
@@ -118,83 +163,32 @@ def create_graph_from_peak_features(
     else:
         raise ValueError("create_graph_from_peak_features : wrong bin_mode")
 
-    if progress_bar:
-        loop = tqdm(loop, desc=f"Build distance graph over {bin_mode}")
-
-    local_graphs = []
-    row_indices = []
-    for local_chans, neighbors_indices, target_local_inds in loop:
-        target_indices = neighbors_indices[target_local_inds]
-        row_indices.append(target_indices)
-
-        if target_indices.size == 0:
-            continue
-
-        local_feats, dont_have_channels = aggregate_sparse_features(
-            peaks, neighbors_indices, peak_features, sparse_mask, local_chans
+    local_graph_kwargs = dict(
+        sparse_mode=sparse_mode,
+        apply_local_svd=apply_local_svd,
+        n_components=n_components,
+        seed=seed,
+        normed_distances=normed_distances,
+        n_neighbors=n_neighbors,
+        knn_method=knn_method,
+        knn_target_recall=knn_target_recall,
+        knn_max_iter=knn_max_iter,
+    )
+
+    def compute_one_bin(args):
+        local_chans, neighbors_indices, target_local_inds = args
+        return _create_local_graph(
+            peaks, peak_features, sparse_mask, local_chans, neighbors_indices, target_local_inds, **local_graph_kwargs
         )
 
-        # if np.sum(dont_have_channels) > 0:
-        #     print("dont_have_channels", np.sum(dont_have_channels), "for n=", neighbors_indices.size, "bin", b0, b1)
-
-        flatten_feat = local_feats.reshape(local_feats.shape[0], -1)
-
-        if apply_local_svd:
-            if isinstance(n_components, int):
-                n_components = min(n_components, flatten_feat.shape[1])
-                tsvd = TruncatedSVD(n_components, random_state=seed)
-                flatten_feat = tsvd.fit_transform(flatten_feat)
-
-            elif isinstance(n_components, float):
-                assert 0 < n_components < 1, "n_components should be in ]0, 1["
-                tsvd = TruncatedSVD(flatten_feat.shape[1], random_state=seed)
-                flatten_feat = tsvd.fit_transform(flatten_feat)
-                n_explain = np.sum(np.cumsum(tsvd.explained_variance_ratio_) <= n_components) + 1
-                flatten_feat = flatten_feat[:, :n_explain]
-
-        if sparse_mode == "connected_to_all_neighbors":
-            local_dists = cdist(flatten_feat[target_local_inds], flatten_feat)
-
-            if normed_distances:
-                norm = np.linalg.norm(flatten_feat, axis=1)
-                local_dists /= norm[target_local_inds, None] + norm[None, :]
+    from concurrent.futures import ThreadPoolExecutor
 
-            data = local_dists.flatten().astype("float32")
-            indptr = np.arange(0, local_dists.size + 1, local_dists.shape[1])
-            indices = np.concatenate([neighbors_indices] * target_indices.size)
-            local_graph = scipy.sparse.csr_matrix((data, indices, indptr), shape=(target_indices.size, peaks.size))
-            local_graphs.append(local_graph)
-
-        elif sparse_mode == "knn":
-            # nn_tree = NearestNeighbors(n_neighbors=min(n_neighbors, target_local_inds.size), metric="minkowski", p=2) # euclidean
-            nn_tree = NearestNeighbors(n_neighbors=min(n_neighbors, target_local_inds.size))  # euclidean
-            nn_tree.fit(flatten_feat)
-            local_sparse_dist = nn_tree.kneighbors_graph(flatten_feat[target_local_inds], mode="distance")
-
-            # t1 = time.perf_counter()
-            # print("knn", t1-t0)
-
-            # remap to all columns
-            # t0 = time.perf_counter()
-            data = local_sparse_dist.data.astype("float32")
-            indptr = local_sparse_dist.indptr
-            if normed_distances:
-                for i in range(local_sparse_dist.shape[0]):
-                    src = flatten_feat[target_local_inds[i]]
-                    a, b = indptr[i], indptr[i + 1]
-                    tgt = flatten_feat[local_sparse_dist.indices[a:b]]
-                    norm = np.linalg.norm(src) + np.linalg.norm(tgt, axis=1)
-                    data[a:b] /= norm
-            indices = neighbors_indices[local_sparse_dist.indices]
-            local_graph = scipy.sparse.csr_matrix((data, indices, indptr), shape=(target_indices.size, peaks.size))
-
-            # t1 = time.perf_counter()
-            # print("make local sparse csr", t1-t0)
-
-            local_graphs.append(local_graph)
-
-        else:
-            raise ValueError("create_graph_from_peak_features() wrong mode")
+    row_indices = [neighbors_indices[target_local_inds] for _, neighbors_indices, target_local_inds in loop]
+    with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+        results = executor.map(compute_one_bin, loop)
+        if progress_bar:
+            results = tqdm(results, desc=f"Build distance graph over {bin_mode}", total=len(loop))
+        local_graphs = [local_graph for local_graph in results if local_graph is not None]
 
     # stack all local distances in a big sparse one
     if len(local_graphs) > 0:
@@ -227,4 +221,338 @@ def create_graph_from_peak_features(
         # this trick force the symetry
         distances = distances.maximum(distances.T)
 
+    if cache_folder is not None:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        scipy.sparse.save_npz(cache_file, distances)
+
     return distances
+
+
+def _create_local_graph(
+    peaks,
+    peak_features,
+    sparse_mask,
+    local_chans,
+    neighbors_indices,
+    target_local_inds,
+    sparse_mode,
+    apply_local_svd,
+    n_components,
+    seed,
+    normed_distances,
+    n_neighbors,
+    knn_method,
+    knn_target_recall,
+    knn_max_iter,
+):
+    """
+    Compute the distances from the target peaks of one bin to the peaks of the bin and its neighbours.
+    Return a csr matrix with shape (num_target_peaks, num_peaks) or None when the bin has no target peaks.
+    """
+    import scipy.sparse
+    from scipy.spatial.distance import cdist
+
+    if apply_local_svd:
+        from sklearn.decomposition import TruncatedSVD
+
+    target_indices = neighbors_indices[target_local_inds]
+    if target_indices.size == 0:
+        return None
+
+    local_feats, dont_have_channels = aggregate_sparse_features(
+        peaks, neighbors_indices, peak_features, sparse_mask, local_chans
+    )
+
+    # if np.sum(dont_have_channels) > 0:
+    #     print("dont_have_channels", np.sum(dont_have_channels), "for n=", neighbors_indices.size, "bin", b0, b1)
+
+    flatten_feat = local_feats.reshape(local_feats.shape[0], -1)
+
+    if apply_local_svd:
+        if isinstance(n_components, int):
+            n_components = min(n_components, flatten_feat.shape[1])
+            tsvd = TruncatedSVD(n_components, random_state=seed)
+            flatten_feat = tsvd.fit_transform(flatten_feat)
+
+        elif isinstance(n_components, float):
+            assert 0 < n_components < 1, "n_components should be in ]0, 1["
+            tsvd = TruncatedSVD(flatten_feat.shape[1], random_state=seed)
+            flatten_feat = tsvd.fit_transform(flatten_feat)
+            n_explain = np.sum(np.cumsum(tsvd.explained_variance_ratio_) <= n_components) + 1
+            flatten_feat = flatten_feat[:, :n_explain]
+
+    if sparse_mode == "connected_to_all_neighbors":
+        local_dists = cdist(flatten_feat[target_local_inds], flatten_feat)
+
+        if normed_distances:
+            norm = np.linalg.norm(flatten_feat, axis=1)
+            local_dists /= norm[target_local_inds, None] + norm[None, :]
+
+        data = local_dists.flatten().astype("float32")
+        indptr = np.arange(0, local_dists.size + 1, local_dists.shape[1])
+        indices = np.concatenate([neighbors_indices] * target_indices.size)
+        local_graph = scipy.sparse.csr_matrix((data, indices, indptr), shape=(target_indices.size, peaks.size))
+
+    elif sparse_mode == "knn":
+        local_n_neighbors = min(n_neighbors, target_local_inds.size)
+        # NN-descent is only worth it (and only valid) for bins with many peaks
+        if knn_method == "nn_descent" and flatten_feat.shape[0] > 4 * local_n_neighbors:
+            local_sparse_dist = nn_descent_kneighbors_graph(
+                flatten_feat,
+                local_n_neighbors,
+                target_local_inds,
+                target_recall=knn_target_recall,
+                max_iter=knn_max_iter,
+                seed=seed,
+            )
+        elif knn_method in ("exact", "nn_descent"):
+            from sklearn.neighbors import NearestNeighbors
+
+            # nn_tree = NearestNeighbors(n_neighbors=local_n_neighbors, metric="minkowski", p=2) # euclidean
+            nn_tree = NearestNeighbors(n_neighbors=local_n_neighbors)  # euclidean
+            nn_tree.fit(flatten_feat)
+            local_sparse_dist = nn_tree.kneighbors_graph(flatten_feat[target_local_inds], mode="distance")
+        else:
+            raise ValueError("create_graph_from_peak_features() wrong knn_method")
+
+        # remap to all columns
+        data = local_sparse_dist.data.astype("float32")
+        indptr = local_sparse_dist.indptr
+        if normed_distances:
+            for i in range(local_sparse_dist.shape[0]):
+                src = flatten_feat[target_local_inds[i]]
+                a, b = indptr[i], indptr[i + 1]
+                tgt = flatten_feat[local_sparse_dist.indices[a:b]]
+                norm = np.linalg.norm(src) + np.linalg.norm(tgt, axis=1)
+                data[a:b] /= norm
+        indices = neighbors_indices[local_sparse_dist.indices]
+        local_graph = scipy.sparse.csr_matrix((data, indices, indptr), shape=(target_indices.size, peaks.size))
+
+    else:
+        raise ValueError("create_graph_from_peak_features() wrong mode")
+
+    return local_graph
+
+
+def _get_graph_hash(recording, peaks, peak_features, sparse_mask, peak_locations, graph_params):
+    import hashlib
+
+    hasher = hashlib.sha1()
+    hasher.update(np.ascontiguousarray(recording.get_channel_locations()).tobytes())
+    hasher.update(np.ascontiguousarray(peaks["sample_index"]).tobytes())
+    hasher.update(np.ascontiguousarray(peaks["channel_index"]).tobytes())
+    hasher.update(np.ascontiguousarray(peak_features).tobytes())
+    hasher.update(np.ascontiguousarray(sparse_mask).tobytes())
+    if peak_locations is not None:
+        hasher.update(np.ascontiguousarray(peak_locations).tobytes())
+    hasher.update(str(sorted(graph_params.items())).encode())
+    return hasher.hexdigest()
+
+
+def nn_descent_kneighbors_graph(
+    data, n_neighbors, query_inds=None, target_recall=0.95, max_iter=10, seed=None, num_recall_samples=100
+):
+    """
+    Approximate k nearest neighbours graph with NN-descent.
+
+    The neighbours of the neighbours of each point are iteratively explored to improve the current guess.
+    The iterations stop when the recall estimated with an exact search on num_recall_samples random points
+    reaches target_recall, or after max_iter iterations. When the graph converges below target_recall, more
+    candidates are explored at each iteration.
+
+    Parameters
+    ----------
+    data : np.array
+        The points with shape (num_points, num_features).
+    n_neighbors : int
+        Number of neighbours, including the point itself (same convention as sklearn kneighbors_graph).
+    query_inds : np.array | None, default: None
+        Points for which the neighbours are returned. All points when None.
+    target_recall : float, default: 0.95
+        The fraction of the exact neighbours to reach before stopping.
+    max_iter : int, default: 10
+        Maximum number of iterations.
+    seed : int | None, default: None
+        Random seed.
+    num_recall_samples : int, default: 100
+        Number of points used to estimate the recall.
+
+    Returns
+    -------
+    graph : scipy.sparse.csr_matrix
+        The distances graph with shape (num_queries, num_points), the first neighbour of each point is itself.
+    """
+    import scipy.sparse
+
+    data = np.ascontiguousarray(data, dtype="float32")
+    num_points = data.shape[0]
+    k = n_neighbors - 1
+    assert num_points > 2 * k, "nn_descent_kneighbors_graph() needs more points than neighbours"
+    if query_inds is None:
+        query_inds = np.arange(num_points)
+
+    rng = np.random.default_rng(seed)
+    heap_inds = np.full((num_points, k), -1, dtype="int64")
+    heap_dists = np.full((num_points, k), np.inf, dtype="float32")
+    heap_flags = np.zeros((num_points, k), dtype="bool")
+    if k > 0:
+        max_candidates = min(k, 60)
+        _nn_descent_init(data, heap_inds, heap_dists, heap_flags, rng.integers(2**31))
+
+        num_recall_samples = min(num_recall_samples, num_points)
+        recall_inds = rng.choice(num_points, size=num_recall_samples, replace=False)
+        exact_inds = _exact_neighbors(data, recall_inds, k)
+        for _ in range(max_iter):
+            num_updates = _nn_descent_iteration(
+                data, heap_inds, heap_dists, heap_flags, max_candidates, rng.integers(2**31)
+            )
+            recall = np.mean(
+                [np.intersect1d(exact_inds[i], heap_inds[ind]).size / k for i, ind in enumerate(recall_inds)]
+            )
+            if recall >= target_recall:
+                break
+            if num_updates <= 0.001 * num_points * k:
+                # converged below the target recall : explore more candidates
+                if max_candidates >= 60:
+                    break
+                max_candidates = min(2 * max_candidates, 60)
+
+    order = np.argsort(heap_dists[query_inds], axis=1)
+    neighbors_inds = np.take_along_axis(heap_inds[query_inds], order, axis=1)
+    neighbors_dists = np.sqrt(np.take_along_axis(heap_dists[query_inds], order, axis=1))
+
+    num_queries = query_inds.size
+    indices = np.concatenate([query_inds[:, None], neighbors_inds], axis=1).flatten()
+    distances = np.concatenate([np.zeros((num_queries, 1), dtype="float32"), neighbors_dists], axis=1).flatten()
+    indptr = np.arange(0, indices.size + 1, n_neighbors)
+    return scipy.sparse.csr_matrix((distances, indices, indptr), shape=(num_queries, num_points))
+
+
+def _exact_neighbors(data, inds, k):
+    # brute force with |a - b|^2 = |a|^2 + |b|^2 - 2 a.b, excluding the point itself
+    sq_norms = np.sum(data.astype("float64") ** 2, axis=1)
+    dists = sq_norms[inds, None] + sq_norms[None, :] - 2 * data[inds].astype("float64") @ data.T.astype("float64")
+    dists[np.arange(inds.size), inds] = np.inf
+    return np.argpartition(dists, k - 1, axis=1)[:, :k]
+
+
+if HAVE_NUMBA:
+
+    @numba.jit(nopython=True, nogil=True)
+    def _squared_distance(data, i, j):
+        d = 0.0
+        for f in range(data.shape[1]):
+            d += (data[i, f] - data[j, f]) ** 2
+        return d
+
+    @numba.jit(nopython=True, nogil=True)
+    def _heap_push(heap_inds, heap_dists, heap_flags, row, ind, dist, flag):
+        # each row is a max-heap on distances : the root is the farthest neighbour
+        if dist >= heap_dists[row, 0]:
+            return 0
+        k = heap_inds.shape[1]
+        for i in range(k):
+            if heap_inds[row, i] == ind:
+                return 0
+        # replace the root and sift down
+        i = 0
+        while True:
+            left = 2 * i + 1
+            right = left + 1
+            if left >= k:
+                break
+            if right >= k or heap_dists[row, left] >= heap_dists[row, right]:
+                child = left
+            else:
+                child = right
+            if heap_dists[row, child] > dist:
+                heap_inds[row, i] = heap_inds[row, child]
+                heap_dists[row, i] = heap_dists[row, child]
+                heap_flags[row, i] = heap_flags[row, child]
+                i = child
+            else:
+                break
+        heap_inds[row, i] = ind
+        heap_dists[row, i] = dist
+        heap_flags[row, i] = flag
+        return 1
+
+    @numba.jit(nopython=True, nogil=True)
+    def _add_candidate(candidates, counts, row, ind):
+        # reservoir sampling of the candidates
+        count = counts[row]
+        if count < candidates.shape[1]:
+            candidates[row, count] = ind
+        else:
+            r = np.random.randint(count + 1)
+            if r < candidates.shape[1]:
+                candidates[row, r] = ind
+        counts[row] = count + 1
+
+    @numba.jit(nopython=True, nogil=True)
+    def _nn_descent_init(data, heap_inds, heap_dists, heap_flags, seed):
+        np.random.seed(seed)
+        num_points, k = heap_inds.shape
+        for i in range(num_points):
+            num_filled = 0
+            while num_filled < k:
+                j = np.random.randint(num_points)
+                if j != i:
+                    num_filled += _heap_push(
+                        heap_inds, heap_dists, heap_flags, i, j, _squared_distance(data, i, j), True
+                    )
+
+    @numba.jit(nopython=True, nogil=True)
+    def _nn_descent_iteration(data, heap_inds, heap_dists, heap_flags, max_candidates, seed):
+        np.random.seed(seed)
+        num_points, k = heap_inds.shape
+
+        # new (not yet explored) and old candidates, forward and reverse
+        new_candidates = np.full((num_points, max_candidates), -1, dtype=np.int64)
+        old_candidates = np.full((num_points, max_candidates), -1, dtype=np.int64)
+        new_counts = np.zeros(num_points, dtype=np.int64)
+        old_counts = np.zeros(num_points, dtype=np.int64)
+        for i in range(num_points):
+            for s in range(k):
+                j = heap_inds[i, s]
+                if j < 0:
+                    continue
+                if heap_flags[i, s]:
+                    _add_candidate(new_candidates, new_counts, i, j)
+                    _add_candidate(new_candidates, new_counts, j, i)
+                else:
+                    _add_candidate(old_candidates, old_counts, i, j)
+                    _add_candidate(old_candidates, old_counts, j, i)
+
+        # sampled new candidates are explored in this iteration
+        for i in range(num_points):
+            num_new = min(new_counts[i], max_candidates)
+            for s in range(k):
+                if heap_flags[i, s]:
+                    for c in range(num_new):
+                        if new_candidates[i, c] == heap_inds[i, s]:
+                            heap_flags[i, s] = False
+                            break
+
+        # local join
+        num_updates = 0
+        for i in range(num_points):
+            num_new = min(new_counts[i], max_candidates)
+            num_old = min(old_counts[i], max_candidates)
+            for a in range(num_new):
+                p = new_candidates[i, a]
+                for b in range(a + 1, num_new):
+                    q = new_candidates[i, b]
+                    if p == q:
+                        continue
+                    d = _squared_distance(data, p, q)
+                    num_updates += _heap_push(heap_inds, heap_dists, heap_flags, p, q, d, True)
+                    num_updates += _heap_push(heap_inds, heap_dists, heap_flags, q, p, d, True)
+                for b in range(num_old):
+                    q = old_candidates[i, b]
+                    if p == q:
+                        continue
+                    d = _squared_distance(data, p, q)
+                    num_updates += _heap_push(heap_inds, heap_dists, heap_flags, p, q, d, True)
+                    num_updates += _heap_push(heap_inds, heap_dists, heap_flags, q, p, d, True)
+        return num_updates
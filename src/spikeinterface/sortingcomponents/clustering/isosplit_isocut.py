@@ -483,10 +483,12 @@ if HAVE_NUMBA:
             if to_compute_mask[i] and count[i] > 0:
                 centroids[i, :] /= count[i]
 
+        centered = np.zeros(X.shape[1], dtype=centroids.dtype)
         for i in range(X.shape[0]):
             ind = labels[i]
             if to_compute_mask[ind]:
-                centered = X[i, :] - centroids[ind, :]
+                for m in range(X.shape[1]):
+                    centered[m] = X[i, m] - centroids[ind, m]
                 for m1 in range(X.shape[1]):
                     for m2 in range(m1, X.shape[1]):
                         v = centered[m1] * centered[m2]
@@ -505,7 +507,8 @@ if HAVE_NUMBA:
         best_inds = np.argmin(dists, axis=1)
 
         # already_choosen = np.zeros(n, dtype="bool")
-        pairs = []
+        pairs = np.zeros((n // 2, 2), dtype=np.int64)
+        num_pairs = 0
         for i1 in range(n):
             if not active_labels_mask[i1]:  # or already_choosen[i1]:
                 continue
@@ -515,7 +518,9 @@ if HAVE_NUMBA:
                 # if already_choosen[i1] or already_choosen[i2]:
                 #     print("get_pairs_to_compare() louce!! already_choosen", i1, i2)
                 #     print( (i2, i1) in pairs, pairs,)
-                pairs.append((i1, i2))
+                pairs[num_pairs, 0] = i1
+                pairs[num_pairs, 1] = i2
+                num_pairs += 1
                 # already_choosen[i1] = True
                 # already_choosen[i2] = True
                 dists[i1, :] = np.inf
@@ -523,7 +528,7 @@ if HAVE_NUMBA:
                 dists[:, i1] = np.inf
                 dists[:, i2] = np.inf
 
-        return pairs
+        return pairs[:num_pairs]
 
     @numba.jit(nopython=True, nogil=True)
     def compute_distances(centroids, comparisons_made, active_labels_mask):
@@ -591,13 +596,25 @@ if HAVE_NUMBA:
 
         total_num_label_changes = 0
 
-        for p in range(len(pairs)):
-            label1, label2 = pairs[p]
+        # indices of each label, sorted as np.nonzero(labels == label) would give them
+        # this is valid for all the loop because a label is in one pair only
+        label_bounds = np.zeros(centroids.shape[0] + 1, dtype=np.int64)
+        for i in range(labels.size):
+            label_bounds[labels[i] + 1] += 1
+        label_bounds = np.cumsum(label_bounds)
+        order = np.zeros(labels.size, dtype=np.int64)
+        positions = label_bounds[:-1].copy()
+        for i in range(labels.size):
+            order[positions[labels[i]]] = i
+            positions[labels[i]] += 1
+
+        for p in range(pairs.shape[0]):
+            label1, label2 = pairs[p, 0], pairs[p, 1]
 
             # inds1 = np.flatnonzero(labels == label1)
             # inds2 = np.flatnonzero(labels == label2)
-            (inds1,) = np.nonzero(labels == label1)
-            (inds2,) = np.nonzero(labels == label2)
+            inds1 = order[label_bounds[label1] : label_bounds[label1 + 1]]
+            inds2 = order[label_bounds[label2] : label_bounds[label2 + 1]]
 
             if (inds1.size > 0) and (inds2.size > 0):
                 # if (inds1.size < min_cluster_size) and (inds2.size < min_cluster_size):
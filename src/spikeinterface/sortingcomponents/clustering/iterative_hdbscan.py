@@ -93,7 +93,7 @@ class IterativeHDBSCANClustering:
         if debug_folder is not None:
             debug_folder = Path(debug_folder).absolute()
             debug_folder.mkdir(exist_ok=True)
-            peaks_svd.update(features_folder=debug_folder / "features")
+            peaks_svd.update(folder=debug_folder)
 
         if seed is not None:
             peaks_svd.update(seed=seed)
@@ -36,7 +36,14 @@ class IterativeISOSPLITClustering:
         "motion": None,
         "seed": None,
         "noise_levels": None,
-        "peaks_svd": {"n_components": 5, "ms_before": 0.5, "ms_after": 1.5, "radius_um": 120.0, "motion": None},
+        "peaks_svd": {
+            "n_components": 5,
+            "ms_before": 0.5,
+            "ms_after": 1.5,
+            "radius_um": 120.0,
+            "motion": None,
+            "folder": None,
+        },
         "pre_label": {
             "mode": "channel",
             # "mode": "vertical_bin",
@@ -88,7 +95,7 @@ class IterativeISOSPLITClustering:
     params_doc = """
         peaks_svd : params for peak SVD features extraction.
         See spikeinterface.sortingcomponents.waveforms.peak_svd.extract_peaks_svd
-                        for more details.,
+                        for more details. If folder is given, features are written to disk and loaded as memmap.,
         seed : Random seed for reproducibility.,
         split : params for the splitting step. See
                  spikeinterface.sortingcomponents.clustering.splitting_tools.split_clusters
@@ -150,7 +157,6 @@ class IterativeISOSPLITClustering:
         neighbours_mask = get_channel_distances(recording) <= split_radius_um
         split_params["method_kwargs"]["neighbours_mask"] = neighbours_mask
         split_params["method_kwargs"]["waveforms_sparse_mask"] = sparse_mask
-        split_params["method_kwargs"]["feature_name"] = "peaks_svd"
 
         if params["pre_label"]["mode"] == "channel":
             original_labels = peaks["channel_index"]
@@ -181,10 +187,16 @@ class IterativeISOSPLITClustering:
         # clusterer = params["split"]["clusterer"]
         # clusterer_kwargs = params["split"]["clusterer_kwargs"]
 
-        features = dict(
-            peaks=peaks,
-            peaks_svd=peaks_svd,
-        )
+        if params_peak_svd.get("folder", None) is not None:
+            # the features are memmap in this folder : workers open them without copy
+            features = Path(params_peak_svd["folder"]) / "features"
+            split_params["method_kwargs"]["feature_name"] = "sparse_svd"
+        else:
+            features = dict(
+                peaks=peaks,
+                peaks_svd=peaks_svd,
+            )
+            split_params["method_kwargs"]["feature_name"] = "peaks_svd"
 
         split_params["returns_split_count"] = True
 
@@ -288,7 +300,9 @@ class IterativeISOSPLITClustering:
                 radius_um=merge_radius_um,
                 method="project_distribution",
                 method_kwargs=dict(
-                    feature_name="peaks_svd", waveforms_sparse_mask=sparse_mask, **merge_from_features_kwargs
+                    feature_name=split_params["method_kwargs"]["feature_name"],
+                    waveforms_sparse_mask=sparse_mask,
+                    **merge_from_features_kwargs,
                 ),
                 job_kwargs=job_kwargs,
             )
@@ -1,5 +1,6 @@
 import warnings
 
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from multiprocessing import get_context
 from threadpoolctl import threadpool_limits
 from tqdm.auto import tqdm
@@ -33,7 +34,10 @@ def split_clusters(
     job_kwargs=None,
 ):
     """
-    Run recusrsively (or not) in a multi process pool a local split method.
+    Run recusrsively (or not) in a multi process (or thread) pool a local split method.
+
+    With job_kwargs pool_engine="thread", all workers share the same features (memmap when given as a folder)
+    without any copy.
 
     Parameters
     ----------
@@ -65,88 +69,125 @@ def split_clusters(
     job_kwargs = fix_job_kwargs(job_kwargs)
     n_jobs = job_kwargs["n_jobs"]
     mp_context = job_kwargs.get("mp_context", None)
+    pool_engine = job_kwargs.get("pool_engine", "process")
     progress_bar = job_kwargs["progress_bar"]
     max_threads_per_worker = job_kwargs.get("max_threads_per_worker", 1)
 
     original_labels = peak_labels
     peak_labels = peak_labels.copy()
     split_count = np.zeros(peak_labels.size, dtype=int)
-    recursion_level = 1
-    executor = get_poolexecutor(n_jobs)
-
-    with executor(
-        max_workers=n_jobs,
-        initializer=split_worker_init,
-        mp_context=get_context(method=mp_context),
-        initargs=(recording, features_dict_or_folder, original_labels, method, method_kwargs, max_threads_per_worker),
-    ) as pool:
-        labels_set = np.setdiff1d(peak_labels, [-1])
-        current_max_label = np.max(labels_set) + 1
-        jobs = []
-
-        if debug_folder is not None:
-            if debug_folder.exists():
-                import shutil
-
-                shutil.rmtree(debug_folder)
-            debug_folder.mkdir(parents=True, exist_ok=True)
-
-        for label in labels_set:
+
+    initargs = (recording, features_dict_or_folder, original_labels, method, method_kwargs, max_threads_per_worker)
+    if n_jobs == 1 or pool_engine == "process":
+        executor = get_poolexecutor(n_jobs)
+        pool = executor(
+            max_workers=n_jobs,
+            initializer=split_worker_init,
+            mp_context=get_context(method=mp_context),
+            initargs=initargs,
+        )
+        limits = None
+    elif pool_engine == "thread":
+        # all threads share the same context and so the same (memmap) features without copy
+        split_worker_init(*initargs, use_threadpool_limits=False)
+        pool = ThreadPoolExecutor(max_workers=n_jobs)
+        # threadpool limits are global to the process
+        limits = max_threads_per_worker
+    else:
+        raise ValueError("split_clusters() pool_engine must be 'process' or 'thread'")
+
+    if debug_folder is not None:
+        if debug_folder.exists():
+            import shutil
+
+            shutil.rmtree(debug_folder)
+        debug_folder.mkdir(parents=True, exist_ok=True)
+
+    if progress_bar:
+        pbar = tqdm(desc=f"split_clusters with {method}", total=0)
+
+    # the sub clusters are submitted as soon as their parent is done (and not in submission order) so that
+    # workers do not wait on a slow cluster, the labels are then given in a deterministic order
+    pending = {}
+
+    def submit(peak_indices, node_split_count, sub_folder):
+        # the first level is run with recursion_level=1 like the first split
+        recursion_level = max(node_split_count, 1)
+        node = dict(peak_indices=peak_indices, split_count=node_split_count, children=[])
+        future = pool.submit(split_function_wrapper, peak_indices, recursion_level, sub_folder)
+        pending[future] = node
+        if progress_bar:
+            pbar.total += 1
+            pbar.refresh()
+        return node
+
+    with threadpool_limits(limits=limits), pool:
+        root_nodes = []
+        for label in np.setdiff1d(peak_labels, [-1]):
             peak_indices = np.flatnonzero(peak_labels == label)
             if debug_folder is not None:
                 sub_folder = str(debug_folder / f"split_{label}")
-
             else:
                 sub_folder = None
             if peak_indices.size > 0:
-                jobs.append(pool.submit(split_function_wrapper, peak_indices, recursion_level, sub_folder))
+                root_nodes.append(submit(peak_indices, 0, sub_folder))
 
-        if progress_bar:
-            pbar = tqdm(desc=f"split_clusters with {method}", total=len(labels_set))
-
-        for res in jobs:
-            is_split, local_labels, peak_indices, sub_folder = res.result()
+        while len(pending) > 0:
+            if n_jobs == 1:
+                # mock futures are computed in order on demand
+                done = [next(iter(pending))]
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
 
-            if progress_bar:
-                pbar.update(1)
+            for future in done:
+                node = pending.pop(future)
+                is_split, local_labels, peak_indices, sub_folder = future.result()
+                node["is_split"] = is_split
+                node["local_labels"] = local_labels
 
-            if not is_split:
-                continue
+                if progress_bar:
+                    pbar.update(1)
 
-            mask = local_labels >= 0
-            peak_labels[peak_indices[mask]] = local_labels[mask] + current_max_label
-            peak_labels[peak_indices[~mask]] = local_labels[~mask]
-            split_count[peak_indices] += 1
-            current_max_label += np.max(local_labels[mask]) + 1
+                if not (is_split and recursive):
+                    continue
 
-            if recursive:
-                recursion_level = np.max(split_count[peak_indices])
+                # all peaks of a node have been split the same number of times
+                node_split_count = node["split_count"] + 1
                 if recursive_depth is not None:
                     # stop recursivity when recursive_depth is reach
-                    extra_ball = recursion_level < recursive_depth
+                    extra_ball = node_split_count < recursive_depth
                 else:
                     # recursive always
                     extra_ball = True
 
                 if extra_ball:
-                    new_labels_set = np.setdiff1d(peak_labels[peak_indices], [-1])
-                    for label in new_labels_set:
-                        peak_indices = np.flatnonzero(peak_labels == label)
+                    for local_label in np.setdiff1d(local_labels, [-1]):
+                        child_peak_indices = peak_indices[local_labels == local_label]
                         if sub_folder is not None:
-                            new_sub_folder = sub_folder + f"_{label}"
+                            new_sub_folder = sub_folder + f"_{local_label}"
                         else:
                             new_sub_folder = None
-                        if peak_indices.size > 0:
-                            # print('Relaunched', label, len(peak_indices), recursion_level)
-                            jobs.append(
-                                pool.submit(split_function_wrapper, peak_indices, recursion_level, new_sub_folder)
-                            )
-                            if progress_bar:
-                                pbar.total += 1
-
-        if progress_bar:
-            pbar.close()
-            del pbar
+                        if child_peak_indices.size > 0:
+                            node["children"].append(submit(child_peak_indices, node_split_count, new_sub_folder))
+
+    if progress_bar:
+        pbar.close()
+        del pbar
+
+    # labels are given in the same order as a sequential breadth first exploration
+    current_max_label = np.max(np.setdiff1d(peak_labels, [-1])) + 1
+    nodes = list(root_nodes)
+    for node in nodes:
+        if not node["is_split"]:
+            continue
+        peak_indices = node["peak_indices"]
+        local_labels = node["local_labels"]
+        mask = local_labels >= 0
+        peak_labels[peak_indices[mask]] = local_labels[mask] + current_max_label
+        peak_labels[peak_indices[~mask]] = local_labels[~mask]
+        split_count[peak_indices] += 1
+        current_max_label += np.max(local_labels[mask]) + 1
+        nodes.extend(node["children"])
 
     if returns_split_count:
         return peak_labels, split_count
@@ -158,7 +199,13 @@ global _ctx
 
 
 def split_worker_init(
-    recording, features_dict_or_folder, original_labels, method, method_kwargs, max_threads_per_worker
+    recording,
+    features_dict_or_folder,
+    original_labels,
+    method,
+    method_kwargs,
+    max_threads_per_worker,
+    use_threadpool_limits=True,
 ):
     global _ctx
     _ctx = {}
@@ -169,13 +216,15 @@ def split_worker_init(
     _ctx["method_kwargs"] = method_kwargs
     _ctx["method_class"] = split_methods_dict[method]
     _ctx["max_threads_per_worker"] = max_threads_per_worker
+    _ctx["use_threadpool_limits"] = use_threadpool_limits
     _ctx["features"] = FeaturesLoader.from_dict_or_folder(features_dict_or_folder)
     _ctx["peaks"] = _ctx["features"]["peaks"]
 
 
 def split_function_wrapper(peak_indices, recursion_level, debug_folder):
     global _ctx
-    with threadpool_limits(limits=_ctx["max_threads_per_worker"]):
+    limits = _ctx["max_threads_per_worker"] if _ctx["use_threadpool_limits"] else None
+    with threadpool_limits(limits=limits):
         is_split, local_labels = _ctx["method_class"].split(
             peak_indices, _ctx["peaks"], _ctx["features"], recursion_level, debug_folder, **_ctx["method_kwargs"]
         )
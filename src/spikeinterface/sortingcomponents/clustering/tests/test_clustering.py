@@ -103,6 +103,48 @@ def test_create_graph_from_peak_features(recording, peaks, job_kwargs):
     print(distances.shape)
 
 
+def test_create_graph_from_peak_features_nn_descent(recording, peaks, job_kwargs, tmp_path):
+    peaks_svd, sparse_mask, svd_model = extract_peaks_svd(recording, peaks, n_components=5, job_kwargs=job_kwargs)
+
+    kwargs = dict(n_neighbors=5, apply_local_svd=True, seed=0, progress_bar=False)
+    distances = create_graph_from_peak_features(recording, peaks, peaks_svd, sparse_mask, **kwargs)
+    approx_distances = create_graph_from_peak_features(
+        recording, peaks, peaks_svd, sparse_mask, knn_method="nn_descent", n_jobs=2, **kwargs
+    )
+    assert approx_distances.shape == distances.shape
+    assert approx_distances.nnz == distances.nnz
+
+    cache_folder = tmp_path / "graph_cache"
+    distances = create_graph_from_peak_features(
+        recording, peaks, peaks_svd, sparse_mask, knn_method="nn_descent", cache_folder=cache_folder, **kwargs
+    )
+    assert len(list(cache_folder.glob("*.npz"))) == 1
+    cached_distances = create_graph_from_peak_features(
+        recording, peaks, peaks_svd, sparse_mask, knn_method="nn_descent", cache_folder=cache_folder, **kwargs
+    )
+    assert (cached_distances != distances).nnz == 0
+
+
+def test_nn_descent_kneighbors_graph():
+    from sklearn.neighbors import NearestNeighbors
+    from spikeinterface.sortingcomponents.clustering.graph_tools import nn_descent_kneighbors_graph
+
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(10, 4)) * 5
+    data = centers[rng.integers(10, size=2000)] + rng.normal(size=(2000, 4))
+
+    n_neighbors = 6
+    graph = nn_descent_kneighbors_graph(data, n_neighbors, target_recall=0.95, seed=0)
+    exact_graph = NearestNeighbors(n_neighbors=n_neighbors).fit(data).kneighbors_graph(data, mode="distance")
+    assert graph.shape == exact_graph.shape
+
+    inds = graph.indices.reshape(-1, n_neighbors)
+    exact_inds = exact_graph.indices.reshape(-1, n_neighbors)
+    assert np.array_equal(inds[:, 0], np.arange(data.shape[0]))
+    recall = np.mean([np.intersect1d(inds[i], exact_inds[i]).size for i in range(data.shape[0])]) / n_neighbors
+    assert recall > 0.9
+
+
 def test_templates_from_svd(recording, peaks, job_kwargs):
     peaks_svd, sparse_mask, svd_model = extract_peaks_svd(
         recording, peaks, n_components=1, ms_before=1, ms_after=1, job_kwargs=job_kwargs
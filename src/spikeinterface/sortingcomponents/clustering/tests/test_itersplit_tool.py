@@ -1,12 +1,71 @@
 import pytest
 import numpy as np
 
+from spikeinterface.core import generate_recording
+from spikeinterface.core.node_pipeline import base_peak_dtype
 from spikeinterface.sortingcomponents.clustering.itersplit_tools import split_clusters
 
 
-# TODO
+def make_features(num_peaks=3000, num_channels=4, n_components=3, seed=0):
+    rng = np.random.default_rng(seed)
+    peaks = np.zeros(num_peaks, dtype=base_peak_dtype)
+    peaks["sample_index"] = np.sort(rng.integers(0, 300_000, size=num_peaks))
+    peaks["channel_index"] = rng.integers(0, num_channels, size=num_peaks)
+
+    # 2 well separated groups, the second one being itself made of 2 groups
+    centers = np.array([[0.0, 0.0], [10.0, 0.0], [10.0, 6.0]])
+    inds = rng.integers(0, 3, size=num_peaks)
+    sparse_tsvd = rng.normal(size=(num_peaks, n_components, num_channels)).astype("float32")
+    sparse_tsvd[:, 0, 0] += centers[inds, 0]
+    sparse_tsvd[:, 0, 1] += centers[inds, 1]
+
+    features = dict(peaks=peaks, sparse_tsvd=sparse_tsvd)
+    neighbours_mask = np.ones((num_channels, num_channels), dtype=bool)
+    return features, neighbours_mask
+
+
 def test_split():
-    pass
+    features, neighbours_mask = make_features()
+    recording = generate_recording(num_channels=4, durations=[10.0])
+    peak_labels = np.zeros(features["peaks"].size, dtype="int64")
+
+    method_kwargs = dict(
+        clusterer=dict(method="isosplit", min_cluster_size=25, seed=0),
+        feature_name="sparse_tsvd",
+        neighbours_mask=neighbours_mask,
+        waveforms_sparse_mask=neighbours_mask,
+        n_pca_features=3,
+        seed=0,
+    )
+
+    labels, split_count = split_clusters(
+        peak_labels,
+        recording,
+        features,
+        method="local_feature_clustering",
+        method_kwargs=method_kwargs,
+        recursive=True,
+        recursive_depth=3,
+        returns_split_count=True,
+        job_kwargs=dict(n_jobs=1, progress_bar=False),
+    )
+    assert np.unique(labels[labels >= 0]).size >= 2
+    assert np.max(split_count) <= 3
+
+    # shared features in threads give the same labels
+    thread_labels, thread_split_count = split_clusters(
+        peak_labels,
+        recording,
+        features,
+        method="local_feature_clustering",
+        method_kwargs=method_kwargs,
+        recursive=True,
+        recursive_depth=3,
+        returns_split_count=True,
+        job_kwargs=dict(n_jobs=2, pool_engine="thread", progress_bar=False),
+    )
+    np.testing.assert_array_equal(labels, thread_labels)
+    np.testing.assert_array_equal(split_count, thread_split_count)
 
 
 if __name__ == "__main__":
@@ -13,7 +13,6 @@ _base_matching_dtype = [
 
 class BaseTemplateMatching(PeakDetector):
     def __init__(self, recording, templates, return_output=True):
-        # TODO make a sharedmem of template here
         # TODO maybe check that channel_id are the same with recording
 
         assert isinstance(
@@ -23,6 +22,120 @@ class BaseTemplateMatching(PeakDetector):
         self.recording = recording
         PeakDetector.__init__(self, recording, return_output=return_output, parents=None)
 
+        # attribute name -> SharedMemory, see share_arrays()
+        self._shared_memories = {}
+        self._is_shared_memory_owner = True
+
+    def share_arrays(self, names):
+        """
+        Move some numpy array attributes of the engine into shared memory.
+
+        When the engine is pickled (for instance to be sent to workers with pool_engine="process"), these arrays
+        are not copied: only the names of the shared memory buffers are sent and workers rebuild views on them.
+        Other references to the same arrays in the engine state (in a list, a dataclass...) are also replaced
+        by the views. The main instance releases the buffers in `clean()`.
+
+        Parameters
+        ----------
+        names : list of str
+            The names of the attributes to share, they must be numpy arrays
+        """
+        from spikeinterface.core.core_tools import make_shared_array
+
+        for name in names:
+            if name in self._shared_memories:
+                continue
+            arr = np.asarray(getattr(self, name))
+            shared_arr, shm = make_shared_array(arr.shape, arr.dtype)
+            shared_arr[:] = arr
+            setattr(self, name, shared_arr)
+            self._shared_memories[name] = shm
+
+    def share_templates_array(self):
+        """
+        Move the templates array into shared memory (see `share_arrays()`). The engine keeps its own Templates
+        object that points to the shared array, the templates given by the user are not modified.
+        """
+        from dataclasses import replace
+
+        self._shared_templates_array = self.templates.templates_array
+        self.share_arrays(["_shared_templates_array"])
+        self.templates = replace(self.templates, templates_array=self._shared_templates_array)
+
+    def release_shared_arrays(self):
+        """
+        Release the arrays in shared memory. Only the main instance unlinks the buffers.
+        """
+        for name, shm in self._shared_memories.items():
+            setattr(self, name, None)
+            try:
+                shm.close()
+            except BufferError:
+                # some views on the buffer are still alive elsewhere, they keep the mapping until deleted
+                pass
+            if self._is_shared_memory_owner:
+                shm.unlink()
+        self._shared_memories = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        shared_memories = state.pop("_shared_memories", {})
+        if len(shared_memories) == 0:
+            return state
+
+        import io
+        import pickle
+
+        names = list(shared_memories.keys())
+        descriptors = [(shared_memories[name].name, state[name].shape, state[name].dtype) for name in names]
+        persistent_ids = {id(state[name]): i for i, name in enumerate(names)}
+        for name in names:
+            state.pop(name)
+
+        # the state is pickled here with references to the shared arrays, wherever they are in the state
+        buffer = io.BytesIO()
+        pickler = pickle.Pickler(buffer, protocol=pickle.HIGHEST_PROTOCOL)
+        pickler.persistent_id = lambda obj: persistent_ids.get(id(obj)) if isinstance(obj, np.ndarray) else None
+        pickler.dump(state)
+
+        return dict(_shared_state=buffer.getvalue(), _shared_names=names, _shared_descriptors=descriptors)
+
+    def __setstate__(self, state):
+        if "_shared_state" not in state:
+            self.__dict__.update(state)
+            self._shared_memories = {}
+            return
+
+        import io
+        import pickle
+        from multiprocessing.shared_memory import SharedMemory
+
+        shared_memories = {}
+        shared_arrays = []
+        for name, (shm_name, shape, dtype) in zip(state["_shared_names"], state["_shared_descriptors"]):
+            shm = SharedMemory(name=shm_name, create=False)
+            shared_memories[name] = shm
+            shared_arrays.append(np.ndarray(shape=shape, dtype=dtype, buffer=shm.buf))
+
+        unpickler = pickle.Unpickler(io.BytesIO(state["_shared_state"]))
+        unpickler.persistent_load = lambda pid: shared_arrays[pid]
+        self.__dict__.update(unpickler.load())
+        for name, arr in zip(state["_shared_names"], shared_arrays):
+            setattr(self, name, arr)
+        self._shared_memories = shared_memories
+        # only the instance that created the buffers can unlink them
+        self._is_shared_memory_owner = False
+
+    def __del__(self):
+        if len(getattr(self, "_shared_memories", {})) > 0:
+            for name, shm in self._shared_memories.items():
+                setattr(self, name, None)
+                try:
+                    shm.close()
+                except BufferError:
+                    pass
+            self._shared_memories = {}
+
     def get_dtype(self):
         return np.dtype(_base_matching_dtype)
 
@@ -49,8 +162,8 @@ class BaseTemplateMatching(PeakDetector):
         Clean the matching output.
         This is called at the end of the matching process.
         """
-        # can be overwritten if needed
-        pass
+        # can be overwritten if needed, but the arrays in shared memory should be released
+        self.release_shared_arrays()
 
     def get_extra_outputs(self):
         # can be overwritten if need to ouput some variables with a dict
@@ -2,6 +2,7 @@
 
 import numpy as np
 import importlib.util
+from pathlib import Path
 
 spike_dtype = [
     ("sample_index", "int64"),
@@ -99,6 +100,66 @@ def compute_overlaps(templates, num_samples, num_channels, sparsities):
     return new_overlaps
 
 
+def compute_svd_overlaps(temporal, singular, spatial, sparsity, unit_overlaps_indices):
+    """Compute the overlaps between templates compressed by SVD.
+
+    For every template i and every template j sharing channels with it, the overlap is the cross-correlation
+    (over all the possible delays) of the two reconstructed templates restricted to the channels of j.
+    Convolutions are done by batches (all the overlapping units of a template at once) in the Fourier domain.
+
+    Parameters
+    ----------
+    temporal : ndarray (num_templates, num_samples, rank)
+        Normalized and flipped temporal components of the templates.
+    singular : ndarray (num_templates, rank)
+        Singular values of the templates.
+    spatial : ndarray (num_templates, rank, num_channels)
+        Spatial components of the templates.
+    sparsity : ndarray (num_templates, num_channels)
+        The sparsity mask of the templates.
+    unit_overlaps_indices : dict
+        For every template, the indices of the templates sharing channels with it.
+
+    Returns
+    -------
+    overlaps : list of ndarray (num_overlaps, 2 * num_samples - 1)
+        The overlaps of every template with its overlapping templates.
+    max_similarity : ndarray (num_templates, num_templates)
+        The maximum of the overlaps over delays.
+    """
+    from scipy.fft import rfft, irfft, next_fast_len
+
+    num_templates, num_samples, rank = temporal.shape
+    size = 2 * num_samples - 1
+    n_fft = next_fast_len(size)
+
+    masked_spatial = spatial * sparsity[:, np.newaxis, :]
+    temporal_spectra = rfft(temporal, n=n_fft, axis=1)
+
+    overlaps = []
+    max_similarity = np.zeros((num_templates, num_templates), dtype=np.float32)
+    for i in range(num_templates):
+        overlapping_units = unit_overlaps_indices[i]
+
+        # Reconstruct unit template from SVD Matrices
+        template_i = np.flipud((temporal[i] * singular[i][np.newaxis, :]) @ spatial[i])
+
+        # only channels of the overlapping units are needed
+        channels = np.flatnonzero(np.any(sparsity[overlapping_units], axis=0))
+        spatial_filters = masked_spatial[np.ix_(overlapping_units, np.arange(rank), channels)]
+        visible = np.matmul(template_i[:, channels], spatial_filters.transpose(0, 2, 1))
+        visible *= singular[overlapping_units][:, np.newaxis, :]
+
+        # convolutions of all ranks and all overlapping units at once, summed over ranks
+        spectra = np.einsum("jfr,jfr->jf", rfft(visible, n=n_fft, axis=1), temporal_spectra[overlapping_units])
+        unit_overlaps = irfft(spectra, n=n_fft, axis=1)[:, :size].astype(np.float32)
+
+        max_similarity[i, overlapping_units] = np.max(unit_overlaps, axis=1)
+        overlaps.append(unit_overlaps)
+
+    return overlaps, max_similarity
+
+
 class CircusOMPPeeler(BaseTemplateMatching):
     """
     Orthogonal Matching Pursuit inspired from Spyking Circus sorter
@@ -139,8 +200,12 @@ class CircusOMPPeeler(BaseTemplateMatching):
         torch_device : string in ["cpu", "cuda", None]. Default "cpu"
             Controls torch device if the torch engine is selected
         shared_memory : bool, default True
-            If True, the overlaps are stored in shared memory, which is more efficient when
-            using numerous cores
+            If True, the overlaps, the SVD components and the templates are stored in shared memory, which is
+            more efficient when using numerous cores
+        cache_folder : str | Path | None, default None
+            If not None, the precomputed values for the templates (SVD components and overlaps) are saved in
+            this folder, in a file named with a hash of the templates and sparsity. Building a peeler again with
+            the same templates then loads them instead of computing them.
         """
 
     _more_output_keys = [
@@ -171,6 +236,7 @@ class CircusOMPPeeler(BaseTemplateMatching):
         engine="numpy",
         shared_memory=True,
         torch_device="cpu",
+        cache_folder=None,
     ):
 
         BaseTemplateMatching.__init__(self, recording, templates, return_output=return_output)
@@ -202,6 +268,7 @@ class CircusOMPPeeler(BaseTemplateMatching):
         self.omp_min_sps = omp_min_sps
         self.relative_error = relative_error
         self.rank = rank
+        self.cache_folder = cache_folder
 
         self.num_templates = len(templates.unit_ids)
 
@@ -212,24 +279,24 @@ class CircusOMPPeeler(BaseTemplateMatching):
                 assert precomputed[key] is not None, "If templates are provided, %d should also be there" % key
                 setattr(self, key, precomputed[key])
 
+        self.ignore_inds = np.array(ignore_inds)
+
+        self.unit_overlaps_tables = np.zeros((self.num_templates, self.num_templates), dtype=int)
+        for i in range(self.num_templates):
+            self.unit_overlaps_tables[i][self.unit_overlaps_indices[i]] = np.arange(len(self.unit_overlaps_indices[i]))
+
         if self.shared_memory:
             self.max_overlaps = max([len(o) for o in self.overlaps])
             num_samples = len(self.overlaps[0][0])
-            from spikeinterface.core.core_tools import make_shared_array
-
-            arr, shm = make_shared_array((self.num_templates, self.max_overlaps, num_samples), dtype=np.float32)
+            arr = np.zeros((self.num_templates, self.max_overlaps, num_samples), dtype=np.float32)
             for i in range(self.num_templates):
                 n_overlaps = len(self.unit_overlaps_indices[i])
                 arr[i, :n_overlaps] = self.overlaps[i]
             self.overlaps = arr
-            self.shm = shm
-
-        self.ignore_inds = np.array(ignore_inds)
-
-        self.unit_overlaps_tables = {}
-        for i in range(self.num_templates):
-            self.unit_overlaps_tables[i] = np.zeros(self.num_templates, dtype=int)
-            self.unit_overlaps_tables[i][self.unit_overlaps_indices[i]] = np.arange(len(self.unit_overlaps_indices[i]))
+            self.share_arrays(
+                ["overlaps", "normed_templates", "temporal", "spatial", "singular", "norms", "unit_overlaps_tables"]
+            )
+            self.share_templates_array()
 
         self.margin = 2 * self.num_samples
         self.is_pushed = False
@@ -243,13 +310,68 @@ class CircusOMPPeeler(BaseTemplateMatching):
         else:
             sparsity = self.templates.sparsity.mask
 
-        # units_overlaps = np.sum(np.logical_and(sparsity[:, np.newaxis, :], sparsity[np.newaxis, :, :]), axis=2)
+        units_overlaps = (sparsity.astype(np.float32) @ sparsity.T.astype(np.float32)) > 0
         self.unit_overlaps_indices = {}
         self.units_overlaps = {}
         for i in range(self.num_templates):
-            self.units_overlaps[i] = np.sum(np.logical_and(sparsity[i, :], sparsity), axis=1) > 0
+            self.units_overlaps[i] = units_overlaps[i]
             self.unit_overlaps_indices[i] = np.flatnonzero(self.units_overlaps[i])
 
+        if self.cache_folder is not None:
+            cache_file = Path(self.cache_folder) / f"circus_omp_{self._get_templates_hash(sparsity)}.npz"
+            if cache_file.exists():
+                self._load_precomputed(cache_file)
+            else:
+                self._compute_precomputed(sparsity)
+                self._save_precomputed(cache_file)
+        else:
+            self._compute_precomputed(sparsity)
+
+        if self.amplitudes is None:
+            distances = np.sort(self.max_similarity, axis=1)[:, ::-1]
+            distances = 1 - distances[:, 1] / 2
+            self.amplitudes = np.zeros((self.num_templates, 2))
+            self.amplitudes[:, 0] = distances
+            self.amplitudes[:, 1] = np.inf
+
+    def _get_templates_hash(self, sparsity):
+        import hashlib
+
+        hasher = hashlib.sha1()
+        hasher.update(np.ascontiguousarray(self.templates.templates_array).tobytes())
+        hasher.update(np.ascontiguousarray(sparsity).tobytes())
+        hasher.update(str((self.templates.templates_array.shape, self.rank)).encode())
+        return hasher.hexdigest()
+
+    def _save_precomputed(self, cache_file):
+        import os
+
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        # overlaps are stored concatenated, with pointers to the overlaps of each template
+        overlaps_indptr = np.cumsum([0] + [len(o) for o in self.overlaps])
+        tmp_file = cache_file.parent / f"{cache_file.stem}_{os.getpid()}.tmp.npz"
+        np.savez_compressed(
+            tmp_file,
+            temporal=self.temporal,
+            singular=self.singular,
+            spatial=self.spatial,
+            norms=self.norms,
+            normed_templates=self.normed_templates,
+            max_similarity=self.max_similarity,
+            overlaps=np.concatenate(self.overlaps, axis=0),
+            overlaps_indptr=overlaps_indptr,
+        )
+        os.replace(tmp_file, cache_file)
+
+    def _load_precomputed(self, cache_file):
+        with np.load(cache_file) as data:
+            for key in ["temporal", "singular", "spatial", "norms", "normed_templates", "max_similarity"]:
+                setattr(self, key, data[key])
+            overlaps = data["overlaps"]
+            overlaps_indptr = data["overlaps_indptr"]
+        self.overlaps = [overlaps[overlaps_indptr[i] : overlaps_indptr[i + 1]] for i in range(self.num_templates)]
+
+    def _compute_precomputed(self, sparsity):
         templates_array = self.templates.get_dense_templates().copy()
         # Then we keep only the strongest components
         self.temporal, self.singular, self.spatial, templates_array = compress_templates(templates_array, self.rank)
@@ -266,40 +388,9 @@ class CircusOMPPeeler(BaseTemplateMatching):
         self.temporal /= self.norms[:, np.newaxis, np.newaxis]
         self.temporal = np.flip(self.temporal, axis=1)
 
-        self.overlaps = []
-        self.max_similarity = np.zeros((self.num_templates, self.num_templates), dtype=np.float32)
-        for i in range(self.num_templates):
-            num_overlaps = np.sum(self.units_overlaps[i])
-            overlapping_units = np.flatnonzero(self.units_overlaps[i])
-
-            # Reconstruct unit template from SVD Matrices
-            data = self.temporal[i] * self.singular[i][np.newaxis, :]
-            template_i = np.matmul(data, self.spatial[i, :, :])
-            template_i = np.flipud(template_i)
-
-            unit_overlaps = np.zeros([num_overlaps, 2 * self.num_samples - 1], dtype=np.float32)
-
-            for count, j in enumerate(overlapping_units):
-                overlapped_channels = sparsity[j]
-                visible_i = template_i[:, overlapped_channels]
-
-                spatial_filters = self.spatial[j, :, overlapped_channels]
-                spatially_filtered_template = np.matmul(visible_i, spatial_filters)
-                visible_i = spatially_filtered_template * self.singular[j]
-
-                for rank in range(visible_i.shape[1]):
-                    unit_overlaps[count, :] += np.convolve(visible_i[:, rank], self.temporal[j][:, rank], mode="full")
-
-                self.max_similarity[i, j] = np.max(unit_overlaps[count])
-
-            self.overlaps.append(unit_overlaps)
-
-        if self.amplitudes is None:
-            distances = np.sort(self.max_similarity, axis=1)[:, ::-1]
-            distances = 1 - distances[:, 1] / 2
-            self.amplitudes = np.zeros((self.num_templates, 2))
-            self.amplitudes[:, 0] = distances
-            self.amplitudes[:, 1] = np.inf
+        self.overlaps, self.max_similarity = compute_svd_overlaps(
+            self.temporal, self.singular, self.spatial, sparsity, self.unit_overlaps_indices
+        )
 
         self.spatial = np.moveaxis(self.spatial, [0, 1, 2], [1, 0, 2])
         self.temporal = np.moveaxis(self.temporal, [0, 1, 2], [1, 2, 0])
@@ -316,8 +407,8 @@ class CircusOMPPeeler(BaseTemplateMatching):
     def get_extra_outputs(self):
         output = {}
         for key in self._more_output_keys:
-            if key == "overlaps" and self.shared_memory:
-                output[key] = self.overlaps.copy()
+            if key in self._shared_memories:
+                output[key] = getattr(self, key).copy()
             else:
                 output[key] = getattr(self, key)
         return output
@@ -561,19 +652,6 @@ class CircusOMPPeeler(BaseTemplateMatching):
 
         return spikes
 
-    def clean(self):
-        if self.shared_memory and self.shm is not None:
-            self.overlaps = None
-            self.shm.close()
-            self.shm.unlink()
-            self.shm = None
-
-    def __del__(self):
-        if self.shared_memory and self.shm is not None:
-            self.overlaps = None
-            self.shm.close()
-            self.shm = None
-
 
 class CircusPeeler(BaseTemplateMatching):
     """
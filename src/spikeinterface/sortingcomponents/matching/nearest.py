@@ -25,6 +25,8 @@ class NearestTemplatesPeeler(BaseTemplateMatching):
         If None the noise levels are estimated using random chunks of the recording. If array it should be an array of size (num_channels,) with the noise level of each channel
     radius_um : float
         The radius to define the neighborhood between channels in micrometers while detecting the peaks
+    shared_memory : bool, default False
+        If True, the templates are stored in shared memory, so that they are not copied to every process worker
     """
 
     def __init__(
@@ -39,10 +41,15 @@ class NearestTemplatesPeeler(BaseTemplateMatching):
         detection_radius_um=100.0,
         neighborhood_radius_um=50.0,
         sparsity_radius_um=100.0,
+        shared_memory=False,
     ):
 
         BaseTemplateMatching.__init__(self, recording, templates, return_output=return_output)
 
+        self.shared_memory = shared_memory
+        if self.shared_memory:
+            self.share_templates_array()
+
         self.noise_levels = noise_levels
         self.abs_threholds = self.noise_levels * detect_threshold
         self.peak_sign = peak_sign
@@ -83,6 +90,9 @@ class NearestTemplatesPeeler(BaseTemplateMatching):
             self.sparsity_mask = np.ones((num_channels, num_channels), dtype=bool)
 
         self.templates_array = self.templates.get_dense_templates()
+        if self.shared_memory and self.templates.are_templates_sparse():
+            # a new dense array has been created
+            self.share_arrays(["templates_array"])
         self.exclude_sweep_size = int(exclude_sweep_ms * recording.get_sampling_frequency() / 1000.0)
         self.nbefore = self.templates.nbefore
         self.nafter = self.templates.nafter
@@ -164,6 +174,7 @@ class NearestTemplatesSVDPeeler(NearestTemplatesPeeler):
         detection_radius_um=100.0,
         neighborhood_radius_um=50.0,
         sparsity_radius_um=100.0,
+        shared_memory=False,
     ):
 
         NearestTemplatesPeeler.__init__(
@@ -178,6 +189,7 @@ class NearestTemplatesSVDPeeler(NearestTemplatesPeeler):
             detection_radius_um=detection_radius_um,
             neighborhood_radius_um=neighborhood_radius_um,
             sparsity_radius_um=sparsity_radius_um,
+            shared_memory=shared_memory,
         )
 
         from spikeinterface.sortingcomponents.waveforms.waveform_utils import (
@@ -190,6 +202,8 @@ class NearestTemplatesSVDPeeler(NearestTemplatesPeeler):
         temporal_templates = to_temporal_representation(self.templates_array)
         projected_temporal_templates = self.svd_model.transform(temporal_templates)
         self.svd_templates = from_temporal_representation(projected_temporal_templates, self.num_channels)
+        if self.shared_memory:
+            self.share_arrays(["svd_templates"])
 
     def get_margin(self):
         return self.margin
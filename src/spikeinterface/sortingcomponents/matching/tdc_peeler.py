@@ -1,4 +1,5 @@
 import importlib.util
+import copy
 
 import numpy as np
 from spikeinterface.core import (
@@ -87,6 +88,12 @@ class TridesclousPeeler(BaseTemplateMatching):
             The maximum number of peeler loops.
         amplitude_limits : tuple
             The amplitude limits for accepting a detected spike.
+        shared_memory : bool, default False
+            If True, the templates (and the moved templates when motion_aware=True) are stored in shared memory,
+            so that they are not copied to every process worker.
+        num_fitting_threads : int, default 1
+            Number of threads used to fit the spikes inside a chunk. Spikes are fitted by batches of spikes that
+            do not share any samples or channels, so the result is the same as with one thread.
     """
 
     def __init__(
@@ -115,10 +122,16 @@ class TridesclousPeeler(BaseTemplateMatching):
         ms_after=0.8,
         max_peeler_loop=2,
         amplitude_limits=(0.7, 1.4),
+        shared_memory=False,
+        num_fitting_threads=1,
     ):
 
         BaseTemplateMatching.__init__(self, recording, templates, return_output=return_output)
 
+        self.shared_memory = shared_memory
+        if self.shared_memory:
+            self.share_templates_array()
+
         self.motion_aware = motion_aware
 
         unit_ids = templates.unit_ids
@@ -219,7 +232,7 @@ class TridesclousPeeler(BaseTemplateMatching):
             self.sparse_templates_array_moved = None
             self.interpolation_time_bins_s = None
             self.interpolation_time_bin_edges_s = None
-            self.sparse_templates_array_static = templates.templates_array
+            self.sparse_templates_array_static = self.templates.templates_array
             self.dtype = self.sparse_templates_array_static.dtype
 
         extremum_chan = get_template_extremum_channel(templates, peak_sign=peak_sign, outputs="index")
@@ -260,14 +273,30 @@ class TridesclousPeeler(BaseTemplateMatching):
                 template = self.sparse_templates_array_static[i, :, :n]
                 self.template_norms_static[i] = np.sum(template**2)
 
+        if self.shared_memory and self.motion_aware:
+            self.share_arrays(["sparse_templates_array_moved", "template_norms_moved"])
+            # only the displacements of the drifting templates are needed in workers
+            self.drifting_templates = copy.copy(self.drifting_templates)
+            self.drifting_templates.templates_array_moved = None
+
         #
         distances = scipy.spatial.distance.cdist(channel_locations, channel_locations, metric="euclidean")
         self.near_chan_mask = distances <= amplitude_fitting_radius_um
 
+        # for multi-threaded fitting: two spikes interact when the channels touched by their fits overlap
+        # or when they can share a neighbor spike
+        fitting_channels = np.zeros((channel_ids.size, channel_ids.size), dtype=bool)
+        for channel_index, cluster_inds in enumerate(self.possible_clusters_by_channel):
+            fitting_channels[channel_index] = np.any(self.sparsity_mask[cluster_inds, :], axis=0)
+        self.fitting_channels_overlap = (fitting_channels.astype("int64") @ fitting_channels.T.astype("int64")) > 0
+        near_chan_mask = self.near_chan_mask.astype("int64")
+        self.near_chan_mask_two_hops = (near_chan_mask @ near_chan_mask) > 0
+
         self.possible_shifts = np.arange(-sample_shift, sample_shift + 1, dtype="int64")
 
         self.max_peeler_loop = max_peeler_loop
         self.amplitude_limits = amplitude_limits
+        self.num_fitting_threads = num_fitting_threads
 
         self.fast_spike_detector = LocallyExclusivePeakDetector(
             recording=recording,
@@ -532,8 +561,6 @@ class TridesclousPeeler(BaseTemplateMatching):
         spikes["sample_index"] = peak_sample_ind
         spikes["channel_index"] = peak_chan_ind
 
-        distances_shift = np.zeros(self.possible_shifts.size)
-
         delta_sample = max(self.nbefore, self.nafter)  #  TODO check this maybe add margin
         # neighbors_spikes_inds = get_neighbors_spikes(spikes["sample_index"], spikes["channel_index"], delta_sample, self.near_chan_mask)
 
@@ -545,193 +572,37 @@ class TridesclousPeeler(BaseTemplateMatching):
             self.near_chan_mask,
         )
 
-        for i in range(spikes.size):
-            sample_index = peak_sample_ind[i]
-
-            chan_ind = peak_chan_ind[i]
-
-            if self.motion_aware:
-                local_motion = np.zeros(2, dtype=self.channel_locations.dtype)
-                local_motion[self.motion.dim] = channel_motions[chan_ind]
-
-                # move this channel to the original position
-                peak_location_moved = self.channel_locations[chan_ind, :] - local_motion
-                # print(self.channel_locations)
-                chan_ind_moved = np.argmin(np.sum((self.channel_locations - peak_location_moved) ** 2, axis=1))
-                # if np.sum(local_motion) != 0:
-                #     print("local_motion", local_motion, "chan_ind", chan_ind, "chan_ind_moved", chan_ind_moved)
-                displacement_index = np.argmin(
-                    np.sum((self.drifting_templates.displacements - local_motion) ** 2, axis=1)
-                )
-                templates_array = self.sparse_templates_array_moved[displacement_index, :, :, :]
-
-                template_norms = self.template_norms_moved[displacement_index, :]
-            else:
-                chan_ind_moved = chan_ind
-                templates_array = self.sparse_templates_array_static
-
-                template_norms = self.template_norms_static
-
-            possible_clusters = self.possible_clusters_by_channel[chan_ind_moved]
-
-            # shorten in time
-            sparse_templates_array_short = templates_array[:, self.slice_short, :]
-
-            if possible_clusters.size > 0:
-                cluster_index = get_most_probable_cluster(
-                    traces,
-                    sparse_templates_array_short,
-                    possible_clusters,
-                    sample_index,
-                    self.nbefore_short,
-                    self.nafter_short,
-                    self.sparsity_mask,
-                )
-
-                # import matplotlib.pyplot as plt
-                # fig, ax = plt.subplots()
-                # chans = np.any(self.sparsity_mask[possible_clusters, :], axis=0)
-                # wf = traces[sample_index - self.nbefore : sample_index + self.nafter][:, chans]
-                # ax.plot(wf.T.flatten(), color='k')
-                # # dense_templates_array = self.templates.get_dense_templates()
-                # dense_templates_array = self.drifting_templates.templates_array_moved[displacement_index,:, :, :]
-                # for c_ind in possible_clusters:
-                #     template = dense_templates_array[c_ind, :, :][:, chans]
-                #     ax.plot(template.T.flatten())
-                #     if c_ind == cluster_index:
-                #         ax.plot(template.T.flatten(), color='m', ls='--')
-                #     ax.set_title(f"use_fine_detector{use_fine_detector} level{level}")
-                # plt.show()
-
-                chan_sparsity_mask = self.sparsity_mask[cluster_index, :]
-
-                # find best shift
-                numba_best_shift_sparse(
-                    traces,
-                    sparse_templates_array_short[cluster_index, :, :],
-                    sample_index,
-                    self.nbefore_short,
-                    self.possible_shifts,
-                    distances_shift,
-                    chan_sparsity_mask,
-                )
-
-                ind_shift = np.argmin(distances_shift)
-                shift = self.possible_shifts[ind_shift]
-
-                # TODO DEBUG shift later
-                spikes["sample_index"][i] += shift
-
-                spikes["cluster_index"][i] = cluster_index
-
-                # check that the the same cluster is not already detected at same place
-                # this can happen for small template the substract forvever the traces
-                outer_neighbors_inds = [ind for ind in neighbors_spikes_inds[i] if ind > i and ind >= spikes.size]
-                is_valid = True
-                for b in outer_neighbors_inds:
-                    b = b - spikes.size
-                    if (spikes[i]["sample_index"] == spikes_prev_loop[b]["sample_index"]) and (
-                        spikes[i]["cluster_index"] == spikes_prev_loop[b]["cluster_index"]
-                    ):
-                        is_valid = False
-                # print(is_valid)
-                if is_valid:
-                    # temporary assign a cluster to neighbors if not done yet
-                    inner_neighbors_inds = [ind for ind in neighbors_spikes_inds[i] if (ind > i and ind < spikes.size)]
-                    for b in inner_neighbors_inds:
-                        spikes["cluster_index"][b] = get_most_probable_cluster(
-                            traces,
-                            sparse_templates_array_short,
-                            possible_clusters,
-                            spikes["sample_index"][b],
-                            self.nbefore_short,
-                            self.nafter_short,
-                            self.sparsity_mask,
+        if self.num_fitting_threads > 1 and spikes.size > 1:
+            # spikes with no shared samples or channels are fitted in parallel, by levels: all the spikes that
+            # interact with a spike (and come before it in the amplitude order) are in lower levels
+            moved_chan_inds = np.array(
+                [self._get_moved_channel(chan_ind, channel_motions)[0] for chan_ind in peak_chan_ind], dtype="int64"
+            )
+            radius = delta_sample + max(self.nbefore, self.nafter) + 2 * np.max(np.abs(self.possible_shifts)) + 1
+            levels = get_fitting_levels(
+                peak_sample_ind,
+                peak_chan_ind,
+                moved_chan_inds,
+                self.fitting_channels_overlap,
+                self.near_chan_mask_two_hops,
+                2 * radius,
+            )
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=self.num_fitting_threads) as executor:
+                for level in range(np.max(levels) + 1):
+                    inds = np.flatnonzero(levels == level)
+                    list(
+                        executor.map(
+                            lambda i: self._fit_one_spike(
+                                i, spikes, spikes_prev_loop, neighbors_spikes_inds, traces, channel_motions
+                            ),
+                            inds,
                         )
-
-                    amp = fit_one_amplitude_with_neighbors(
-                        spikes[i],
-                        spikes[inner_neighbors_inds],
-                        traces,
-                        self.sparsity_mask,
-                        templates_array,
-                        template_norms,
-                        self.nbefore,
-                        self.nafter,
                     )
-
-                    low_lim, up_lim = self.amplitude_limits
-                    if low_lim <= amp <= up_lim:
-                        spikes["amplitude"][i] = amp
-                        wanted_channel_mask = np.ones(traces.shape[1], dtype=bool)  # TODO move this before the loop
-                        # TODO check dtype are the same
-                        construct_prediction_sparse(
-                            spikes[i : i + 1],
-                            traces,
-                            templates_array,
-                            self.sparsity_mask,
-                            wanted_channel_mask,
-                            self.nbefore,
-                            additive=False,
-                        )
-                    elif low_lim > amp:
-                        # print("bad amp", amp)
-                        spikes["cluster_index"][i] = -1
-
-                        # import matplotlib.pyplot as plt
-                        # fig, ax = plt.subplots()
-                        # sample_ind = spikes["sample_index"][i]
-                        # print(chan_sparsity_mask)
-                        # wf = traces[sample_ind - self.nbefore : sample_ind + self.nafter][:, chan_sparsity_mask]
-                        # dense_templates_array = self.templates.get_dense_templates()
-                        # template = dense_templates_array[cluster_index, :, :][:, chan_sparsity_mask]
-                        # ax.plot(wf.T.flatten())
-                        # ax.plot(template.T.flatten())
-                        # ax.plot(template.T.flatten() * amp)
-                        # ax.set_title(f"amp{amp} use_fine_detector{use_fine_detector} level{level}")
-                        # plt.show()
-                    else:
-                        # amp > up_lim
-                        # TODO should try other cluster for the fit!!
-                        # spikes["cluster_index"][i] = -1
-
-                        # force amplitude to be one and need a fiting at next level
-                        spikes["amplitude"][i] = 1
-
-                        # print(amp)
-                        # import matplotlib.pyplot as plt
-                        # fig, ax = plt.subplots()
-                        # sample_ind = spikes["sample_index"][i]
-                        # wf = traces[sample_ind - self.nbefore : sample_ind + self.nafter][:, chan_sparsity_mask]
-                        # dense_templates_array = self.templates.get_dense_templates()
-                        # template = dense_templates_array[cluster_index, :, :][:, chan_sparsity_mask]
-                        # ax.plot(wf.T.flatten())
-                        # ax.plot(template.T.flatten())
-                        # ax.plot(template.T.flatten() * amp)
-                        # ax.set_title(f"amp{amp} use_fine_detector{use_fine_detector} level{level}")
-                        # plt.show()
-
-                        # import matplotlib.pyplot as plt
-                        # fig, ax = plt.subplots()
-                        # chans = np.any(self.sparsity_mask[possible_clusters, :], axis=0)
-                        # wf = traces[sample_index - self.nbefore : sample_index + self.nafter][:, chans]
-                        # ax.plot(wf.T.flatten(), color='k')
-                        # dense_templates_array = self.templates.get_dense_templates()
-                        # for c_ind in possible_clusters:
-                        #     template = dense_templates_array[c_ind, :, :][:, chans]
-                        #     ax.plot(template.T.flatten())
-                        #     if c_ind == cluster_index:
-                        #         ax.plot(template.T.flatten(), color='m', ls='--')
-                        #     ax.set_title(f"use_fine_detector{use_fine_detector} level{level}")
-                        # plt.show()
-
-                else:
-                    # not valid because already detected
-                    spikes["cluster_index"][i] = -1
-
-            else:
-                # no possible cluster in neighborhood for this channel
-                spikes["cluster_index"][i] = -1
+        else:
+            for i in range(spikes.size):
+                self._fit_one_spike(i, spikes, spikes_prev_loop, neighbors_spikes_inds, traces, channel_motions)
 
         # delta_sample = self.nbefore + self.nafter
         # # TODO benchmark this and make this faster
@@ -754,6 +625,135 @@ class TridesclousPeeler(BaseTemplateMatching):
 
         return spikes
 
+    def _get_moved_channel(self, chan_ind, channel_motions):
+        if self.motion_aware:
+            local_motion = np.zeros(2, dtype=self.channel_locations.dtype)
+            local_motion[self.motion.dim] = channel_motions[chan_ind]
+
+            # move this channel to the original position
+            peak_location_moved = self.channel_locations[chan_ind, :] - local_motion
+            chan_ind_moved = np.argmin(np.sum((self.channel_locations - peak_location_moved) ** 2, axis=1))
+            displacement_index = np.argmin(np.sum((self.drifting_templates.displacements - local_motion) ** 2, axis=1))
+        else:
+            chan_ind_moved = chan_ind
+            displacement_index = None
+        return chan_ind_moved, displacement_index
+
+    def _fit_one_spike(self, i, spikes, spikes_prev_loop, neighbors_spikes_inds, traces, channel_motions):
+        """
+        Find the cluster, shift and amplitude of one spike and remove it from the traces.
+        """
+        sample_index = spikes["sample_index"][i]
+        chan_ind = spikes["channel_index"][i]
+        distances_shift = np.zeros(self.possible_shifts.size)
+        chan_ind_moved, displacement_index = self._get_moved_channel(chan_ind, channel_motions)
+        if self.motion_aware:
+            templates_array = self.sparse_templates_array_moved[displacement_index, :, :, :]
+            template_norms = self.template_norms_moved[displacement_index, :]
+        else:
+            templates_array = self.sparse_templates_array_static
+            template_norms = self.template_norms_static
+
+        possible_clusters = self.possible_clusters_by_channel[chan_ind_moved]
+
+        # shorten in time
+        sparse_templates_array_short = templates_array[:, self.slice_short, :]
+
+        if possible_clusters.size > 0:
+            cluster_index = get_most_probable_cluster(
+                traces,
+                sparse_templates_array_short,
+                possible_clusters,
+                sample_index,
+                self.nbefore_short,
+                self.nafter_short,
+                self.sparsity_mask,
+            )
+
+            chan_sparsity_mask = self.sparsity_mask[cluster_index, :]
+
+            # find best shift
+            numba_best_shift_sparse(
+                traces,
+                sparse_templates_array_short[cluster_index, :, :],
+                sample_index,
+                self.nbefore_short,
+                self.possible_shifts,
+                distances_shift,
+                chan_sparsity_mask,
+            )
+
+            ind_shift = np.argmin(distances_shift)
+            shift = self.possible_shifts[ind_shift]
+
+            spikes["sample_index"][i] += shift
+
+            spikes["cluster_index"][i] = cluster_index
+
+            # check that the the same cluster is not already detected at same place
+            # this can happen for small template the substract forvever the traces
+            outer_neighbors_inds = [ind for ind in neighbors_spikes_inds[i] if ind > i and ind >= spikes.size]
+            is_valid = True
+            for b in outer_neighbors_inds:
+                b = b - spikes.size
+                if (spikes[i]["sample_index"] == spikes_prev_loop[b]["sample_index"]) and (
+                    spikes[i]["cluster_index"] == spikes_prev_loop[b]["cluster_index"]
+                ):
+                    is_valid = False
+            if is_valid:
+                # temporary assign a cluster to neighbors if not done yet
+                inner_neighbors_inds = [ind for ind in neighbors_spikes_inds[i] if (ind > i and ind < spikes.size)]
+                for b in inner_neighbors_inds:
+                    spikes["cluster_index"][b] = get_most_probable_cluster(
+                        traces,
+                        sparse_templates_array_short,
+                        possible_clusters,
+                        spikes["sample_index"][b],
+                        self.nbefore_short,
+                        self.nafter_short,
+                        self.sparsity_mask,
+                    )
+
+                amp = fit_one_amplitude_with_neighbors(
+                    spikes[i],
+                    spikes[inner_neighbors_inds],
+                    traces,
+                    self.sparsity_mask,
+                    templates_array,
+                    template_norms,
+                    self.nbefore,
+                    self.nafter,
+                )
+
+                low_lim, up_lim = self.amplitude_limits
+                if low_lim <= amp <= up_lim:
+                    spikes["amplitude"][i] = amp
+                    wanted_channel_mask = np.ones(traces.shape[1], dtype=bool)
+                    construct_prediction_sparse(
+                        spikes[i : i + 1],
+                        traces,
+                        templates_array,
+                        self.sparsity_mask,
+                        wanted_channel_mask,
+                        self.nbefore,
+                        additive=False,
+                    )
+                elif low_lim > amp:
+                    spikes["cluster_index"][i] = -1
+
+                else:
+
+                    # force amplitude to be one and need a fiting at next level
+                    spikes["amplitude"][i] = 1
+
+            else:
+                # not valid because already detected
+                spikes["cluster_index"][i] = -1
+
+        else:
+            # no possible cluster in neighborhood for this channel
+            spikes["cluster_index"][i] = -1
+
 
 def get_most_probable_cluster(
     traces,
@@ -991,3 +991,33 @@ if HAVE_NUMBA:
             distances_shift[i] = sum_dist
 
         return distances_shift
+
+    @jit(nopython=True, nogil=True)
+    def get_fitting_levels(sample_inds, chan_inds, moved_chan_inds, fitting_channels_overlap, near_chan_mask, radius):
+        """
+        Split spikes (ordered by fitting order) into levels that can be fitted in parallel.
+
+        Two spikes interact when they are closer than radius samples and when their fitting channels overlap
+        or they are on near channels. Each spike has a level strictly above the level of all the spikes
+        it interacts with and that come before it, so fitting levels one after the other gives the same result
+        as the sequential fitting.
+        """
+        num_spikes = sample_inds.size
+        levels = np.zeros(num_spikes, dtype=np.int64)
+        order = np.argsort(sample_inds)
+        sorted_sample_inds = sample_inds[order]
+        for j in range(num_spikes):
+            i0 = np.searchsorted(sorted_sample_inds, sample_inds[j] - radius, side="left")
+            i1 = np.searchsorted(sorted_sample_inds, sample_inds[j] + radius, side="right")
+            level = 0
+            for k in range(i0, i1):
+                i = order[k]
+                if i >= j:
+                    continue
+                if levels[i] >= level and (
+                    fitting_channels_overlap[moved_chan_inds[i], moved_chan_inds[j]]
+                    or near_chan_mask[chan_inds[i], chan_inds[j]]
+                ):
+                    level = levels[i] + 1
+            levels[j] = level
+        return levels
@@ -113,6 +113,81 @@ def test_find_spikes_from_templates(method, sorting_analyzer):
         # plt.show()
 
 
+def test_circus_omp_cache(sorting_analyzer, tmp_path):
+    from spikeinterface.sortingcomponents.matching.circus import CircusOMPPeeler
+
+    recording = sorting_analyzer.recording
+    templates = sorting_analyzer.get_extension("templates").get_data(outputs="Templates")
+    sparsity = compute_sparsity(sorting_analyzer, method="snr", threshold=0.5)
+    templates = templates.to_sparse(sparsity)
+
+    cache_folder = tmp_path / "circus_omp_cache"
+    peeler = CircusOMPPeeler(recording, templates, shared_memory=False, cache_folder=cache_folder)
+    assert len(list(cache_folder.glob("*.npz"))) == 1
+
+    cached_peeler = CircusOMPPeeler(recording, templates, shared_memory=False, cache_folder=cache_folder)
+    no_cache_peeler = CircusOMPPeeler(recording, templates, shared_memory=False)
+    for other in (cached_peeler, no_cache_peeler):
+        for overlaps, other_overlaps in zip(peeler.overlaps, other.overlaps):
+            np.testing.assert_array_equal(overlaps, other_overlaps)
+        for key in ("temporal", "spatial", "singular", "norms", "normed_templates", "max_similarity"):
+            np.testing.assert_array_equal(getattr(peeler, key), getattr(other, key))
+
+
+def test_shared_memory_pickling(sorting_analyzer):
+    import pickle
+    from spikeinterface.sortingcomponents.matching.circus import CircusOMPPeeler
+
+    recording = sorting_analyzer.recording
+    templates = sorting_analyzer.get_extension("templates").get_data(outputs="Templates")
+    sparsity = compute_sparsity(sorting_analyzer, method="snr", threshold=0.5)
+    templates = templates.to_sparse(sparsity)
+
+    peeler = CircusOMPPeeler(recording, templates, shared_memory=False)
+    shared_peeler = CircusOMPPeeler(recording, templates, shared_memory=True)
+    # the user templates are not modified
+    assert shared_peeler.templates is not templates
+
+    # shared arrays are not copied when pickling
+    assert len(pickle.dumps(shared_peeler)) < len(pickle.dumps(peeler))
+
+    clone = pickle.loads(pickle.dumps(shared_peeler))
+    assert not clone._is_shared_memory_owner
+    np.testing.assert_array_equal(clone.overlaps, shared_peeler.overlaps)
+    np.testing.assert_array_equal(clone.templates.templates_array, templates.templates_array)
+
+    traces = recording.get_traces(start_frame=0, end_frame=10000)
+    spikes = shared_peeler.compute_matching(traces, 0, 10000, 0)
+    clone_spikes = clone.compute_matching(traces, 0, 10000, 0)
+    for field in ("sample_index", "cluster_index", "amplitude"):
+        np.testing.assert_array_equal(spikes[field], clone_spikes[field])
+
+    del clone
+    shared_peeler.clean()
+    assert len(shared_peeler._shared_memories) == 0
+
+
+def test_tdc_peeler_fitting_threads(sorting_analyzer):
+    from spikeinterface.sortingcomponents.matching.tdc_peeler import TridesclousPeeler
+
+    recording = sorting_analyzer.recording
+    templates = sorting_analyzer.get_extension("templates").get_data(outputs="Templates")
+    sparsity = compute_sparsity(sorting_analyzer, method="snr", threshold=0.5)
+    templates = templates.to_sparse(sparsity)
+    noise_levels = sorting_analyzer.get_extension("noise_levels").get_data()
+
+    peeler = TridesclousPeeler(recording, templates, noise_levels=noise_levels)
+    margin = peeler.get_margin()
+    traces = recording.get_traces(start_frame=0, end_frame=20000 + 2 * margin)
+
+    # same node to get the same fine detector thresholds
+    spikes = peeler.compute_matching(traces, margin, 20000 + margin, 0)
+    peeler.num_fitting_threads = 4
+    threaded_spikes = peeler.compute_matching(traces, margin, 20000 + margin, 0)
+    for field in ("sample_index", "cluster_index", "amplitude"):
+        np.testing.assert_array_equal(spikes[field], threaded_spikes[field])
+
+
 if __name__ == "__main__":
     sorting_analyzer = get_sorting_analyzer()
     # method = "nearest"
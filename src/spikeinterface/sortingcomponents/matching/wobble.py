@@ -375,7 +375,7 @@ class WobbleMatch(BaseTemplateMatching):
     torch_device : string in ["cpu", "cuda", None]. Default "cpu"
             Controls torch device if the torch engine is selected
     shared_memory : bool, default True
-            If True, the overlaps are stored in shared memory, which is more efficient when
+            If True, the overlaps and the templates are stored in shared memory, which is more efficient when
             using numerous cores
     """
 
@@ -433,16 +433,15 @@ class WobbleMatch(BaseTemplateMatching):
             num_samples = len(pairwise_convolution[0][0])
             num_templates = len(templates_array)
             num_jittered = num_templates * params.jitter_factor
-            from spikeinterface.core.core_tools import make_shared_array
-
-            arr, shm = make_shared_array((num_jittered, self.max_overlaps, num_samples), dtype=np.float32)
+            self.pairwise_convolution = np.zeros((num_jittered, self.max_overlaps, num_samples), dtype=np.float32)
             for jittered_index in range(num_jittered):
                 units_are_overlapping = sparsity.unit_overlap[jittered_index, :]
                 overlapping_units = np.where(units_are_overlapping)[0]
                 n_overlaps = len(overlapping_units)
-                arr[jittered_index, :n_overlaps] = pairwise_convolution[jittered_index]
-            pairwise_convolution = [arr]
-            self.shm = shm
+                self.pairwise_convolution[jittered_index, :n_overlaps] = pairwise_convolution[jittered_index]
+            self.share_arrays(["pairwise_convolution"])
+            self.share_templates_array()
+            pairwise_convolution = [self.pairwise_convolution]
 
         norm_squared = compute_template_norm(sparsity.visible_channels, templates_array)
 
@@ -470,17 +469,10 @@ class WobbleMatch(BaseTemplateMatching):
         self.margin = 300  # To ensure equivalence with spike-psvae version of the algorithm
 
     def clean(self):
-        if self.shared_memory and self.shm is not None:
-            self.template_meta = None
-            self.shm.close()
-            self.shm.unlink()
-            self.shm = None
-
-    def __del__(self):
-        if self.shared_memory and self.shm is not None:
-            self.template_meta = None
-            self.shm.close()
-            self.shm = None
+        if self.shared_memory:
+            # template_data holds a reference to the shared pairwise convolution
+            self.template_data = None
+        BaseTemplateMatching.clean(self)
 
     def _push_to_torch(self):
         if self.engine == "torch":
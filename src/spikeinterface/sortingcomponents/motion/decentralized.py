@@ -56,14 +56,21 @@ class DecentralizedRegistration:
         For parwaise displacement, how to to rescale the associated weight matrix.
     error_sigma: float, default: 0.2
         In case weight_scale="exp" this controls the sigma of the exponential.
-    conv_engine: "numpy" or "torch" or None, default: None
+    conv_engine: "numpy" or "torch" or "fft" or None, default: None
         In case of pairwise_displacement_method="conv", what library to use to compute
-        the underlying correlation
+        the underlying correlation. "fft" computes the spectrum of every time bin once and gets
+        the correlation of all pairs through batched spectrum products, which is much faster than
+        "numpy" on CPU for long recordings.
     torch_device=None
         In case of conv_engine="torch", you can control which device (cpu or gpu)
     batch_size: int
         Size of batch for the convolution. Increasing this will speed things up dramatically
-        on GPUs and sometimes on CPU as well.
+        on GPUs and sometimes on CPU as well. For conv_engine="fft" this is the number of time bins
+        correlated at once against all others.
+    num_threads: int, default: 1
+        Number of threads used to build the motion histogram (over chunks of peaks) and to compute
+        the pairwise displacement. With several non rigid windows, windows are processed in parallel,
+        otherwise (conv_engine="fft" only) batches of time bins are.
     corr_threshold: float
         Minimum correlation between pair of time bins in order for these to be
         considered when optimizing a global displacment vector to align with
@@ -72,6 +79,7 @@ class DecentralizedRegistration:
         When not None the parwise discplament matrix is computed in a small time horizon.
         In short only pair of bins close in time.
         So the pariwaise matrix is super sparse and have values only the diagonal.
+        With conv_engine="fft", pairs outside the horizon are not computed at all.
     convergence_method: "lsmr" | "lsqr_robust" | "gradient_descent", default: "lsmr"
         Which method to use to compute the global displacement vector from the pairwise matrix.
     robust_regression_sigma: float
@@ -120,6 +128,7 @@ class DecentralizedRegistration:
         conv_engine=None,
         torch_device=None,
         batch_size=1,
+        num_threads=1,
         corr_threshold=0.0,
         time_horizon_s=None,
         convergence_method="lsmr",
@@ -169,6 +178,7 @@ class DecentralizedRegistration:
             weight_with_amplitude=weight_with_amplitude,
             depth_smooth_um=histogram_depth_smooth_um,
             time_smooth_s=histogram_time_smooth_s,
+            num_threads=num_threads,
         )
 
         if extra is not None:
@@ -191,13 +201,11 @@ class DecentralizedRegistration:
             all_pairwise_displacement_weights = np.empty(
                 (len(non_rigid_windows), temporal_bins.size, temporal_bins.size), dtype=np.float64
             )
-        for i, win in enumerate(windows_iter):
+
+        def _pairwise_for_window(win, inner_num_threads):
             window_slice = np.flatnonzero(win > 1e-5)
             window_slice = slice(window_slice[0], window_slice[-1])
-            if verbose:
-                print(f"Computing pairwise displacement: {i + 1} / {len(non_rigid_windows)}")
-
-            pairwise_displacement, pairwise_displacement_weight = compute_pairwise_displacement(
+            return compute_pairwise_displacement(
                 motion_histogram[:, window_slice],
                 bin_um,
                 window=win[window_slice],
@@ -214,8 +222,31 @@ class DecentralizedRegistration:
                 time_horizon_s=time_horizon_s,
                 bin_s=bin_s,
                 progress_bar=False,
+                num_threads=inner_num_threads,
             )
 
+        num_windows = len(non_rigid_windows)
+        if num_threads > 1 and num_windows > 1:
+            # windows are independent: keep at most num_threads windows in flight
+            from concurrent.futures import ThreadPoolExecutor
+
+            executor = ThreadPoolExecutor(max_workers=num_threads)
+            futures = [executor.submit(_pairwise_for_window, win, 1) for win in non_rigid_windows[:num_threads]]
+        else:
+            executor = None
+
+        for i, win in enumerate(windows_iter):
+            if verbose:
+                print(f"Computing pairwise displacement: {i + 1} / {num_windows}")
+
+            if executor is not None:
+                pairwise_displacement, pairwise_displacement_weight = futures[i].result()
+                futures[i] = None
+                if i + num_threads < num_windows:
+                    futures.append(executor.submit(_pairwise_for_window, non_rigid_windows[i + num_threads], 1))
+            else:
+                pairwise_displacement, pairwise_displacement_weight = _pairwise_for_window(win, num_threads)
+
             if spatial_prior:
                 all_pairwise_displacements[i] = pairwise_displacement
                 all_pairwise_displacement_weights[i] = pairwise_displacement_weight
@@ -224,7 +255,7 @@ class DecentralizedRegistration:
                 extra["pairwise_displacement_list"].append(pairwise_displacement)
 
             if verbose:
-                print(f"Computing global displacement: {i + 1} / {len(non_rigid_windows)}")
+                print(f"Computing global displacement: {i + 1} / {num_windows}")
 
             # TODO: if spatial_prior, do this after the loop
             if not spatial_prior:
@@ -240,6 +271,9 @@ class DecentralizedRegistration:
                     progress_bar=False,
                 )
 
+        if executor is not None:
+            executor.shutdown()
+
         if spatial_prior:
             motion_array = compute_global_displacement(
                 all_pairwise_displacements,
@@ -310,6 +344,7 @@ def compute_pairwise_displacement(
     bin_s=None,
     progress_bar=False,
     window=None,
+    num_threads=1,
 ):
     """
     Compute pairwise displacement
@@ -328,7 +363,7 @@ def compute_pairwise_displacement(
     if conv_engine == "torch":
         import torch
 
-    assert conv_engine in ("torch", "numpy"), f"'conv_engine' must be 'torch' or 'numpy'"
+    assert conv_engine in ("torch", "numpy", "fft"), f"'conv_engine' must be 'torch', 'numpy' or 'fft'"
     size = motion_hist.shape[0]
     pairwise_displacement = np.zeros((size, size), dtype="float32")
 
@@ -353,36 +388,51 @@ def compute_pairwise_displacement(
 
         xrange = trange if progress_bar else range
 
-        motion_hist_engine = motion_hist
-        window_engine = window
-        if conv_engine == "torch":
-            motion_hist_engine = torch.as_tensor(motion_hist, dtype=torch.float32, device=torch_device)
-            window_engine = torch.as_tensor(window, dtype=torch.float32, device=torch_device)
-
-        pairwise_displacement = np.empty((size, size), dtype=np.float32)
-        correlation = np.empty((size, size), dtype=motion_hist.dtype)
-
-        for i in xrange(0, size, batch_size):
-            corr = normxcorr1d(
-                motion_hist_engine,
-                motion_hist_engine[i : i + batch_size],
-                weights=window_engine,
-                padding=possible_displacement.size // 2,
-                conv_engine=conv_engine,
+        if conv_engine == "fft":
+            best_disp_inds, correlation = fft_pairwise_normxcorr(
+                motion_hist,
+                possible_displacement.size // 2,
+                weights=window,
                 normalized=normalized_xcorr,
                 centered=centered_xcorr,
+                batch_size=batch_size,
+                band_width=band_width if time_horizon_s is not None else None,
+                num_threads=num_threads,
+                progress_bar=progress_bar,
             )
+            pairwise_displacement = possible_displacement[best_disp_inds].astype(np.float32)
+            correlation = correlation.astype(motion_hist.dtype, copy=False)
+        else:
+            motion_hist_engine = motion_hist
+            window_engine = window
             if conv_engine == "torch":
-                max_corr, best_disp_inds = torch.max(corr, dim=2)
-                best_disp = possible_displacement[best_disp_inds.cpu()]
-                pairwise_displacement[i : i + batch_size] = best_disp
-                correlation[i : i + batch_size] = max_corr.cpu()
-            elif conv_engine == "numpy":
-                best_disp_inds = np.argmax(corr, axis=2)
-                max_corr = np.take_along_axis(corr, best_disp_inds[..., None], 2).squeeze()
-                best_disp = possible_displacement[best_disp_inds]
-                pairwise_displacement[i : i + batch_size] = best_disp
-                correlation[i : i + batch_size] = max_corr
+                motion_hist_engine = torch.as_tensor(motion_hist, dtype=torch.float32, device=torch_device)
+                window_engine = torch.as_tensor(window, dtype=torch.float32, device=torch_device)
+
+            pairwise_displacement = np.empty((size, size), dtype=np.float32)
+            correlation = np.empty((size, size), dtype=motion_hist.dtype)
+
+            for i in xrange(0, size, batch_size):
+                corr = normxcorr1d(
+                    motion_hist_engine,
+                    motion_hist_engine[i : i + batch_size],
+                    weights=window_engine,
+                    padding=possible_displacement.size // 2,
+                    conv_engine=conv_engine,
+                    normalized=normalized_xcorr,
+                    centered=centered_xcorr,
+                )
+                if conv_engine == "torch":
+                    max_corr, best_disp_inds = torch.max(corr, dim=2)
+                    best_disp = possible_displacement[best_disp_inds.cpu()]
+                    pairwise_displacement[i : i + batch_size] = best_disp
+                    correlation[i : i + batch_size] = max_corr.cpu()
+                elif conv_engine == "numpy":
+                    best_disp_inds = np.argmax(corr, axis=2)
+                    max_corr = np.take_along_axis(corr, best_disp_inds[..., None], 2).squeeze()
+                    best_disp = possible_displacement[best_disp_inds]
+                    pairwise_displacement[i : i + batch_size] = best_disp
+                    correlation[i : i + batch_size] = max_corr
 
         if corr_threshold is not None and corr_threshold > 0:
             which = correlation > corr_threshold
@@ -432,6 +482,144 @@ def compute_pairwise_displacement(
     return pairwise_displacement, pairwise_displacement_weight
 
 
+def fft_pairwise_normxcorr(
+    motion_hist,
+    padding,
+    weights=None,
+    normalized=True,
+    centered=True,
+    batch_size=1,
+    band_width=None,
+    num_threads=1,
+    progress_bar=False,
+):
+    """
+    Best lag and correlation for all pairs of rows of motion_hist, computed with FFTs.
+
+    This gives the same result as `normxcorr1d(motion_hist, motion_hist, ...)` followed by an argmax
+    over lags, but the spectrum of each row is computed only once. The per-row terms of the
+    formula (means and variances per lag) are also computed once and only the cross term
+    is computed for each pair, as a product of spectra.
+
+    Parameters
+    ----------
+    motion_hist : np.array, shape (num_bins, length)
+        The histogram, one row per time bin
+    padding : int
+        Maximum lag (in spatial bins), lags are in [-padding, padding]
+    weights : np.array, shape (length,) or None
+        Optional weights (the spatial window)
+    normalized, centered : bool
+        See `normxcorr1d`
+    batch_size : int
+        Number of rows correlated at once against all the others
+    band_width : int or None
+        When not None, only pairs (i, j) with |i - j| < band_width are computed, the others
+        get a lag of 0 and a correlation of 0
+    num_threads : int
+        Number of threads used to process the batches
+    progress_bar : bool
+        Display a progress bar over batches
+
+    Returns
+    -------
+    best_lag_inds : np.array, shape (num_bins, num_bins)
+        Index of the best lag in np.arange(-padding, padding + 1)
+    max_corr : np.array, shape (num_bins, num_bins)
+        The correlation at the best lag
+    """
+    import scipy.fft
+    from scipy.signal import correlate
+
+    size, length = motion_hist.shape
+    x = motion_hist.astype(np.float64, copy=False)
+    if weights is None:
+        weights = np.ones(length, dtype=np.float64)
+    weights = np.asarray(weights, dtype=np.float64)
+    wt = x * weights[None, :]
+
+    # lag d is at position d % nfft of the circular cross-correlation, nfft >= length + padding avoids aliasing
+    nfft = scipy.fft.next_fast_len(length + padding, real=True)
+    lag_inds = np.arange(-padding, padding + 1) % nfft
+
+    def xcorr(f_hat, g_hat):
+        # out[..., d] = sum_m f[m + d] * g[m]
+        return scipy.fft.irfft(f_hat * np.conj(g_hat), n=nfft, axis=-1)[..., lag_inds]
+
+    ones_hat = scipy.fft.rfft(np.ones(length), n=nfft)
+    weights_hat = scipy.fft.rfft(weights, n=nfft)
+    x_hat = scipy.fft.rfft(x, n=nfft, axis=1)
+    wt_hat = scipy.fft.rfft(wt, n=nfft, axis=1)
+
+    # number of points per lag is computed directly so that empty lags are exact zeros
+    Nx = correlate(np.pad(np.ones(length), padding), weights, mode="valid")
+    empty = Nx == 0
+    Nx[empty] = 1
+
+    # per row terms, shape (size, 2 * padding + 1): rows as x (a) and rows as template (t)
+    if centered:
+        Et = xcorr(ones_hat[None, :], wt_hat) / Nx
+        Ex = xcorr(x_hat, weights_hat[None, :]) / Nx
+    if normalized:
+        var_t = xcorr(ones_hat[None, :], scipy.fft.rfft(wt * x, n=nfft, axis=1)) / Nx
+        var_x = xcorr(scipy.fft.rfft(x * x, n=nfft, axis=1), weights_hat[None, :]) / Nx
+        if centered:
+            var_t -= np.square(Et)
+            var_x -= np.square(Ex)
+        var_t[var_t <= 0] = 1
+        var_x[var_x <= 0] = 1
+        inv_std_t = 1 / np.sqrt(var_t)
+        inv_std_x = 1 / np.sqrt(var_x)
+
+    best_lag_inds = np.full((size, size), padding, dtype=np.int64)
+    max_corr = np.zeros((size, size), dtype=np.float64)
+
+    def process_batch(i0):
+        i1 = min(i0 + batch_size, size)
+        if band_width is None:
+            j0, j1 = 0, size
+        else:
+            j0, j1 = max(0, i0 - band_width + 1), min(size, i1 + band_width - 1)
+
+        corr = xcorr(x_hat[i0:i1, None, :], wt_hat[None, j0:j1, :])
+        corr /= Nx
+        if centered:
+            corr -= Ex[i0:i1, None, :] * Et[None, j0:j1, :]
+        if normalized:
+            corr[:, :, empty] = 0
+            corr *= inv_std_x[i0:i1, None, :]
+            corr *= inv_std_t[None, j0:j1, :]
+
+        inds = np.argmax(corr, axis=2)
+        best_lag_inds[i0:i1, j0:j1] = inds
+        max_corr[i0:i1, j0:j1] = np.take_along_axis(corr, inds[..., None], 2)[..., 0]
+
+        if band_width is not None:
+            # pairs of the batch block outside of the band
+            ii, jj = np.meshgrid(np.arange(i0, i1), np.arange(j0, j1), indexing="ij")
+            outside = np.abs(ii - jj) >= band_width
+            best_lag_inds[i0:i1, j0:j1][outside] = padding
+            max_corr[i0:i1, j0:j1][outside] = 0
+
+    batch_starts = range(0, size, batch_size)
+    if num_threads > 1:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=num_threads) as executor:
+            results = executor.map(process_batch, batch_starts)
+            if progress_bar:
+                results = tqdm(results, total=len(batch_starts))
+            for _ in results:
+                pass
+    else:
+        if progress_bar:
+            batch_starts = tqdm(batch_starts)
+        for i0 in batch_starts:
+            process_batch(i0)
+
+    return best_lag_inds, max_corr
+
+
 _possible_convergence_method = ("lsmr", "gradient_descent", "lsqr_robust")
 
 
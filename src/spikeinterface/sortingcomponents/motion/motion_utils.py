@@ -170,6 +170,38 @@ def get_spatial_bin_edges(recording, direction, hist_margin_um, bin_um):
     return spatial_bins
 
 
+def _chunked_histogramdd(get_chunk, num_peaks, bins, chunk_size=None, num_threads=1):
+    """
+    Accumulate a histogram over chunks of peaks.
+
+    `get_chunk(start, stop)` returns the (num, ndim) array of coordinates and the optional weights for
+    peaks[start:stop]. Only one chunk per thread is in memory at a time, so peaks can be memmapped.
+    Each thread accumulates a partial histogram over a contiguous range of chunks and the
+    partial histograms are summed at the end.
+    """
+    if chunk_size is None or chunk_size <= 0:
+        chunk_size = max(num_peaks, 1)
+    chunk_starts = np.arange(0, num_peaks, chunk_size)
+    shape = tuple(b.size - 1 for b in bins)
+
+    def accumulate(starts):
+        histogram = np.zeros(shape, dtype="float64")
+        for start in starts:
+            arr, weights = get_chunk(start, min(start + chunk_size, num_peaks))
+            histogram += np.histogramdd(arr, bins=bins, weights=weights)[0]
+        return histogram
+
+    num_threads = max(1, min(num_threads, chunk_starts.size))
+    if num_threads == 1:
+        return accumulate(chunk_starts)
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=num_threads) as executor:
+        partial_histograms = list(executor.map(accumulate, np.array_split(chunk_starts, num_threads)))
+    return np.sum(partial_histograms, axis=0)
+
+
 def make_2d_motion_histogram(
     recording,
     peaks,
@@ -183,6 +215,8 @@ def make_2d_motion_histogram(
     spatial_bin_edges=None,
     depth_smooth_um=None,
     time_smooth_s=None,
+    chunk_size=1_000_000,
+    num_threads=1,
 ):
     """
     Generate 2d motion histogram in depth and time.
@@ -217,6 +251,12 @@ def make_2d_motion_histogram(
     time_smooth_s: None or float
         Optional gaussian smoother on histogram on time axis.
         This is given as the sigma of the gaussian in seconds.
+    chunk_size : int or None, default: 1_000_000
+        Number of peaks binned at once. Partial histograms are accumulated chunk by chunk, so peaks and
+        peak_locations can be memmapped arrays (np.load(..., mmap_mode="r")) that are never fully loaded.
+        None bins all peaks in one shot.
+    num_threads : int, default: 1
+        Number of threads accumulating partial histograms over chunks of peaks.
 
     Returns
     -------
@@ -236,20 +276,25 @@ def make_2d_motion_histogram(
     else:
         bin_um = spatial_bin_edges[1] - spatial_bin_edges[0]
 
-    arr = np.zeros((peaks.size, 2), dtype="float64")
-    arr[:, 0] = recording.sample_index_to_time(peaks["sample_index"])
-    arr[:, 1] = peak_locations[direction]
-
-    if weight_with_amplitude:
-        weights = np.abs(peaks["amplitude"])
-    else:
-        weights = None
+    def get_chunk(start, stop):
+        peaks_chunk = peaks[start:stop]
+        arr = np.zeros((peaks_chunk.size, 2), dtype="float64")
+        arr[:, 0] = recording.sample_index_to_time(peaks_chunk["sample_index"])
+        arr[:, 1] = peak_locations[start:stop][direction]
+        weights = np.abs(peaks_chunk["amplitude"]) if weight_with_amplitude else None
+        return arr, weights
 
-    motion_histogram, edges = np.histogramdd(arr, bins=(temporal_bin_edges, spatial_bin_edges), weights=weights)
+    bins = (temporal_bin_edges, spatial_bin_edges)
+    motion_histogram = _chunked_histogramdd(get_chunk, peaks.size, bins, chunk_size, num_threads)
 
     # average amplitude in each bin
     if weight_with_amplitude and avg_in_bin:
-        bin_counts, _ = np.histogramdd(arr, bins=(temporal_bin_edges, spatial_bin_edges))
+
+        def get_chunk_counts(start, stop):
+            arr, _ = get_chunk(start, stop)
+            return arr, None
+
+        bin_counts = _chunked_histogramdd(get_chunk_counts, peaks.size, bins, chunk_size, num_threads)
         bin_counts[bin_counts == 0] = 1
         motion_histogram = motion_histogram / bin_counts
 
@@ -275,6 +320,8 @@ def make_3d_motion_histograms(
     num_amp_bins=20,
     log_transform=True,
     spatial_bin_edges=None,
+    chunk_size=1_000_000,
+    num_threads=1,
 ):
     """
     Generate 3d motion histograms in depth, amplitude, and time.
@@ -302,6 +349,12 @@ def make_3d_motion_histograms(
         If True, histograms are log-transformed
     spatial_bin_edges : np.array, default: None
         The pre-computed spatial bin edges
+    chunk_size : int or None, default: 1_000_000
+        Number of peaks binned at once. Partial histograms are accumulated chunk by chunk, so peaks and
+        peak_locations can be memmapped arrays (np.load(..., mmap_mode="r")) that are never fully loaded.
+        None bins all peaks in one shot.
+    num_threads : int, default: 1
+        Number of threads accumulating partial histograms over chunks of peaks.
 
     Returns
     -------
@@ -319,28 +372,34 @@ def make_3d_motion_histograms(
     if spatial_bin_edges is None:
         spatial_bin_edges = get_spatial_bin_edges(recording, direction, hist_margin_um, bin_um)
 
-    # pre-compute abs amplitude and ranges for scaling
+    # pre-compute abs amplitude ranges for scaling
     amplitude_bin_edges = np.linspace(0, 1, num_amp_bins + 1)
-    abs_peaks = np.abs(peaks["amplitude"])
-    max_peak_amp = np.max(abs_peaks)
-    min_peak_amp = np.min(abs_peaks)
-    # log amplitudes and scale between 0-1
-    abs_peaks_log_norm = (np.log10(abs_peaks) - np.log10(min_peak_amp)) / (
-        np.log10(max_peak_amp) - np.log10(min_peak_amp)
-    )
-
-    arr = np.zeros((peaks.size, 3), dtype="float64")
-    arr[:, 0] = recording.sample_index_to_time(peaks["sample_index"])
-    arr[:, 1] = peak_locations[direction]
-    arr[:, 2] = abs_peaks_log_norm
-
-    motion_histograms, edges = np.histogramdd(
-        arr,
-        bins=(
-            temporal_bin_edges,
-            spatial_bin_edges,
-            amplitude_bin_edges,
-        ),
+    step = max(peaks.size if chunk_size is None or chunk_size <= 0 else chunk_size, 1)
+    min_peak_amp, max_peak_amp = np.inf, -np.inf
+    for start in range(0, peaks.size, step):
+        abs_peaks = np.abs(peaks[start : start + step]["amplitude"])
+        min_peak_amp = min(min_peak_amp, np.min(abs_peaks))
+        max_peak_amp = max(max_peak_amp, np.max(abs_peaks))
+
+    def get_chunk(start, stop):
+        peaks_chunk = peaks[start:stop]
+        abs_peaks = np.abs(peaks_chunk["amplitude"])
+        # log amplitudes and scale between 0-1
+        abs_peaks_log_norm = (np.log10(abs_peaks) - np.log10(min_peak_amp)) / (
+            np.log10(max_peak_amp) - np.log10(min_peak_amp)
+        )
+        arr = np.zeros((peaks_chunk.size, 3), dtype="float64")
+        arr[:, 0] = recording.sample_index_to_time(peaks_chunk["sample_index"])
+        arr[:, 1] = peak_locations[start:stop][direction]
+        arr[:, 2] = abs_peaks_log_norm
+        return arr, None
+
+    motion_histograms = _chunked_histogramdd(
+        get_chunk,
+        peaks.size,
+        (temporal_bin_edges, spatial_bin_edges, amplitude_bin_edges),
+        chunk_size,
+        num_threads,
     )
 
     if log_transform:
@@ -5,6 +5,8 @@ import pytest
 from spikeinterface import get_noise_levels
 from spikeinterface.core.node_pipeline import ExtractDenseWaveforms, run_node_pipeline, PipelineNode
 from spikeinterface.sortingcomponents.motion import estimate_motion
+from spikeinterface.sortingcomponents.motion.decentralized import compute_pairwise_displacement
+from spikeinterface.sortingcomponents.motion.motion_utils import make_2d_motion_histogram, make_3d_motion_histograms
 from spikeinterface.sortingcomponents.peak_detection import detect_peaks, detect_peak_methods
 from spikeinterface.sortingcomponents.peak_localization.method_list import LocalizeCenterOfMass
 from spikeinterface.sortingcomponents.tests.common import make_dataset
@@ -159,6 +161,19 @@ def test_estimate_motion(dataset):
             conv_engine="numpy",
             time_horizon_s=5.0,
         ),
+        "rigid / decentralized / fft": dict(
+            rigid=True,
+            method="decentralized",
+            conv_engine="fft",
+            time_horizon_s=None,
+        ),
+        "non-rigid / decentralized / fft / time_horizon_s": dict(
+            rigid=False,
+            method="decentralized",
+            conv_engine="fft",
+            time_horizon_s=5.0,
+            num_threads=2,
+        ),
         "non-rigid / decentralized / torch / gradient_descent": dict(
             rigid=False,
             method="decentralized",
@@ -257,6 +272,73 @@ def test_estimate_motion(dataset):
         motion1 = motions["non-rigid / decentralized / numpy / spatial_prior"]
         np.testing.assert_array_almost_equal(motion0.displacement, motion1.displacement)
 
+        motion0 = motions["rigid / decentralized / numpy"]
+        motion1 = motions["rigid / decentralized / fft"]
+        np.testing.assert_array_almost_equal(motion0.displacement, motion1.displacement)
+
+        motion0 = motions["non-rigid / decentralized / numpy / time_horizon_s"]
+        motion1 = motions["non-rigid / decentralized / fft / time_horizon_s"]
+        np.testing.assert_array_almost_equal(motion0.displacement, motion1.displacement)
+
+
+def test_compute_pairwise_displacement_fft():
+    rng = np.random.default_rng(seed=2205)
+    motion_hist = rng.random((80, 40)).astype("float32") ** 4
+    motion_hist[3, :] = 0
+    window = np.hanning(42)[1:-1]
+
+    for time_horizon_s in (None, 10.0):
+        kwargs = dict(
+            bin_um=5.0,
+            window=window,
+            max_displacement_um=40.0,
+            time_horizon_s=time_horizon_s,
+            bin_s=1.0,
+            batch_size=8,
+        )
+        displacement0, weight0 = compute_pairwise_displacement(motion_hist, conv_engine="numpy", **kwargs)
+        displacement1, weight1 = compute_pairwise_displacement(motion_hist, conv_engine="fft", num_threads=2, **kwargs)
+        # pairs out of the time horizon are not computed with fft
+        mask = weight0 > 0
+        np.testing.assert_array_equal(displacement0[mask], displacement1[mask])
+        np.testing.assert_array_almost_equal(weight0, weight1, decimal=5)
+
+
+def test_make_motion_histograms_chunked(dataset):
+    recording, recording_with_times, sorting, cache_folder = dataset
+
+    # memmapped peaks are only read chunk by chunk
+    peaks = np.load(cache_folder / "dataset_peaks.npy", mmap_mode="r")
+    peak_locations = np.load(cache_folder / "dataset_peak_locations.npy", mmap_mode="r")
+
+    for rec in [recording, recording_with_times]:
+        kwargs = dict(direction="y", bin_s=1.0, bin_um=10.0, hist_margin_um=5)
+        hist0, temporal_edges0, spatial_edges0 = make_2d_motion_histogram(
+            rec, peaks, peak_locations, weight_with_amplitude=True, chunk_size=None, **kwargs
+        )
+        hist1, temporal_edges1, spatial_edges1 = make_2d_motion_histogram(
+            rec, peaks, peak_locations, weight_with_amplitude=True, chunk_size=500, num_threads=2, **kwargs
+        )
+        np.testing.assert_array_equal(temporal_edges0, temporal_edges1)
+        np.testing.assert_array_equal(spatial_edges0, spatial_edges1)
+        np.testing.assert_array_almost_equal(hist0, hist1)
+
+        hist0, _, _ = make_3d_motion_histograms(rec, peaks, peak_locations, chunk_size=None, **kwargs)
+        hist1, _, _ = make_3d_motion_histograms(rec, peaks, peak_locations, chunk_size=500, num_threads=2, **kwargs)
+        np.testing.assert_array_equal(hist0, hist1)
+
+    # no peaks at all gives empty histograms
+    for chunk_size in (None, 500):
+        hist, temporal_edges, spatial_edges = make_2d_motion_histogram(
+            recording, peaks[:0], peak_locations[:0], weight_with_amplitude=True, chunk_size=chunk_size, **kwargs
+        )
+        assert hist.shape == (temporal_edges.size - 1, spatial_edges.size - 1)
+        assert np.all(hist == 0)
+        hist, _, _ = make_3d_motion_histograms(
+            recording, peaks[:0], peak_locations[:0], chunk_size=chunk_size, **kwargs
+        )
+        assert np.all(hist == 0)
+
 
 if __name__ == "__main__":
     import tempfile
@@ -45,6 +45,10 @@ class LocallyExclusivePeakDetector(PeakDetector):
     params_doc = ByChannelPeakDetector.params_doc + """
     radius_um: float
         The radius to use to select neighbour channels for locally exclusive detection.
+    parallel_kernel: bool
+        If True, use a multi-threaded kernel that loops over blocks of channels in parallel, using a sparse (CSR) list of
+        neighbour channels, and does not allocate a peak mask of the size of the chunk. This is useful for large
+        chunks processed by few workers.
     """
 
     def __init__(
@@ -56,6 +60,7 @@ class LocallyExclusivePeakDetector(PeakDetector):
         radius_um=50,
         noise_levels=None,
         return_output=True,
+        parallel_kernel=False,
     ):
         if not HAVE_NUMBA:
             raise ModuleNotFoundError('"locally_exclusive" needs numba which is not installed')
@@ -84,15 +89,30 @@ class LocallyExclusivePeakDetector(PeakDetector):
         self.channel_distance = get_channel_distances(recording)
         self.neighbours_mask = self.channel_distance <= radius_um
 
+        self.parallel_kernel = parallel_kernel
+        # sparse (CSR) representation of the neighbours
+        self.neighbours_indptr = np.concatenate([[0], np.cumsum(np.sum(self.neighbours_mask, axis=1))])
+        self.neighbours_indices = np.nonzero(self.neighbours_mask)[1]
+
     def get_margin(self):
         # the +1 in the border is important because we need peak in the border
         return self.exclude_sweep_size + 1
 
     def compute(self, traces, start_frame, end_frame, segment_index, max_margin):
         assert HAVE_NUMBA, "You need to install numba"
-        peak_sample_ind, peak_chan_ind = detect_peaks_numba_locally_exclusive_on_chunk(
-            traces, self.peak_sign, self.abs_thresholds, self.exclude_sweep_size, self.neighbours_mask
-        )
+        if self.parallel_kernel:
+            peak_sample_ind, peak_chan_ind = detect_peaks_numba_locally_exclusive_on_chunk_csr(
+                traces,
+                self.peak_sign,
+                self.abs_thresholds,
+                self.exclude_sweep_size,
+                self.neighbours_indptr,
+                self.neighbours_indices,
+            )
+        else:
+            peak_sample_ind, peak_chan_ind = detect_peaks_numba_locally_exclusive_on_chunk(
+                traces, self.peak_sign, self.abs_thresholds, self.exclude_sweep_size, self.neighbours_mask
+            )
 
         peak_amplitude = traces[peak_sample_ind, peak_chan_ind]
 
@@ -187,6 +207,118 @@ if HAVE_NUMBA:
 
         return samples_inds, chan_inds
 
+    @numba.jit(nopython=True, nogil=True, fastmath=True)
+    def _is_peak_candidate(traces, s, chan_ind, abs_thresholds, do_neg, do_pos):
+        value = traces[s, chan_ind]
+        if do_neg:
+            if (
+                (value <= -abs_thresholds[chan_ind])
+                and (value < traces[s - 1, chan_ind])
+                and (value <= traces[s + 1, chan_ind])
+            ):
+                return True
+        if do_pos:
+            if (
+                (value >= abs_thresholds[chan_ind])
+                and (value > traces[s - 1, chan_ind])
+                and (value >= traces[s + 1, chan_ind])
+            ):
+                return True
+        return False
+
+    def detect_peaks_numba_locally_exclusive_on_chunk_csr(
+        traces,
+        peak_sign,
+        abs_thresholds,
+        exclude_sweep_size,
+        neighbours_indptr,
+        neighbours_indices,
+    ):
+        """
+        Same as `detect_peaks_numba_locally_exclusive_on_chunk()` but channels are processed in parallel,
+        neighbours are given as a CSR list (neighbours of channel c are
+        `neighbours_indices[neighbours_indptr[c]:neighbours_indptr[c + 1]]`) and peaks are checked
+        against their neighbours in the same pass as they are detected.
+        """
+        chan_peak_samples, chan_num_peaks = _detect_peaks_locally_exclusive_by_channel_csr(
+            traces, peak_sign, abs_thresholds, exclude_sweep_size, neighbours_indptr, neighbours_indices
+        )
+        # rows are filled up to the number of peaks of each channel
+        valid = np.arange(chan_peak_samples.shape[1])[None, :] < chan_num_peaks[:, None]
+        samples_inds = chan_peak_samples[valid]
+        chan_inds = np.repeat(np.arange(traces.shape[1]), chan_num_peaks)
+
+        # same ordering as the dense kernel: by sample and then by channel
+        order = np.lexsort((chan_inds, samples_inds))
+
+        return samples_inds[order], chan_inds[order]
+
+    @numba.jit(nopython=True, parallel=True, nogil=True, fastmath=True)
+    def _detect_peaks_locally_exclusive_by_channel_csr(
+        traces,
+        peak_sign,
+        abs_thresholds,
+        exclude_sweep_size,
+        neighbours_indptr,
+        neighbours_indices,
+        chan_block_size=16,
+    ):
+        num_chans = traces.shape[1]
+        num_samples = traces.shape[0]
+
+        do_pos = peak_sign in ("pos", "both")
+        do_neg = peak_sign in ("neg", "both")
+
+        # a channel is its own neighbour, so kept peaks on a channel are at least exclude_sweep_size + 1 apart
+        # (with peak_sign="both" and exclude_sweep_size=0, a negative and a positive peak can be consecutive)
+        max_num_peaks = num_samples // (exclude_sweep_size + 1) + 1
+        chan_peak_samples = np.zeros((num_chans, max_num_peaks), dtype=np.int64)
+        chan_num_peaks = np.zeros(num_chans, dtype=np.int64)
+
+        # channels are processed by blocks: inside a block, traces are read sample by sample (contiguous in memory)
+        num_blocks = (num_chans + chan_block_size - 1) // chan_block_size
+        for block_ind in numba.prange(num_blocks):
+            chan_start = block_ind * chan_block_size
+            chan_end = min(chan_start + chan_block_size, num_chans)
+            for s in range(exclude_sweep_size + 1, num_samples - exclude_sweep_size - 1):
+                for chan_ind in range(chan_start, chan_end):
+                    # cheap threshold test first, most samples are rejected here
+                    if abs(traces[s, chan_ind]) < abs_thresholds[chan_ind]:
+                        continue
+                    if not _is_peak_candidate(traces, s, chan_ind, abs_thresholds, do_neg, do_pos):
+                        continue
+
+                    value_i = abs(traces[s, chan_ind]) / abs_thresholds[chan_ind]
+                    keep = True
+                    for k in range(neighbours_indptr[chan_ind], neighbours_indptr[chan_ind + 1]):
+                        neighbour_ind = neighbours_indices[k]
+                        # search for neighbors with higher amplitudes inside the temporal zone
+                        for s2 in range(
+                            max(s - exclude_sweep_size, 1), min(s + exclude_sweep_size + 1, num_samples - 1)
+                        ):
+                            if s2 == s and neighbour_ind == chan_ind:
+                                continue
+                            if abs(traces[s2, neighbour_ind]) < abs_thresholds[neighbour_ind]:
+                                continue
+                            if not _is_peak_candidate(traces, s2, neighbour_ind, abs_thresholds, do_neg, do_pos):
+                                continue
+                            value_j = abs(traces[s2, neighbour_ind]) / abs_thresholds[neighbour_ind]
+                            if value_j > value_i:
+                                keep = False
+                                break
+                            if (value_j == value_i) and (s > s2):
+                                # ... equal but after
+                                keep = False
+                                break
+                        if not keep:
+                            break
+
+                    if keep:
+                        chan_peak_samples[chan_ind, chan_num_peaks[chan_ind]] = s
+                        chan_num_peaks[chan_ind] += 1
+
+        return chan_peak_samples, chan_num_peaks
+
 
 class LocallyExclusiveTorchPeakDetector(ByChannelTorchPeakDetector):
     """Detect peaks using the "locally exclusive" method with pytorch."""
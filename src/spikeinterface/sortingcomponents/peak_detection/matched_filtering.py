@@ -36,6 +36,10 @@ class MatchedFilteringPeakDetector(PeakDetector):
         Parameter that should be provided to the get_convolution_weights() function
         in order to know how to estimate the positions. One argument is mode that could
         be either gaussian_2d (KS like) or exponential_3d (default)
+    conv_engine : "auto" | "fft" | "direct", default: "auto"
+        How traces are convolved with the prototype. "fft" uses an overlap-add FFT convolution with cached
+        prototype spectra (reused across chunks of the same size), "direct" loops over the samples of the prototype.
+        "auto" uses "direct" for short prototypes (less than 16 samples) and "fft" otherwise.
     """
 
     def __init__(
@@ -50,6 +54,7 @@ class MatchedFilteringPeakDetector(PeakDetector):
         random_chunk_kwargs={"num_chunks_per_segment": 5},
         weight_method={},
         return_output=True,
+        conv_engine="auto",
     ):
         PeakDetector.__init__(self, recording, return_output=return_output)
         from scipy.sparse import csr_matrix
@@ -72,7 +77,14 @@ class MatchedFilteringPeakDetector(PeakDetector):
             assert prototype[self.nbefore] > 0, "Prototype should have a positive peak"
 
         self.peak_sign = peak_sign
-        self.prototype = np.flip(prototype) / np.linalg.norm(prototype)
+        self.prototype = (np.flip(prototype) / np.linalg.norm(prototype)).astype("float32")
+
+        assert conv_engine in ("auto", "fft", "direct")
+        if conv_engine == "auto":
+            conv_engine = "direct" if self.prototype.size < 16 else "fft"
+        self.conv_engine = conv_engine
+        # prototype spectra, cached by fft size
+        self._prototype_spectra = {}
 
         contact_locations = recording.get_channel_locations()
         dist = np.linalg.norm(contact_locations[:, np.newaxis] - contact_locations[np.newaxis, :], axis=2)
@@ -137,14 +149,77 @@ class MatchedFilteringPeakDetector(PeakDetector):
         # return is always a tuple
         return (local_peaks,)
 
-    def get_convolved_traces(self, traces):
-        from scipy.signal import oaconvolve
+    def get_prototype_spectrum(self, n_fft, dtype):
+        from scipy.fft import rfft
+
+        key = (n_fft, np.dtype(dtype).str)
+        if key not in self._prototype_spectra:
+            self._prototype_spectra[key] = rfft(self.prototype.astype(dtype), n=n_fft)
+        return self._prototype_spectra[key]
 
-        tmp = oaconvolve(self.prototype[None, :], traces.T, axes=1, mode="valid")
-        scalar_products = self.weights.dot(tmp)
+    def get_convolved_traces(self, traces):
+        # same precision as a scipy convolution with the float32 prototype:
+        # float32 for float32 traces and float64 otherwise
+        dtype = "float32" if traces.dtype == np.float32 else "float64"
+        traces = traces.astype(dtype, copy=False)
+        if self.conv_engine == "fft":
+            n_fft = _get_overlap_add_fft_size(traces.shape[0], self.prototype.size)
+            prototype_spectrum = self.get_prototype_spectrum(n_fft, dtype)
+            tmp = _overlap_add_convolve(traces, prototype_spectrum, self.prototype.size, n_fft)
+        else:
+            tmp = _direct_convolve(traces, self.prototype)
+        scalar_products = self.weights.dot(tmp.T)
         return scalar_products
 
 
+def _get_overlap_add_fft_size(num_samples, kernel_size):
+    """
+    FFT size for the overlap-add convolution: blocks of a few times the kernel size are the most efficient,
+    but there is no need to go beyond the chunk length.
+    """
+    from scipy.fft import next_fast_len
+
+    return min(next_fast_len(max(8 * kernel_size, 1024)), next_fast_len(num_samples + kernel_size - 1))
+
+
+def _overlap_add_convolve(traces, kernel_spectrum, kernel_size, n_fft):
+    """
+    Convolve all channels of traces (num_samples, num_channels) with a kernel given by its spectrum,
+    using the overlap-add method. The output is the "valid" part of the convolution.
+    """
+    from scipy.fft import rfft, irfft
+
+    num_samples, num_channels = traces.shape
+    block_size = n_fft - kernel_size + 1
+    num_blocks = -(-num_samples // block_size)
+
+    padded = np.zeros((num_blocks * block_size, num_channels), dtype=traces.dtype)
+    padded[:num_samples] = traces
+    spectrum = rfft(padded.reshape(num_blocks, block_size, num_channels), n=n_fft, axis=1)
+    spectrum *= kernel_spectrum[None, :, None]
+    blocks = irfft(spectrum, n=n_fft, axis=1)
+
+    # the tail of each block overlaps the beginning of the next one
+    full = np.zeros(((num_blocks + 1) * block_size, num_channels), dtype=blocks.dtype)
+    full[: num_blocks * block_size] = blocks[:, :block_size].reshape(-1, num_channels)
+    full.reshape(num_blocks + 1, block_size, num_channels)[1:, : kernel_size - 1] += blocks[:, block_size:]
+
+    return full[kernel_size - 1 : num_samples]
+
+
+def _direct_convolve(traces, kernel):
+    """
+    Convolve all channels of traces (num_samples, num_channels) with a short kernel.
+    The output is the "valid" part of the convolution.
+    """
+    num_samples = traces.shape[0]
+    kernel_size = kernel.size
+    out = np.zeros((num_samples - kernel_size + 1, traces.shape[1]), dtype=traces.dtype)
+    for k in range(kernel_size):
+        out += kernel[kernel_size - 1 - k] * traces[k : k + num_samples - kernel_size + 1]
+    return out
+
+
 if HAVE_NUMBA:
     import numba
 
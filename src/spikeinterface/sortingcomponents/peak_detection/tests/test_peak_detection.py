@@ -297,6 +297,14 @@ def test_detect_peaks_locally_exclusive(recording, job_kwargs, torch_job_kwargs)
     )
     assert len(peaks_by_channel_np) > len(peaks_local_numba)
 
+    peaks_local_csr = detect_peaks(
+        recording,
+        method="locally_exclusive",
+        method_kwargs=dict(peak_sign="neg", detect_threshold=5, exclude_sweep_ms=1.0, parallel_kernel=True),
+        job_kwargs=job_kwargs,
+    )
+    assert np.array_equal(peaks_local_numba, peaks_local_csr)
+
     # DEBUG = True
     DEBUG = False
     if DEBUG:
@@ -352,6 +360,30 @@ def test_detect_peaks_locally_exclusive(recording, job_kwargs, torch_job_kwargs)
         # assert len(peaks_local_numba) == len(peaks_local_cl)
 
 
+def test_locally_exclusive_csr_kernel_consecutive_peaks():
+    from spikeinterface.sortingcomponents.peak_detection.locally_exclusive import (
+        detect_peaks_numba_locally_exclusive_on_chunk,
+        detect_peaks_numba_locally_exclusive_on_chunk_csr,
+    )
+
+    # alternating trace: with peak_sign="both" and no exclusion, every sample is a kept peak
+    num_samples, num_chans = 1000, 3
+    traces = np.zeros((num_samples, num_chans), dtype="float32")
+    traces[:, 0] = np.where(np.arange(num_samples) % 2 == 0, 10.0, -10.0)
+    abs_thresholds = np.ones(num_chans, dtype="float32")
+    neighbours_mask = np.eye(num_chans, dtype=bool)
+    neighbours_indptr = np.arange(num_chans + 1, dtype=np.int64)
+    neighbours_indices = np.arange(num_chans, dtype=np.int64)
+
+    samples, chans = detect_peaks_numba_locally_exclusive_on_chunk(traces, "both", abs_thresholds, 0, neighbours_mask)
+    samples_csr, chans_csr = detect_peaks_numba_locally_exclusive_on_chunk_csr(
+        traces, "both", abs_thresholds, 0, neighbours_indptr, neighbours_indices
+    )
+    assert samples.size == num_samples - 2
+    assert np.array_equal(samples, samples_csr)
+    assert np.array_equal(chans, chans_csr)
+
+
 def test_detect_peaks_matched_filtering(recording, job_kwargs):
     peaks_le = detect_peaks(
         recording,
@@ -396,6 +428,24 @@ def test_detect_peaks_matched_filtering(recording, job_kwargs):
     # @pierre there is no garanty that both have more peaks, because positive peaks can eliminate negative peaks!!
     # assert len(peaks_mf_both) > len(peaks_mf_neg)
 
+    # conv engines give the same detections and keep the precision of the traces
+    # a single node is used because thresholds are estimated on random chunks
+    from spikeinterface.sortingcomponents.peak_detection.matched_filtering import MatchedFilteringPeakDetector
+
+    node = MatchedFilteringPeakDetector(
+        recording, prototype=prototype, ms_before=1.0, peak_sign="both", detect_threshold=5.0, exclude_sweep_ms=1.0
+    )
+    traces = recording.get_traces(start_frame=0, end_frame=30_000)
+    for dtype in ("float32", "float64"):
+        all_peaks = []
+        for conv_engine in ("fft", "direct"):
+            node.conv_engine = conv_engine
+            assert node.get_convolved_traces(traces.astype(dtype)).dtype == np.dtype(dtype)
+            (local_peaks,) = node.compute(traces.astype(dtype), 0, traces.shape[0], 0, node.get_margin())
+            all_peaks.append(local_peaks)
+        assert np.array_equal(all_peaks[0]["sample_index"], all_peaks[1]["sample_index"])
+        assert np.array_equal(all_peaks[0]["channel_index"], all_peaks[1]["channel_index"])
+
     DEBUG = False
     # DEBUG = True
     if DEBUG:
@@ -418,6 +468,29 @@ def test_detect_peaks_matched_filtering(recording, job_kwargs):
         plt.show()
 
 
+def test_matched_filtering_convolution():
+    from scipy.signal import oaconvolve
+    from spikeinterface.sortingcomponents.peak_detection.matched_filtering import (
+        _get_overlap_add_fft_size,
+        _overlap_add_convolve,
+        _direct_convolve,
+    )
+    from scipy.fft import rfft
+
+    rng = np.random.default_rng(seed=0)
+    traces = rng.normal(size=(5000, 8)).astype("float32")
+    for kernel_size in (5, 90):
+        kernel = rng.normal(size=kernel_size).astype("float32")
+        expected = oaconvolve(kernel[None, :].astype("float64"), traces.T.astype("float64"), axes=1, mode="valid").T
+
+        n_fft = _get_overlap_add_fft_size(traces.shape[0], kernel_size)
+        conv_fft = _overlap_add_convolve(traces, rfft(kernel, n=n_fft), kernel_size, n_fft)
+        conv_direct = _direct_convolve(traces, kernel)
+        assert conv_fft.shape == expected.shape
+        assert np.allclose(conv_fft, expected, atol=1e-4)
+        assert np.allclose(conv_direct, expected, atol=1e-4)
+
+
 detection_classes = [
     ByChannelPeakDetector,
     ByChannelTorchPeakDetector,
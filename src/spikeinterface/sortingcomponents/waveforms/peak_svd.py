@@ -45,6 +45,10 @@ def extract_peaks_svd(
     This avoid the use of interpolating the traces iself (with krigging).
 
     The output shape is (num_peaks, n_components, max_sparse_channel)
+
+    If folder is given, the features are written chunk by chunk in folder / "features" ("sparse_svd.npy") and
+    returned as a memmap, so the memory does not depend on the number of peaks. The peaks are also saved in
+    this folder which can then be read with FeaturesLoader (or given to split_clusters()).
     """
 
     job_kwargs = fix_job_kwargs(job_kwargs)
@@ -182,10 +186,14 @@ def extract_peaks_svd(
         peaks_svd, peak_channel_indices = outs
         new_peaks = peaks.copy()
         new_peaks["channel_index"] = peak_channel_indices
+        if features_folder is not None:
+            np.save(features_folder / "peaks.npy", new_peaks)
         # here the mask is not the waveform mask (bigger) but the final mask of requested radius
         sparse_mask = final_sparsity_mask
         return peaks_svd, sparse_mask, svd_model, new_peaks
     else:
         peaks_svd = outs
+        if features_folder is not None:
+            np.save(features_folder / "peaks.npy", peaks)
         sparse_mask = wf_sparsity_mask
         return peaks_svd, sparse_mask, svd_model
@@ -0,0 +1,29 @@
+import pytest
+import numpy as np
+
+from spikeinterface.sortingcomponents.waveforms.peak_svd import extract_peaks_svd
+from spikeinterface.sortingcomponents.clustering.tools import FeaturesLoader
+
+
+def test_extract_peaks_svd_folder(generated_recording, detected_peaks, chunk_executor_kwargs, tmp_path):
+    recording = generated_recording
+    peaks = detected_peaks
+
+    peaks_svd, sparse_mask, svd_model = extract_peaks_svd(
+        recording, peaks, n_components=3, seed=0, job_kwargs=chunk_executor_kwargs
+    )
+    assert peaks_svd.shape[0] == peaks.size
+    assert peaks_svd.shape[1] == 3
+
+    # features are written to disk chunk by chunk
+    folder = tmp_path / "peaks_svd"
+    peaks_svd_memmap, sparse_mask2, _ = extract_peaks_svd(
+        recording, peaks, svd_model=svd_model, folder=folder, job_kwargs=chunk_executor_kwargs
+    )
+    assert isinstance(peaks_svd_memmap, np.memmap)
+    np.testing.assert_array_equal(sparse_mask, sparse_mask2)
+    np.testing.assert_allclose(peaks_svd_memmap, peaks_svd, rtol=1e-5, atol=1e-5)
+
+    features = FeaturesLoader(folder / "features")
+    np.testing.assert_array_equal(features["peaks"], peaks)
+    np.testing.assert_array_equal(features["sparse_svd"], peaks_svd_memmap)